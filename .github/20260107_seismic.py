@@ -1,16 +1,35 @@
 import tkinter as tk
-from tkinter import filedialog, messagebox, scrolledtext, ttk
+from tkinter import filedialog, messagebox, scrolledtext, ttk, simpledialog
 import numpy as np
 import segyio
 import matplotlib
 matplotlib.use('TkAgg') 
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-from scipy.interpolate import griddata
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
+from matplotlib.path import Path
+from scipy.interpolate import griddata, CloughTocher2DInterpolator
+from scipy.spatial import cKDTree
+from scipy.signal import hilbert
 from mpl_toolkits.axes_grid1 import make_axes_locatable
 import json
 import os
-import csv
+import threading
+import hashlib
+import zlib
+import heapq
+import multiprocessing
+import itertools
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# --- 대용량 CSV 고속 파싱 (선택) ---
+try:
+    import pandas as pd
+    HAS_PANDAS = True
+except ImportError:
+    HAS_PANDAS = False
 
 # -----------------------------------------------------------
 # 1. 커스텀 툴바
@@ -18,11 +37,1247 @@ import csv
 class CustomToolbar(NavigationToolbar2Tk):
     def set_message(self, s): pass
 
+# -----------------------------------------------------------
+# 1-1. 섹션 캐시 (LRU, 메모리 한도 기반)
+# -----------------------------------------------------------
+class SectionCache:
+    # 디코딩/데시메이션된 2D 섹션을 보관해 같은 라인을 다시 열 때 SEG-Y를 재읽지 않음
+    def __init__(self, max_mb=1024):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock() # prefetch 스레드와 공유
+
+    @staticmethod
+    def make_key(path, coord_type):
+        # 파일이 바뀌면(mtime/size) 자동으로 다른 키가 됨
+        st = os.stat(path)
+        return (os.path.abspath(path), st.st_mtime_ns, st.st_size, coord_type)
+
+    @staticmethod
+    def entry_bytes(entry):
+        return sum(v.nbytes for v in entry.values() if isinstance(v, np.ndarray))
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None: self.entries.move_to_end(key)
+            return entry
+
+    def has(self, key):
+        with self.lock: return key in self.entries
+
+    def put(self, key, entry):
+        size = self.entry_bytes(entry)
+        if size > self.max_bytes: return
+        with self.lock:
+            if key in self.entries: self.total_bytes -= self.entry_bytes(self.entries.pop(key))
+            self.entries[key] = entry; self.total_bytes += size
+            self.evict()
+
+    def evict(self):
+        while self.total_bytes > self.max_bytes and self.entries:
+            _, old = self.entries.popitem(last=False)
+            self.total_bytes -= self.entry_bytes(old)
+
+# -----------------------------------------------------------
+# 1-1b. 슬라이스 선읽기 (백그라운드 prefetch)
+# -----------------------------------------------------------
+class SlicePrefetcher:
+    # 슬라이더 진행 방향의 슬라이스를 백그라운드 스레드가 미리 읽어 캐시에 채움
+    # read_fn은 파일 핸들 락을 직접 잡아야 함 (segyio 핸들은 스레드 안전하지 않음)
+    def __init__(self, read_fn, cache):
+        self.read_fn = read_fn; self.cache = cache
+        self.cond = threading.Condition(); self.tasks = deque(); self.stopped = False
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def request(self, keys):
+        # 이전 요청은 버리고 최신 위치 기준으로 교체
+        with self.cond:
+            self.tasks.clear(); self.tasks.extend(keys); self.cond.notify()
+
+    def run(self):
+        while True:
+            with self.cond:
+                while not self.tasks and not self.stopped: self.cond.wait()
+                if self.stopped: return
+                key = self.tasks.popleft()
+            if self.cache.has(key): continue
+            try: data = self.read_fn(key)
+            except Exception: continue
+            self.cache.put(key, {'data': data})
+
+    def stop(self):
+        with self.cond:
+            self.stopped = True; self.tasks.clear(); self.cond.notify()
+
+# -----------------------------------------------------------
+# 1-2. 호라이즌 벌크 입출력 (벡터화 CSV + 바이너리 컬럼 포맷)
+# -----------------------------------------------------------
+HZB_MAGIC = b"WOOHZB01"
+HZB_COLUMNS = [('X', '<f8'), ('Y', '<f8'), ('TWT', '<f4'), ('TraceIdx', '<i8')]
+HORIZON_IO_CHUNK = 1_000_000
+
+def horizon_points_array(points):
+    # [[x, y, twt, idx], ...] 또는 (N, 4) 배열 -> (N, 4) float64 (이미 그 형태면 같은 객체 그대로)
+    if len(points) == 0: return np.empty((0, 4))
+    arr = np.asarray(points, dtype=float)
+    return arr if arr.ndim == 2 and arr.shape[1] == 4 else arr.reshape(-1, 4)
+
+def insert_pick(points, pt):
+    # 레이어는 열 3(키) 오름차순 (N, 4) 배열로 유지: 같은 키들 뒤에 삽입 (= append 후 stable 정렬과 같은 위치)
+    arr = horizon_points_array(points)
+    k = int(np.searchsorted(arr[:, 3], pt[3], side='right'))
+    return np.insert(arr, k, pt, axis=0), k
+
+def write_horizons_csv(path, horizons):
+    # 청크 단위 np.savetxt로 열린 핸들에 바로 기록 (전체 문자열/리스트를 만들지 않음)
+    CHUNK = 100_000
+    with open(path, 'w', newline='') as f:
+        f.write("Layer,X,Y,TWT,TraceIdx\n")
+        for name, d in horizons.items():
+            arr = horizon_points_array(d['points'])
+            row_fmt = [name.replace('%', '%%') + ",%.15g", "%.15g", "%.15g", "%d"] # 열별 포맷 (문자열 1개면 savetxt가 % 개수를 셈)
+            for s in range(0, len(arr), CHUNK): np.savetxt(f, arr[s:s+CHUNK], fmt=row_fmt, delimiter=',')
+
+def read_horizons_csv(path):
+    # 반환: {layer: (N, 4) ndarray}  (TraceIdx 기준 정렬)
+    cols = ['Layer', 'X', 'Y', 'TWT', 'TraceIdx']
+    parts = {}
+    if HAS_PANDAS:
+        reader = pd.read_csv(path, usecols=cols, dtype={'Layer': str, 'X': np.float64, 'Y': np.float64, 'TWT': np.float64, 'TraceIdx': np.float64},
+                             engine='c', chunksize=HORIZON_IO_CHUNK, skipinitialspace=True)
+        for chunk in reader:
+            layer = chunk['Layer'].str.strip().to_numpy()
+            vals = chunk[cols[1:]].to_numpy(dtype=float)
+            for name in np.unique(layer): parts.setdefault(name, []).append(vals[layer == name])
+    else:
+        with open(path, 'r', encoding='utf-8') as f: header = [h.strip() for h in f.readline().split(',')]
+        usecols = [header.index(c) for c in cols]
+        dt = [('Layer', 'U64')] + [(c, 'f8') for c in cols[1:]]
+        rec = np.atleast_1d(np.loadtxt(path, delimiter=',', skiprows=1, usecols=usecols, dtype=dt, encoding='utf-8'))
+        layer = np.char.strip(rec['Layer'])
+        vals = np.column_stack([rec[c] for c in cols[1:]])
+        for name in np.unique(layer): parts.setdefault(str(name), []).append(vals[layer == name])
+    out = {}
+    for name, chunks in parts.items():
+        arr = np.concatenate(chunks)
+        out[name] = arr[np.argsort(arr[:, 3], kind='stable')]
+    return out
+
+def write_horizons_bin(path, horizons):
+    # 구조: MAGIC | meta 길이(u8) | meta JSON | 호라이즌별 컬럼 블록(X, Y, TWT, TraceIdx)
+    arrays = {name: horizon_points_array(d['points']) for name, d in horizons.items()}
+    meta = {'columns': HZB_COLUMNS, 'layers': [{'name': n, 'color': horizons[n].get('color'), 'count': len(a)} for n, a in arrays.items()]}
+    blob = json.dumps(meta).encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(HZB_MAGIC); f.write(np.uint64(len(blob)).tobytes()); f.write(blob)
+        for arr in arrays.values():
+            for i, (_, dt) in enumerate(HZB_COLUMNS):
+                for s in range(0, len(arr), HORIZON_IO_CHUNK): arr[s:s+HORIZON_IO_CHUNK, i].astype(dt).tofile(f)
+
+def read_horizons_bin(path):
+    with open(path, 'rb') as f:
+        if f.read(len(HZB_MAGIC)) != HZB_MAGIC: raise ValueError("Not a horizon binary file")
+        n = int(np.frombuffer(f.read(8), dtype='<u8')[0])
+        meta = json.loads(f.read(n).decode('utf-8'))
+        offset = f.tell()
+    # 컬럼 블록은 memmap으로 바로 매핑 (파싱 없음)
+    out = {}
+    for layer in meta['layers']:
+        cnt = layer['count']; cols = []
+        for _, dt in meta['columns']:
+            cols.append(np.memmap(path, dtype=dt, mode='r', offset=offset, shape=(cnt,)) if cnt else np.empty(0, dt))
+            offset += cnt * np.dtype(dt).itemsize
+        arr = np.column_stack(cols).astype(float) if cnt else np.empty((0, 4))
+        out[layer['name']] = arr[np.argsort(arr[:, 3], kind='stable')]
+    return out
+
+# -----------------------------------------------------------
+# 1-3. 프로젝트 저널 (Append-only 편집 기록 + 바이너리 스냅샷)
+# -----------------------------------------------------------
+class ProjectJournal:
+    # <base>.journal : 편집 1건 = JSON 1줄 (append + flush, 자동 저장 비용 ≈ 0)
+    # <base>.snap.npz: 주기적 compaction 결과 (라인/호라이즌별 (N,4) 배열)
+    # 복구 = 스냅샷 로드 후 저널 재생
+    COMPACT_EVERY = 2000
+    INLINE_SET_MAX = 5000 # 이보다 큰 일괄 변경(Import 등)은 저널 대신 즉시 compaction
+
+    def __init__(self, base_path):
+        self.base_path = base_path
+        self.journal_path = base_path + ".journal"
+        self.snapshot_path = base_path + ".snap.npz"
+        self.fh = None
+        self.records = 0
+
+    def has_data(self):
+        return os.path.exists(self.snapshot_path) or (os.path.exists(self.journal_path) and os.path.getsize(self.journal_path) > 0)
+
+    def append(self, rec):
+        if self.fh is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.journal_path)), exist_ok=True)
+            self.fh = open(self.journal_path, 'a', encoding='utf-8')
+        self.fh.write(json.dumps(rec, separators=(',', ':')) + "\n"); self.fh.flush()
+        self.records += 1
+
+    def needs_compaction(self):
+        return self.records >= self.COMPACT_EVERY
+
+    def write_snapshot(self, lines):
+        # lines: {fname: {'path':..., 'horizons': {name: {'color', 'points'}}}}
+        meta = {'lines': []}; arrays = {}
+        for i, (fname, d) in enumerate(lines.items()):
+            hz = []
+            for j, (hname, hd) in enumerate(d['horizons'].items()):
+                key = f"h{i}_{j}"; arrays[key] = horizon_points_array(hd['points'])
+                hz.append({'name': hname, 'color': hd.get('color'), 'key': key})
+            meta['lines'].append({'name': fname, 'path': d['path'], 'horizons': hz})
+        tmp = self.snapshot_path + ".tmp.npz"
+        with open(tmp, 'wb') as f:
+            np.savez(f, meta=np.frombuffer(json.dumps(meta).encode('utf-8'), dtype=np.uint8), **arrays)
+            f.flush(); os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+        # 스냅샷이 확정된 뒤에만 저널 비우기
+        if self.fh is not None: self.fh.close(); self.fh = None
+        open(self.journal_path, 'w').close()
+        self.records = 0
+
+    def load(self):
+        lines = {}
+        if os.path.exists(self.snapshot_path):
+            with np.load(self.snapshot_path, allow_pickle=False) as z:
+                meta = json.loads(z['meta'].tobytes().decode('utf-8'))
+                for ln in meta['lines']:
+                    lines[ln['name']] = {'path': ln['path'], 'horizons': {h['name']: {'color': h['color'], 'points': horizon_points_array(z[h['key']])} for h in ln['horizons']}}
+        if os.path.exists(self.journal_path):
+            good = 0
+            with open(self.journal_path, 'rb') as f:
+                for raw in f:
+                    if not raw.endswith(b"\n"): break
+                    try: rec = json.loads(raw.decode('utf-8'))
+                    except ValueError: break # 크래시로 잘린 마지막 줄
+                    self.apply(lines, rec)
+                    self.records += 1; good += len(raw)
+            # 잘린 꼬리는 잘라내야 이후 append가 유효한 줄로 이어짐
+            if good < os.path.getsize(self.journal_path):
+                with open(self.journal_path, 'r+b') as f: f.truncate(good)
+        return lines
+
+    @staticmethod
+    def apply(lines, rec):
+        op = rec['op']
+        if op == 'line':
+            lines.setdefault(rec['name'], {'path': rec['path'], 'horizons': {}})
+            return
+        if rec['line'] not in lines: return
+        hz = lines[rec['line']]['horizons']
+        layer = hz.setdefault(rec['layer'], {'color': rec.get('color'), 'points': []})
+        pts = horizon_points_array(layer['points'])
+        if op == 'add':
+            layer['points'] = insert_pick(pts, rec['pt'])[0] # 뷰어와 동일한 삽입 규칙
+        elif op == 'del':
+            if 0 <= rec['i'] < len(pts): layer['points'] = np.delete(pts, rec['i'], axis=0)
+        elif op == 'set':
+            layer['points'] = horizon_points_array(rec['pts'])
+
+    def close(self):
+        if self.fh is not None: self.fh.close(); self.fh = None
+
+    def discard(self):
+        self.close()
+        for p in (self.journal_path, self.snapshot_path):
+            if os.path.exists(p): os.remove(p)
+        self.records = 0
+
+# -----------------------------------------------------------
+# 1-4. 그리드 입출력 (ZMAP+ / ESRI ASCII / Raw float32 + ENVI hdr)
+# -----------------------------------------------------------
+GRID_BLOCK = 64 # 한 번에 보간/기록하는 행(열) 수
+
+class HorizonGrid:
+    # 규칙 격자 (xi, yi 오름차순). z[iy, ix] 배열이 있으면 그대로 쓰고,
+    # 없으면 보간기로 블록 단위 계산 → 대형 그리드도 전체를 메모리에 만들지 않음
+    def __init__(self, xi, yi, z=None, interp=None):
+        self.xi = np.asarray(xi, dtype=float); self.yi = np.asarray(yi, dtype=float)
+        self.z = z; self.interp = interp
+
+    @classmethod
+    def from_points(cls, x, y, z, cell):
+        # griddata(method='cubic')와 같은 Clough-Tocher 보간, 삼각분할은 1회만 수행
+        xi = np.arange(np.min(x), np.max(x) + cell * 0.5, cell)
+        yi = np.arange(np.min(y), np.max(y) + cell * 0.5, cell)
+        return cls(xi, yi, interp=CloughTocher2DInterpolator(np.column_stack((x, y)), z))
+
+    @property
+    def shape(self): return (len(self.yi), len(self.xi))
+    @property
+    def dx(self): return float(self.xi[1] - self.xi[0]) if len(self.xi) > 1 else 1.0
+    @property
+    def dy(self): return float(self.yi[1] - self.yi[0]) if len(self.yi) > 1 else 1.0
+
+    def block(self, r0, r1, c0, c1):
+        # z[r0:r1, c0:c1] (yi 오름차순 인덱스)
+        if self.z is not None: return np.asarray(self.z[r0:r1, c0:c1], dtype=float)
+        X, Y = np.meshgrid(self.xi[c0:c1], self.yi[r0:r1])
+        return self.interp(X, Y)
+
+    def rows_north_to_south(self, n=GRID_BLOCK):
+        ny, nx = self.shape
+        for r1 in range(ny, 0, -n):
+            r0 = max(0, r1 - n)
+            yield self.block(r0, r1, 0, nx)[::-1]
+
+    def cols_west_to_east(self, n=GRID_BLOCK):
+        # 반환 블록: (열 수, ny) 각 열은 북→남 순서
+        ny, nx = self.shape
+        for c0 in range(0, nx, n):
+            yield self.block(0, ny, c0, min(nx, c0 + n))[::-1].T
+
+def _format_block(vals, fmt, per_line):
+    # 값 배열을 한 줄에 per_line개씩, 한 번의 % 포매팅으로 문자열 생성
+    vals = vals.ravel(); n_full = len(vals) // per_line
+    out = ((fmt * per_line).rstrip() + "\n") * n_full % tuple(vals[:n_full * per_line].tolist())
+    rest = vals[n_full * per_line:]
+    if len(rest): out += (fmt * len(rest)).rstrip() % tuple(rest.tolist()) + "\n"
+    return out
+
+def write_grid_zmap(path, grid, name="HORIZON"):
+    ZNULL = 1e30; ny, nx = grid.shape
+    with open(path, 'w') as f:
+        f.write(f"! Woo Interpreter grid export\n@{name}, GRID, 5\n15, {ZNULL:.1E}, , 7, 1\n")
+        f.write(f"{ny}, {nx}, {grid.xi[0]:.7f}, {grid.xi[-1]:.7f}, {grid.yi[0]:.7f}, {grid.yi[-1]:.7f}\n0.0, 0.0, 0.0\n@\n")
+        # ZMAP+는 열 우선(서→동), 각 열은 북→남, 열마다 새 줄
+        for blk in grid.cols_west_to_east():
+            blk = np.where(np.isnan(blk), ZNULL, blk)
+            for col in blk: f.write(_format_block(col, "%15.7g", 5))
+
+def write_grid_esri(path, grid):
+    NODATA = -9999.0; ny, nx = grid.shape
+    with open(path, 'w') as f:
+        f.write(f"ncols {nx}\nnrows {ny}\nxllcenter {grid.xi[0]:.6f}\nyllcenter {grid.yi[0]:.6f}\n")
+        if abs(grid.dx - grid.dy) < 1e-9 * max(1.0, abs(grid.dx)): f.write(f"cellsize {grid.dx:.6f}\n")
+        else: f.write(f"dx {grid.dx:.6f}\ndy {grid.dy:.6f}\n")
+        f.write(f"NODATA_value {NODATA:g}\n")
+        for blk in grid.rows_north_to_south():
+            f.write(_format_block(np.where(np.isnan(blk), NODATA, blk), "%.6g ", nx))
+
+def write_grid_raw(path, grid):
+    # float32 little-endian, 북→남 행 순서 + ENVI 헤더 (GDAL에서 GeoTIFF처럼 열림)
+    ny, nx = grid.shape
+    with open(path, 'wb') as f:
+        for blk in grid.rows_north_to_south(): blk.astype('<f4').tofile(f)
+    with open(os.path.splitext(path)[0] + ".hdr", 'w') as f:
+        f.write(f"ENVI\nsamples = {nx}\nlines = {ny}\nbands = 1\nheader offset = 0\nfile type = ENVI Standard\n")
+        f.write("data type = 4\ninterleave = bsq\nbyte order = 0\ndata ignore value = nan\n")
+        f.write(f"map info = {{Arbitrary, 1, 1, {grid.xi[0] - grid.dx / 2:.6f}, {grid.yi[-1] + grid.dy / 2:.6f}, {grid.dx:.6f}, {grid.dy:.6f}}}\n")
+
+def write_grid(path, grid, name="HORIZON"):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.asc': write_grid_esri(path, grid)
+    elif ext in ('.bin', '.raw'): write_grid_raw(path, grid)
+    else: write_grid_zmap(path, grid, name)
+
+def _grid_header_line(f):
+    # ZMAP 헤더 한 줄 ('!' 주석 건너뜀)
+    while True:
+        line = f.readline()
+        if not line: raise ValueError("Unexpected end of grid header")
+        line = line.decode('latin-1').strip()
+        if not line.startswith('!'): return line
+
+def read_grid(path):
+    # 반환: HorizonGrid (z는 yi 오름차순)
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.bin', '.raw'):
+        hdr = {}
+        with open(os.path.splitext(path)[0] + ".hdr", 'r') as f:
+            for line in f:
+                if '=' in line: k, v = line.split('=', 1); hdr[k.strip().lower()] = v.strip()
+        nx, ny = int(hdr['samples']), int(hdr['lines'])
+        mi = [t.strip() for t in hdr['map info'].strip('{}').split(',')]
+        x0, y0, dx, dy = float(mi[3]), float(mi[4]), float(mi[5]), float(mi[6])
+        z = np.memmap(path, dtype='<f4', mode='r', shape=(ny, nx))[::-1] # 복사 없이 뷰
+        return HorizonGrid(x0 + dx / 2 + dx * np.arange(nx), y0 - dy / 2 - dy * np.arange(ny)[::-1], z=z)
+    # 헤더만 줄 단위로 읽고 값 본문은 열린 핸들에서 np.fromfile(C 파서)로 바로 스트리밍 (전체 텍스트를 메모리에 올리지 않음)
+    with open(path, 'rb') as f:
+        if ext == '.asc':
+            hdr = {}
+            while True:
+                pos = f.tell(); line = f.readline().decode('latin-1').strip()
+                if not line or not line[0].isalpha(): break
+                key, val = line.split()[:2]; hdr[key.lower()] = float(val)
+            f.seek(pos)
+            nx, ny = int(hdr['ncols']), int(hdr['nrows'])
+            dx = hdr.get('cellsize', hdr.get('dx')); dy = hdr.get('cellsize', hdr.get('dy'))
+            x0 = hdr['xllcenter'] if 'xllcenter' in hdr else hdr['xllcorner'] + dx / 2
+            y0 = hdr['yllcenter'] if 'yllcenter' in hdr else hdr['yllcorner'] + dy / 2
+            z = np.fromfile(f, sep=' ', count=nx * ny).reshape(ny, nx)[::-1]
+            nodata = hdr.get('nodata_value')
+            if nodata is not None: z[z == nodata] = np.nan
+            return HorizonGrid(x0 + dx * np.arange(nx), y0 + dy * np.arange(ny), z=z)
+        # ZMAP+
+        line = _grid_header_line(f)
+        while not line.startswith('@'): line = _grid_header_line(f)
+        h2 = [t.strip() for t in _grid_header_line(f).split(',')]; h3 = [float(t) for t in _grid_header_line(f).split(',')]
+        znull = float(h2[1]) if h2[1] else float(h2[2])
+        ny, nx = int(h3[0]), int(h3[1])
+        line = _grid_header_line(f)
+        while not line.startswith('@'): line = _grid_header_line(f)
+        z = np.fromfile(f, sep=' ', count=nx * ny).reshape(nx, ny).T[::-1]
+    z = np.where(np.isclose(z, znull), np.nan, z)
+    return HorizonGrid(np.linspace(h3[2], h3[3], nx), np.linspace(h3[4], h3[5], ny), z=z)
+
+# -----------------------------------------------------------
+# 1-5. 타임 슬라이스 캐시 (sample-major memmap, 1회 변환)
+# -----------------------------------------------------------
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".woo_interpreter", "cache")
+
+def cube_cache_path(segy_path, suffix):
+    # 원본 경로/크기/수정시각으로 태그 → 원본이 바뀌면 캐시 자동 무효화
+    st = os.stat(segy_path)
+    tag = hashlib.md5(f"{os.path.abspath(segy_path)}|{st.st_size}|{st.st_mtime_ns}".encode('utf-8')).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, f"{os.path.basename(segy_path)}.{tag}.{suffix}")
+
+class SampleMajorCube:
+    # segyio는 trace-major라 time slice 1장에 큐브 전체 읽기가 필요함
+    # → (ns, n_il, n_xl) float32 .npy로 한 번 전치해 두면 time slice = 연속 블록 1개
+    def __init__(self, segy_path, shape):
+        self.path = cube_cache_path(segy_path, "zslice.npy")
+        self.shape = tuple(shape)
+        self.cube = None; self.progress = 0.0; self.error = None
+        self.cancelled = False; self.thread = None
+
+    def open_existing(self):
+        if not os.path.exists(self.path): return False
+        try: cube = np.load(self.path, mmap_mode='r')
+        except (ValueError, OSError): return False
+        if cube.shape != self.shape: return False
+        self.cube = cube
+        return True
+
+    def build_async(self, read_line, ilines, io_lock):
+        self.thread = threading.Thread(target=self.build, args=(read_line, ilines, io_lock), daemon=True)
+        self.thread.start()
+
+    def build(self, read_line, ilines, io_lock):
+        tmp = self.path + ".tmp"
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            out = np.lib.format.open_memmap(tmp, mode='w+', dtype=np.float32, shape=self.shape)
+            n = len(ilines)
+            for i, il in enumerate(ilines):
+                # 라인 단위로만 락을 잡아 뷰어의 슬라이스 읽기를 막지 않음
+                with io_lock:
+                    if self.cancelled: return # on_close가 핸들을 닫기 전에 cancel 함
+                    line = read_line(il) # (n_xl, ns)
+                out[:, i, :] = line.T
+                self.progress = (i + 1) / n
+            out.flush(); del out
+            os.replace(tmp, self.path)
+            self.cube = np.load(self.path, mmap_mode='r')
+        except Exception as e:
+            self.error = e
+        finally:
+            if self.cube is None and os.path.exists(tmp):
+                try: os.remove(tmp)
+                except OSError: pass
+
+    def cancel(self): self.cancelled = True
+
+    @property
+    def ready(self): return self.cube is not None
+
+# -----------------------------------------------------------
+# 1-6. 3D Bin Grid (Inline/Crossline ↔ X/Y 아핀 변환)
+# -----------------------------------------------------------
+def header_scalar(v):
+    v = float(v)
+    if v == 0: return 1.0
+    return 1.0 / abs(v) if v < 0 else v
+
+class BinGrid:
+    # X = c[0,0] + c[0,1]*il + c[0,2]*xl
+    # Y = c[1,0] + c[1,1]*il + c[1,2]*xl
+    # 헤더 몇 개만 읽어서 맞추고, 이후 좌표는 전부 벡터 계산 (트레이스 헤더 재읽기 없음)
+    def __init__(self, coef, rms=0.0):
+        self.coef = np.asarray(coef, dtype=float); self.rms = rms
+        self.inv = np.linalg.pinv(self.coef[:, 1:])
+
+    @classmethod
+    def fit(cls, il, xl, x, y):
+        A = np.column_stack((np.ones(len(il)), il, xl)).astype(float)
+        coef, _, _, _ = np.linalg.lstsq(A, np.column_stack((x, y)).astype(float), rcond=None)
+        res = A @ coef - np.column_stack((x, y))
+        return cls(coef.T, float(np.sqrt(np.mean(res ** 2))))
+
+    @classmethod
+    def from_segy(cls, f, geom, n_samples=9):
+        # 네 모서리 + 내부 n_samples개 트레이스 헤더만 사용 (n_samples=0이면 모서리 4개만)
+        il_byte, xl_byte = geom.il_byte, geom.xl_byte
+        il, xl, x, y = [], [], [], []
+        for t in geom.sample_traces(n_samples):
+            h = f.header[t]
+            sc = header_scalar(h[segyio.TraceField.SourceGroupScalar])
+            cx, cy = h[segyio.TraceField.CDP_X], h[segyio.TraceField.CDP_Y]
+            if cx == 0 and cy == 0: cx, cy = h[segyio.TraceField.SourceX], h[segyio.TraceField.SourceY]
+            il.append(h[il_byte]); xl.append(h[xl_byte]); x.append(cx * sc); y.append(cy * sc)
+        return cls.fit(np.array(il), np.array(xl), np.array(x), np.array(y))
+
+    def xy(self, il, xl):
+        il, xl = np.broadcast_arrays(np.asarray(il, dtype=float), np.asarray(xl, dtype=float))
+        c = self.coef
+        return c[0,0] + c[0,1]*il + c[0,2]*xl, c[1,0] + c[1,1]*il + c[1,2]*xl
+
+    def ilxl(self, x, y):
+        d = np.stack((np.asarray(x, dtype=float) - self.coef[0,0], np.asarray(y, dtype=float) - self.coef[1,0]))
+        r = np.tensordot(self.inv, d, axes=1)
+        return r[0], r[1]
+
+FOLD_MAP_CELLS = 128 # 커버리지 래스터 축당 최대 셀 수
+
+def survey_fold_map(path, il_byte=None, xl_byte=None, max_cells=FOLD_MAP_CELLS):
+    # IL/XL를 간격 두고 샘플링해서 live(0이 아닌 트레이스)/dead 래스터 생성 (백그라운드용)
+    with SegyReaderService.acquire(path, il_byte, xl_byte) as f:
+        geom = f.geom
+        ilines, xlines = geom.ilines, geom.xlines
+        i_sel = np.unique(np.linspace(0, len(ilines) - 1, min(max_cells, len(ilines))).astype(int))
+        j_sel = np.unique(np.linspace(0, len(xlines) - 1, min(max_cells, len(xlines))).astype(int))
+        tr = geom.table[np.ix_(i_sel, j_sel)]
+        live = tr >= 0 # 인덱스상 빈 bin은 dead
+        dead_code = segyio.TraceField.TraceIdentificationCode
+        for r in range(tr.shape[0]):
+            # 행 단위로 헤더/트레이스를 한 번에 요청 (리더 서비스가 병합 읽기)
+            cols = np.flatnonzero(live[r])
+            if len(cols) == 0: continue
+            codes = np.array([h[dead_code] for h in f.headers(tr[r, cols])])
+            live[r, cols] = (codes != 2) & np.any(f.read_traces(tr[r, cols]) != 0, axis=1)
+    return {'il': ilines[i_sel], 'xl': xlines[j_sel], 'live': live}
+
+# -----------------------------------------------------------
+# 1-7. 3D 임의 단면 (Arbitrary Line)
+# -----------------------------------------------------------
+ARB_GAP_MERGE = 16 # 이 간격 이하로 떨어진 트레이스는 한 번에 연속 읽기
+
+def line_step(arr):
+    return float(arr[1] - arr[0]) if len(arr) > 1 else 1.0
+
+def polyline_bins(grid, ilines, xlines, px, py, step=1.0):
+    # 지도 폴리라인(X, Y) → 분수 bin 인덱스 (fi, fj), bin 공간에서 step 간격 재샘플
+    il, xl = grid.ilxl(px, py)
+    fi = (il - ilines[0]) / line_step(ilines); fj = (xl - xlines[0]) / line_step(xlines)
+    cum = np.concatenate(([0.0], np.cumsum(np.hypot(np.diff(fi), np.diff(fj)))))
+    s = np.arange(0.0, cum[-1] + 1e-9, step)
+    fi = np.interp(s, cum, fi); fj = np.interp(s, cum, fj)
+    inside = (fi >= 0) & (fi <= len(ilines) - 1) & (fj >= 0) & (fj <= len(xlines) - 1)
+    return fi[inside], fj[inside]
+
+def pick_bin_keys(grid, ilines, xlines, x, y):
+    # 픽 X/Y → bin 키 (i * n_xl + j, 격자 위치), 서베이 밖이면 -1
+    il, xl = grid.ilxl(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+    i = np.rint((il - ilines[0]) / line_step(ilines)).astype(np.int64); j = np.rint((xl - xlines[0]) / line_step(xlines)).astype(np.int64)
+    return np.where((i >= 0) & (i < len(ilines)) & (j >= 0) & (j < len(xlines)), i * len(xlines) + j, -1)
+
+def line_pick_rows(keys, n_il, n_xl, mode, k):
+    # 키 오름차순 레이어에서 k번째 Inline/Crossline 위의 행과 라인 방향 위치 (searchsorted만, 전체 스캔 없음)
+    if mode == "Inline":
+        lo, hi = np.searchsorted(keys, (k * n_xl, (k + 1) * n_xl))
+        rows = np.arange(lo, hi)
+        return rows, (keys[rows] - k * n_xl).astype(int)
+    targets = np.arange(n_il) * n_xl + k
+    lo = np.searchsorted(keys, targets, side='left'); cnt = np.searchsorted(keys, targets, side='right') - lo
+    rows = np.repeat(lo - np.cumsum(cnt) + cnt, cnt) + np.arange(cnt.sum())
+    return rows, np.repeat(np.arange(n_il), cnt)
+
+def extract_arbitrary_line(f, geom, fi, fj, interp=True):
+    # 필요한 bin만 모아서 파일 순서(= 인라인 정렬이면 인라인별)로 정렬 후 구간 단위로 읽음
+    n_il, n_xl = geom.shape
+    if interp:
+        i0 = np.clip(np.floor(fi).astype(int), 0, max(n_il - 2, 0)); j0 = np.clip(np.floor(fj).astype(int), 0, max(n_xl - 2, 0))
+        i1 = np.minimum(i0 + 1, n_il - 1); j1 = np.minimum(j0 + 1, n_xl - 1)
+        ti = np.clip(fi - i0, 0, 1); tj = np.clip(fj - j0, 0, 1)
+        bi = np.stack((i0, i0, i1, i1), axis=1); bj = np.stack((j0, j1, j0, j1), axis=1)
+        w = np.stack(((1-ti)*(1-tj), (1-ti)*tj, ti*(1-tj), ti*tj), axis=1)
+    else:
+        bi = np.rint(fi).astype(int)[:, None]; bj = np.rint(fj).astype(int)[:, None]; w = np.ones((len(fi), 1))
+    tr = geom.table[bi, bj]
+    uniq, inv = np.unique(tr, return_inverse=True)
+    traces = read_traces(f, uniq)
+    data = np.einsum('mk,mkn->mn', w, traces[inv.reshape(tr.shape)])
+    return data.T.astype(np.float32) # (Samples, Traces)
+
+# -----------------------------------------------------------
+# 1-8. 3D Geometry Index ((il, xl) → trace 희소 테이블)
+# -----------------------------------------------------------
+GEOM_IL_BYTE = segyio.TraceField.INLINE_3D # 189
+GEOM_XL_BYTE = segyio.TraceField.CROSSLINE_3D # 193
+GEOM_MIN_FILL = 0.25 # 채움 비율이 이보다 낮으면 3D 격자로 보지 않음 (2D 라인 오인 방지)
+
+def trace_spans(srt):
+    # 정렬된 trace 번호 → 가까운 번호끼리 묶은 읽기 구간 [(a, b, t0, t1)]: srt[a:b]가 [t0, t1) 안
+    if len(srt) == 0: return []
+    cuts = np.concatenate(([0], np.nonzero(np.diff(srt) > ARB_GAP_MERGE)[0] + 1, [len(srt)]))
+    return [(a, b, int(srt[a]), int(srt[b - 1]) + 1) for a, b in zip(cuts[:-1].tolist(), cuts[1:].tolist())]
+
+def read_span(f, t0, t1):
+    return f.trace.raw[t0:t1] if t1 - t0 > 1 else f.trace.raw[t0][None, :]
+
+def read_traces(f, traces):
+    # trace 번호 배열 → (n, ns), -1(빈 bin)은 0
+    # 정렬 후 가까운 번호끼리 묶어 구간 단위 raw 읽기 → seek 최소화
+    if isinstance(f, SegyReaderService): return f.read_traces(traces)
+    traces = np.asarray(traces).ravel()
+    out = np.zeros((len(traces), len(f.samples)), dtype=np.float32)
+    live = np.flatnonzero(traces >= 0)
+    if len(live) == 0: return out
+    order = live[np.argsort(traces[live], kind='stable')]
+    srt = traces[order]
+    for a, b, t0, t1 in trace_spans(srt):
+        out[order[a:b]] = read_span(f, t0, t1)[srt[a:b] - t0]
+    return out
+
+class GeometryIndex:
+    # strict로 안 열리는 불규칙/패딩/비정렬 큐브도 헤더 1회 스캔으로 3D 슬라이싱 가능하게 함
+    def __init__(self, ilines, xlines, table, il_byte=GEOM_IL_BYTE, xl_byte=GEOM_XL_BYTE):
+        self.ilines = np.asarray(ilines); self.xlines = np.asarray(xlines)
+        self.table = table # (n_il, n_xl), -1 = 빈 bin
+        self.il_byte = int(il_byte); self.xl_byte = int(xl_byte)
+
+    @classmethod
+    def from_segy(cls, f):
+        # strict로 열린 정규 큐브: 헤더 스캔 없이 정렬 순서로 계산
+        n_il, n_xl, n_off = len(f.ilines), len(f.xlines), len(f.offsets)
+        t = np.arange(f.tracecount, dtype=np.int64)
+        if f.sorting == segyio.TraceSortingFormat.INLINE_SORTING: table = t.reshape(n_il, n_xl, n_off)[:, :, 0]
+        else: table = t.reshape(n_xl, n_il, n_off)[:, :, 0].T
+        return cls(f.ilines, f.xlines, table)
+
+    @classmethod
+    def scan(cls, path, il_byte=GEOM_IL_BYTE, xl_byte=GEOM_XL_BYTE):
+        with segyio.open(path, "r", ignore_geometry=True) as f:
+            il = f.attributes(il_byte)[:]; xl = f.attributes(xl_byte)[:]
+        ilines, ii = np.unique(il, return_inverse=True)
+        xlines, jj = np.unique(xl, return_inverse=True)
+        if len(ilines) < 2 or len(xlines) < 2 or len(il) < GEOM_MIN_FILL * len(ilines) * len(xlines):
+            raise ValueError(f"No 3D geometry at bytes {int(il_byte)}/{int(xl_byte)}")
+        table = np.full((len(ilines), len(xlines)), -1, dtype=np.int64)
+        # 같은 bin에 여러 트레이스(오프셋 등)가 있으면 첫 트레이스 사용
+        table[ii[::-1], jj[::-1]] = np.arange(len(il) - 1, -1, -1)
+        return cls(ilines, xlines, table, il_byte, xl_byte)
+
+    @classmethod
+    def load(cls, path, il_byte=GEOM_IL_BYTE, xl_byte=GEOM_XL_BYTE):
+        # 스캔 결과는 캐시 폴더에 저장 (원본 변경 시 태그가 바뀌어 자동 재스캔)
+        # 3D가 아닌 파일(2D 라인)도 빈 테이블로 기록해서 다시 스캔하지 않음
+        cache = cube_cache_path(path, f"geom{int(il_byte)}_{int(xl_byte)}.npz")
+        geom = None
+        if os.path.exists(cache):
+            try:
+                with np.load(cache) as z: geom = cls(z['ilines'], z['xlines'], z['table'], il_byte, xl_byte)
+            except (ValueError, OSError, KeyError): pass
+        if geom is None:
+            try: geom = cls.scan(path, il_byte, xl_byte)
+            except ValueError: geom = cls([], [], np.full((0, 0), -1, dtype=np.int64), il_byte, xl_byte)
+            try:
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                tmp = cache + ".tmp.npz"
+                np.savez(tmp, ilines=geom.ilines, xlines=geom.xlines, table=geom.table)
+                os.replace(tmp, cache)
+            except OSError as e: print(f"Geometry index not saved: {e}")
+        if geom.table.size == 0: raise ValueError(f"No 3D geometry at bytes {int(il_byte)}/{int(xl_byte)}")
+        return geom
+
+    @property
+    def shape(self): return self.table.shape
+
+    def line_traces(self, mode, line_no):
+        if mode == "Inline": return self.table[int(np.searchsorted(self.ilines, line_no))]
+        return self.table[:, int(np.searchsorted(self.xlines, line_no))]
+
+    def sample_traces(self, n=9):
+        # 첫/끝 live 행의 양 끝 + 전체 live bin에서 n개 (Bin grid 피팅용, 비공선)
+        live_rows = np.flatnonzero((self.table >= 0).any(axis=1))
+        picks = []
+        for r in (live_rows[0], live_rows[-1]):
+            row = self.table[r][self.table[r] >= 0]; picks += [row[0], row[-1]]
+        flat = self.table.ravel(); flat = flat[flat >= 0]
+        picks += flat[np.linspace(0, len(flat) - 1, n).astype(int)].tolist()
+        return sorted(set(int(t) for t in picks))
+
+    def read_line(self, f, mode, line_no):
+        return read_traces(f, self.line_traces(mode, line_no))
+
+def open_segy_3d(path, il_byte=None, xl_byte=None):
+    # (핸들, GeometryIndex) 반환. 정규 큐브는 strict, 아니면 헤더 인덱스로 3D 구성, 3D가 아니면 예외
+    il_byte = il_byte or GEOM_IL_BYTE; xl_byte = xl_byte or GEOM_XL_BYTE
+    f = None
+    try:
+        f = segyio.open(path, "r", iline=int(il_byte), xline=int(xl_byte), strict=True)
+        geom = GeometryIndex.from_segy(f); geom.il_byte = int(il_byte); geom.xl_byte = int(xl_byte)
+        if min(geom.shape) < 2: raise ValueError("single line") # IL 1개짜리는 2D 라인으로 취급
+        return f, geom
+    except Exception:
+        if f is not None: f.close()
+    geom = GeometryIndex.load(path, il_byte, xl_byte)
+    return segyio.open(path, "r", ignore_geometry=True), geom
+
+# -----------------------------------------------------------
+# 1-9. Brick 큐브 (64³ 블록 + 압축 + LOD) - 방향 무관 슬라이스
+# -----------------------------------------------------------
+WBC_MAGIC = b"WOOBRK01"
+BRICK = 64
+BRICK_CODECS = ('raw', 'zlib', 'int16') # int16: 브릭별 스케일 양자화(오차 ≤ scale/2) + zlib
+BRICK_INDEX = np.dtype([('offset', '<u8'), ('nbytes', '<u8'), ('scale', '<f8')])
+
+def encode_brick(b, codec):
+    if codec == 'int16':
+        b = np.nan_to_num(b)
+        amax = float(np.max(np.abs(b)))
+        scale = amax / 32767.0 if amax > 0 else 1.0
+        return zlib.compress(np.rint(b / scale).astype('<i2').tobytes(), 1), scale
+    raw = np.ascontiguousarray(b, dtype='<f4').tobytes()
+    if codec == 'zlib':
+        # 바이트 셔플: float의 같은 자리 바이트끼리 모아 압축률 향상
+        return zlib.compress(np.frombuffer(raw, np.uint8).reshape(-1, 4).T.tobytes(), 1), 1.0
+    return raw, 1.0
+
+def decode_brick(buf, codec, scale):
+    shape = (BRICK, BRICK, BRICK)
+    if codec == 'int16': return np.frombuffer(zlib.decompress(buf), '<i2').reshape(shape).astype(np.float32) * np.float32(scale)
+    if codec == 'zlib': buf = np.frombuffer(zlib.decompress(buf), np.uint8).reshape(4, -1).T.tobytes()
+    return np.frombuffer(buf, '<f4').reshape(shape)
+
+def pad_brick(a):
+    b = np.zeros((BRICK, BRICK, BRICK), dtype=np.float32)
+    b[:a.shape[0], :a.shape[1], :a.shape[2]] = a
+    return b
+
+_WORKER_HANDLES = {} # 워커 프로세스별 SEG-Y 핸들 재사용
+
+def worker_handle(path):
+    f = _WORKER_HANDLES.get(path)
+    if f is None: f = _WORKER_HANDLES[path] = segyio.open(path, "r", ignore_geometry=True)
+    return f
+
+def _brick_unit(path, traces, codec):
+    # 워커: (BRICK x BRICK) 트레이스 기둥을 읽어 시간축으로 잘라 인코딩 → [(bytes, scale), ...]
+    col = read_traces(worker_handle(path), traces).reshape(traces.shape + (-1,))
+    return [encode_brick(pad_brick(col[:, :, k:k + BRICK]), codec) for k in range(0, col.shape[2], BRICK)]
+
+def brick_grid(shape): return tuple(-(-n // BRICK) for n in shape)
+
+class BrickCube:
+    # 구조: MAGIC | meta 위치(u8) | 브릭 payload... | 레벨별 인덱스(BRICK_INDEX) | meta 길이(u8) | meta JSON
+    def __init__(self, path, cache_mb=256, meta=None, index=None):
+        self.path = path
+        self.fh = open(path, 'rb')
+        self.lock = threading.Lock()
+        if meta is None:
+            if self.fh.read(len(WBC_MAGIC)) != WBC_MAGIC: raise ValueError("Not a brick cube file")
+            self.fh.seek(int(np.frombuffer(self.fh.read(8), '<u8')[0]))
+            n = int(np.frombuffer(self.fh.read(8), '<u8')[0])
+            meta = json.loads(self.fh.read(n).decode('utf-8'))
+            index = []
+            for lv in meta['levels']:
+                self.fh.seek(lv['index_offset'])
+                index.append(np.frombuffer(self.fh.read(int(np.prod(lv['grid'])) * BRICK_INDEX.itemsize), BRICK_INDEX).reshape(lv['grid']))
+        self.meta = meta; self.index = index
+        self.codec = meta['codec']
+        self.ilines = np.asarray(meta['ilines']); self.xlines = np.asarray(meta['xlines'])
+        self.cache = SectionCache(max_mb=cache_mb) # 디코딩된 브릭 LRU (메모리 상한)
+
+    @property
+    def levels(self): return len(self.meta['levels'])
+
+    def level_shape(self, level): return tuple(self.meta['levels'][level]['shape'])
+
+    def close(self): self.fh.close()
+
+    def brick(self, level, bi, bj, bk):
+        key = (level, bi, bj, bk)
+        entry = self.cache.get(key)
+        if entry is not None: return entry['data']
+        rec = self.index[level][bi, bj, bk]
+        with self.lock:
+            self.fh.seek(int(rec['offset'])); buf = self.fh.read(int(rec['nbytes']))
+        data = decode_brick(buf, self.codec, float(rec['scale'])) # 압축 해제는 락 밖에서
+        self.cache.put(key, {'data': data})
+        return data
+
+    def box(self, level, i0, i1, j0, j1, k0, k1):
+        # 레벨 좌표계의 [i0:i1, j0:j1, k0:k1] 영역을 브릭에서 조립
+        shape = self.level_shape(level)
+        i1, j1, k1 = min(i1, shape[0]), min(j1, shape[1]), min(k1, shape[2])
+        out = np.zeros((i1 - i0, j1 - j0, k1 - k0), dtype=np.float32)
+        for bi in range(i0 // BRICK, -(-i1 // BRICK)):
+            for bj in range(j0 // BRICK, -(-j1 // BRICK)):
+                for bk in range(k0 // BRICK, -(-k1 // BRICK)):
+                    b = self.brick(level, bi, bj, bk)
+                    a0, a1 = max(i0, bi*BRICK), min(i1, (bi+1)*BRICK)
+                    c0, c1 = max(j0, bj*BRICK), min(j1, (bj+1)*BRICK)
+                    e0, e1 = max(k0, bk*BRICK), min(k1, (bk+1)*BRICK)
+                    out[a0-i0:a1-i0, c0-j0:c1-j0, e0-k0:e1-k0] = b[a0-bi*BRICK:a1-bi*BRICK, c0-bj*BRICK:c1-bj*BRICK, e0-bk*BRICK:e1-bk*BRICK]
+        return out
+
+    def slice(self, mode, line_no, level=0):
+        # Inline → (n_xl, ns), Crossline → (n_il, ns), Time(샘플 번호) → (n_il, n_xl)
+        n_il, n_xl, ns = self.level_shape(level)
+        if mode == "Inline":
+            i = int(np.searchsorted(self.ilines, line_no)) >> level
+            return self.box(level, i, i + 1, 0, n_xl, 0, ns)[0]
+        if mode == "Crossline":
+            j = int(np.searchsorted(self.xlines, line_no)) >> level
+            return self.box(level, 0, n_il, j, j + 1, 0, ns)[:, 0]
+        k = min(int(line_no) >> level, ns - 1)
+        return self.box(level, 0, n_il, 0, n_xl, k, k + 1)[:, :, 0]
+
+class BrickCubeBuilder:
+    # SEG-Y → Brick 큐브 변환. LOD0는 트레이스 기둥 단위로 프로세스 풀(전 코어)에서,
+    # 상위 LOD는 하위 레벨 2x2x2 평균으로 스레드 풀에서 생성 (zlib은 GIL 해제)
+    def __init__(self, segy_path, geom, codec='zlib', levels=4, workers=None):
+        self.segy_path = segy_path; self.geom = geom
+        self.path = cube_cache_path(segy_path, f"b{geom.il_byte}_{geom.xl_byte}.{codec}.wbc")
+        self.codec = codec; self.max_levels = levels
+        self.workers = workers or os.cpu_count() or 1
+        self.progress = 0.0; self.error = None; self.cancelled = False; self.thread = None; self.done = False
+
+    def build_async(self):
+        self.thread = threading.Thread(target=self.build, daemon=True)
+        self.thread.start()
+
+    def cancel(self): self.cancelled = True
+
+    @property
+    def ready(self): return self.done
+
+    def build(self):
+        tmp = self.path + ".tmp"
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            with segyio.open(self.segy_path, "r", ignore_geometry=True) as f: ns = len(f.samples)
+            geom = self.geom
+            shape = (len(geom.ilines), len(geom.xlines), ns)
+            with open(tmp, 'wb') as fo:
+                fo.write(WBC_MAGIC); fo.write(np.uint64(0).tobytes())
+                index = [self.write_level0(fo, shape)]
+                if index[0] is None: return
+                shapes = [shape]
+                reader = None
+                while len(index) < self.max_levels and min(shapes[-1][:2]) >= 2 * BRICK:
+                    fo.flush()
+                    if reader is None: reader = BrickCube(tmp, meta=self.level_meta(shapes, None), index=index)
+                    reader.meta = self.level_meta(shapes, None)
+                    nxt = tuple(-(-n // 2) for n in shapes[-1])
+                    idx = self.write_level(fo, reader, len(index) - 1, nxt)
+                    if idx is None: reader.close(); return
+                    index.append(idx); shapes.append(nxt)
+                if reader is not None: reader.close()
+                offsets = []
+                for idx in index:
+                    offsets.append(fo.tell()); fo.write(idx.tobytes())
+                meta = self.level_meta(shapes, offsets)
+                blob = json.dumps(meta).encode('utf-8')
+                meta_pos = fo.tell()
+                fo.write(np.uint64(len(blob)).tobytes()); fo.write(blob)
+                fo.seek(len(WBC_MAGIC)); fo.write(np.uint64(meta_pos).tobytes())
+            os.replace(tmp, self.path)
+            self.done = True
+        except Exception as e:
+            self.error = e
+        finally:
+            if not self.done and os.path.exists(tmp):
+                try: os.remove(tmp)
+                except OSError: pass
+
+    def level_meta(self, shapes, offsets):
+        levels = [{'shape': list(sh), 'grid': list(brick_grid(sh)), 'index_offset': offsets[i] if offsets else 0} for i, sh in enumerate(shapes)]
+        return {'codec': self.codec, 'brick': BRICK, 'ilines': self.geom.ilines.tolist(), 'xlines': self.geom.xlines.tolist(), 'levels': levels}
+
+    def write_level0(self, fo, shape):
+        grid = brick_grid(shape)
+        index = np.zeros(grid, dtype=BRICK_INDEX)
+        table = np.full((grid[0] * BRICK, grid[1] * BRICK), -1, dtype=np.int64)
+        table[:shape[0], :shape[1]] = self.geom.table
+        units = iter([(bi, bj) for bi in range(grid[0]) for bj in range(grid[1])])
+        n_units = grid[0] * grid[1]
+        pending = deque()
+        with ProcessPoolExecutor(max_workers=self.workers) as ex:
+            def submit():
+                u = next(units, None)
+                if u is None: return
+                blk = table[u[0]*BRICK:(u[0]+1)*BRICK, u[1]*BRICK:(u[1]+1)*BRICK]
+                pending.append((u, ex.submit(_brick_unit, self.segy_path, blk, self.codec)))
+            for _ in range(2 * self.workers): submit() # 메모리 상한: 진행 중 작업 수 제한
+            done = 0
+            while pending:
+                if self.cancelled:
+                    for _, fut in pending: fut.cancel()
+                    return None
+                (bi, bj), fut = pending.popleft()
+                bricks = fut.result(); submit()
+                for bk, (buf, sc) in enumerate(bricks):
+                    index[bi, bj, bk] = (fo.tell(), len(buf), sc); fo.write(buf)
+                done += 1; self.progress = 0.8 * done / n_units
+        return index
+
+    def write_level(self, fo, reader, src_level, shape):
+        grid = brick_grid(shape)
+        index = np.zeros(grid, dtype=BRICK_INDEX)
+        def make(key):
+            bi, bj, bk = key
+            src = reader.box(src_level, 2*bi*BRICK, 2*(bi+1)*BRICK, 2*bj*BRICK, 2*(bj+1)*BRICK, 2*bk*BRICK, 2*(bk+1)*BRICK)
+            src = np.pad(src, [(0, n % 2) for n in src.shape], mode='edge')
+            pooled = src.reshape(src.shape[0]//2, 2, src.shape[1]//2, 2, src.shape[2]//2, 2).mean(axis=(1, 3, 5))
+            return encode_brick(pad_brick(pooled), self.codec)
+        keys = [(bi, bj, bk) for bi in range(grid[0]) for bj in range(grid[1]) for bk in range(grid[2])]
+        with ThreadPoolExecutor(max_workers=self.workers) as ex:
+            for n, (key, (buf, sc)) in enumerate(zip(keys, ex.map(make, keys))):
+                if self.cancelled: return None
+                index[key] = (fo.tell(), len(buf), sc); fo.write(buf)
+                self.progress = 0.8 + 0.2 * (src_level + (n + 1) / len(keys)) / max(self.max_levels - 1, 1)
+        return index
+
+def open_brick_cube(segy_path, geom, codec='zlib'):
+    path = cube_cache_path(segy_path, f"b{geom.il_byte}_{geom.xl_byte}.{codec}.wbc")
+    if not os.path.exists(path): return None
+    try: return BrickCube(path)
+    except (ValueError, OSError) as e: print(f"Brick cube unreadable: {e}"); return None
+
+# -----------------------------------------------------------
+# 1-10. 3D 호라이즌 자동 추적 (시드 기반 flood-fill)
+# -----------------------------------------------------------
+TRACK_WINDOW = 6 # 상관 창 반폭 (samples)
+TRACK_SEARCH = 3 # 이웃 트레이스에서 허용하는 최대 시간 이동 (samples)
+TRACK_MIN_CORR = 0.7
+
+class HorizonTracker3D:
+    # 전역: 브릭 크기(BRICK x BRICK bin) 작업 단위의 우선순위 큐 → 서로 인접하지 않은 단위를 워커 풀에서 동시 처리
+    # 단위 내부: 상관계수 우선순위 flood-fill, 경계를 넘는 이웃은 해당 단위의 시드로 넘김
+    # read_unit(bi, bj) → (BRICK, BRICK, ns) (범위 밖 bin은 0)
+    def __init__(self, shape, read_unit, window=TRACK_WINDOW, search=TRACK_SEARCH, min_corr=TRACK_MIN_CORR, workers=None, cache_mb=512):
+        self.n_il, self.n_xl, self.ns = shape
+        self.read_unit = read_unit
+        self.window = window; self.search = search; self.min_corr = min_corr
+        self.workers = workers or os.cpu_count() or 1
+        self.t = np.full((self.n_il, self.n_xl), np.nan, dtype=np.float32) # 추적된 시간 (sample 단위)
+        self.q = np.zeros((self.n_il, self.n_xl), dtype=np.float32) # 상관계수
+        self.pending = {} # (bi, bj) → [(-corr, seq, i, j, t_parent, ref_window), ...]
+        self.unit_cache = SectionCache(max_mb=cache_mb)
+        self.seq = itertools.count(); self.lock = threading.Lock() # seq: 같은 상관계수끼리 순서 고정
+        self.tracked = 0; self.cancelled = False
+
+    def unit(self, bi, bj):
+        entry = self.unit_cache.get((bi, bj))
+        if entry is None:
+            entry = {'data': self.read_unit(bi, bj)}
+            self.unit_cache.put((bi, bj), entry)
+        return entry['data']
+
+    def ref_window(self, trace, t):
+        r = int(round(t)); W = self.window
+        if r - W < 0 or r + W + 1 > len(trace): return None
+        return trace[r - W:r + W + 1].astype(np.float64)
+
+    def push(self, i, j, t, ref, corr):
+        key = (i // BRICK, j // BRICK)
+        with self.lock: self.pending.setdefault(key, []).append((-corr, next(self.seq), i, j, t, ref))
+
+    def add_seed(self, i, j, t):
+        # 시드는 ±search 안의 |진폭| 극값으로 스냅 후 바로 확정
+        if not (0 <= i < self.n_il and 0 <= j < self.n_xl): return False
+        trace = self.unit(i // BRICK, j // BRICK)[i % BRICK, j % BRICK]
+        r = int(round(t)); lo = max(r - self.search, 0); hi = min(r + self.search + 1, self.ns)
+        if lo >= hi: return False
+        k = lo + int(np.argmax(np.abs(trace[lo:hi])))
+        t = self.snap(trace, k, np.sign(trace[k]) or 1.0)
+        ref = self.ref_window(trace, t)
+        if ref is None or not np.any(ref): return False
+        self.t[i, j] = t; self.q[i, j] = 1.0
+        with self.lock: self.tracked += 1
+        self.push_neighbours(i, j, t, ref, 1.0)
+        return True
+
+    def push_neighbours(self, i, j, t, ref, corr):
+        for ni, nj in ((i - 1, j), (i + 1, j), (i, j - 1), (i, j + 1)):
+            if 0 <= ni < self.n_il and 0 <= nj < self.n_xl and np.isnan(self.t[ni, nj]):
+                self.push(ni, nj, t, ref, corr)
+
+    def match(self, trace, t_parent, ref):
+        # 부모 파형(ref)과 가장 닮은 위치를 ±search 안에서 찾고 포물선 보간으로 sub-sample 보정
+        W, S = self.window, self.search
+        r = int(round(t_parent)); lo = r - S - W; hi = r + S + W + 1
+        if lo < 0 or hi > len(trace): return None, 0.0
+        win = np.lib.stride_tricks.sliding_window_view(trace[lo:hi].astype(np.float64), 2 * W + 1)
+        den = np.linalg.norm(win, axis=1) * np.linalg.norm(ref)
+        corr = np.where(den > 0, win @ ref / np.where(den > 0, den, 1), 0.0)
+        k = int(np.argmax(corr))
+        frac = 0.0
+        if 0 < k < len(corr) - 1:
+            a, b, c = corr[k - 1], corr[k], corr[k + 1]
+            d = a - 2 * b + c
+            if d < 0: frac = 0.5 * (a - c) / d
+        # ref 창은 round(t_parent) 중심 → 이동량만 더한 뒤 같은 극성의 진폭 극값에 고정 (누적 드리프트 방지)
+        return self.snap(trace, t_parent + (k - S + frac), np.sign(ref[W]) or 1.0), float(corr[k])
+
+    @staticmethod
+    def snap(trace, t, polarity, reach=1):
+        r = int(round(t)); lo = max(r - reach, 1); hi = min(r + reach + 1, len(trace) - 1)
+        if lo >= hi: return t
+        k = lo + int(np.argmax(polarity * trace[lo:hi]))
+        a, b, c = polarity * trace[k - 1:k + 2]
+        d = a - 2 * b + c
+        return k + (0.5 * (a - c) / d if d < 0 else 0.0)
+
+    def process_unit(self, key):
+        # 한 작업 단위 안에서만 확정/기록 (동시에 도는 단위끼리는 인접하지 않으므로 쓰기 충돌 없음)
+        with self.lock: heap = self.pending.pop(key, [])
+        if not heap: return
+        heapq.heapify(heap)
+        bi, bj = key
+        block = self.unit(bi, bj)
+        i0, j0 = bi * BRICK, bj * BRICK
+        while heap and not self.cancelled:
+            negc, _, i, j, tp, ref = heapq.heappop(heap)
+            if not np.isnan(self.t[i, j]): continue
+            trace = block[i - i0, j - j0]
+            t, corr = self.match(trace, tp, ref)
+            if t is None or corr < self.min_corr: continue
+            new_ref = self.ref_window(trace, t)
+            if new_ref is None: continue
+            self.t[i, j] = t; self.q[i, j] = corr
+            with self.lock: self.tracked += 1 # 여러 단위가 동시에 증가시킴
+            for ni, nj in ((i - 1, j), (i + 1, j), (i, j - 1), (i, j + 1)):
+                if not (0 <= ni < self.n_il and 0 <= nj < self.n_xl) or not np.isnan(self.t[ni, nj]): continue
+                if ni // BRICK == bi and nj // BRICK == bj:
+                    heapq.heappush(heap, (-corr, next(self.seq), ni, nj, t, new_ref))
+                else: self.push(ni, nj, t, new_ref, corr)
+        if heap and self.cancelled:
+            with self.lock: self.pending.setdefault(key, []).extend(heap)
+
+    def run(self):
+        # 가장 좋은 시드를 가진 단위부터, 서로 이웃하지 않는 단위만 골라 한 라운드씩 병렬 처리
+        with ThreadPoolExecutor(max_workers=self.workers) as ex:
+            while not self.cancelled:
+                with self.lock:
+                    ranked = sorted(self.pending.items(), key=lambda kv: min(e[0] for e in kv[1]))
+                batch = []
+                for key, _ in ranked:
+                    if all(abs(key[0] - b[0]) > 1 or abs(key[1] - b[1]) > 1 for b in batch): batch.append(key)
+                    if len(batch) >= self.workers: break
+                if not batch: break
+                list(ex.map(self.process_unit, batch))
+        return self.t, self.q
+
+# -----------------------------------------------------------
+# 1-11. 공유 SEG-Y 리더 서비스 (파일당 핸들 1개 + 요청 큐 + 공용 블록 캐시)
+# -----------------------------------------------------------
+class _ServiceHeaders:
+    # f.header[t] 형태 호환 (BinGrid.from_segy 등 기존 코드 그대로 사용)
+    def __init__(self, svc): self.svc = svc
+    def __getitem__(self, t): return self.svc.headers([t])[0]
+
+class SegyReaderService:
+    # 같은 파일을 여는 모든 뷰어/작업이 핸들 1개를 공유. 읽기는 전용 스레드가 큐에서 모아서 처리:
+    # 대기 중인 요청들의 trace를 합쳐 정렬 → 인접 구간 병합 읽기 → 공용 캐시(꽉 찬 BLOCK 또는 trace 단위)에 저장
+    BLOCK = 16 # 캐시 블록 = 연속 trace 16개 (읽기 구간이 다 덮은 블록만)
+    CACHE_MB = 512
+    _registry = {}
+    _registry_lock = threading.Lock()
+    _opening = {} # key -> Event: 해당 파일을 여는 중 (헤더 스캔은 전역 락 밖에서)
+
+    @classmethod
+    def acquire(cls, path, il_byte=None, xl_byte=None):
+        # 3D가 아니면 ValueError (open_segy_3d와 동일)
+        key = (os.path.abspath(path), int(il_byte or GEOM_IL_BYTE), int(xl_byte or GEOM_XL_BYTE))
+        while True:
+            with cls._registry_lock:
+                svc = cls._registry.get(key)
+                if svc is not None and not svc.closing: svc.refs += 1; return svc
+                opening = cls._opening.get(key)
+                if opening is None: opening = cls._opening[key] = threading.Event(); break
+            opening.wait() # 같은 파일을 다른 스레드가 여는 중 → 끝나면 registry 다시 확인
+        try: svc = cls(path, key[1], key[2]); svc.key = key
+        except BaseException:
+            with cls._registry_lock: del cls._opening[key]
+            opening.set(); raise
+        with cls._registry_lock:
+            cls._registry[key] = svc; svc.refs += 1; del cls._opening[key]
+        opening.set()
+        return svc
+
+    def __init__(self, path, il_byte, xl_byte):
+        self.path = path
+        self.f, self.geom = open_segy_3d(path, il_byte, xl_byte)
+        self.samples = np.asarray(self.f.samples); self.tracecount = self.f.tracecount
+        self.dt = segyio.tools.dt(self.f)
+        self.header = _ServiceHeaders(self)
+        self.cache = SectionCache(max_mb=self.CACHE_MB)
+        self.queue = deque(); self.cond = threading.Condition()
+        self.refs = 0; self.closing = False; self.key = None
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.release()
+
+    def release(self):
+        with SegyReaderService._registry_lock:
+            self.refs -= 1
+            if self.refs > 0: return
+            if SegyReaderService._registry.get(self.key) is self: del SegyReaderService._registry[self.key]
+        with self.cond: self.closing = True; self.cond.notify()
+
+    def submit(self, kind, arg):
+        req = {'kind': kind, 'arg': arg, 'result': None, 'error': None, 'event': threading.Event()}
+        with self.cond:
+            if self.closing: raise IOError("reader closed")
+            self.queue.append(req); self.cond.notify()
+        req['event'].wait()
+        if req['error'] is not None: raise req['error']
+        return req['result']
+
+    def read_traces(self, traces): return self.submit('traces', np.asarray(traces).ravel())
+    def headers(self, traces): return self.submit('headers', [int(t) for t in traces])
+
+    def run(self):
+        while True:
+            with self.cond:
+                while not self.queue and not self.closing: self.cond.wait()
+                if not self.queue: break # closing + 큐 비었음
+                batch = list(self.queue); self.queue.clear()
+            try: self.serve(batch)
+            except Exception as e:
+                for req in batch:
+                    if not req['event'].is_set(): req['error'] = e; req['event'].set()
+        self.f.close()
+
+    def serve(self, batch):
+        B = self.BLOCK
+        for req in batch:
+            if req['kind'] == 'headers':
+                req['result'] = [dict(self.f.header[t]) for t in req['arg']]; req['event'].set()
+        reqs = [r for r in batch if r['kind'] == 'traces']
+        if not reqs: return
+        need = np.unique(np.concatenate([r['arg'] for r in reqs]))
+        need = need[need >= 0]
+        # 캐시 키: ('b', 블록) = 읽기 구간이 꽉 채운 연속 B개, ('t', trace) = 그 밖의 요청 trace 1개 → 실제 읽은 데이터만 보관
+        # pieces를 이어 붙인 배열의 행 번호 row로 요청마다 한 번에 gather (이번 배치에서 쓰는 블록은 eviction과 무관하게 참조 유지)
+        pieces = []; row = np.full(len(need), -1, dtype=np.int64); n = 0
+        blk = need // B
+        hit_b, base = [], []
+        for b in np.unique(blk).tolist():
+            entry = self.cache.get(('b', b))
+            if entry is not None: hit_b.append(b); base.append(n); pieces.append(entry['data']); n += B
+        if hit_b:
+            hit_b = np.asarray(hit_b); pos = np.minimum(np.searchsorted(hit_b, blk), len(hit_b) - 1)
+            hit = hit_b[pos] == blk
+            row[hit] = np.asarray(base)[pos[hit]] + need[hit] % B
+        for k in np.flatnonzero(row < 0).tolist():
+            entry = self.cache.get(('t', int(need[k])))
+            if entry is not None: row[k] = n; pieces.append(entry['data'][None, :]); n += 1
+        miss = np.flatnonzero(row < 0)
+        for a, c, t0, t1 in trace_spans(need[miss]):
+            span = read_span(self.f, t0, t1)
+            row[miss[a:c]] = n + need[miss[a:c]] - t0; pieces.append(span); n += t1 - t0
+            b0, b1 = -(-t0 // B), t1 // B # 구간이 꽉 채운 블록만 블록으로 캐시
+            for b in range(b0, b1): self.cache.put(('b', b), {'data': span[b * B - t0:(b + 1) * B - t0].copy()})
+            for t in need[miss[a:c]].tolist():
+                if not b0 * B <= t < b1 * B: self.cache.put(('t', t), {'data': span[t - t0].copy()})
+        stack = np.concatenate(pieces) if pieces else np.zeros((0, len(self.samples)), dtype=np.float32)
+        for req in reqs:
+            tr = req['arg']
+            out = np.zeros((len(tr), len(self.samples)), dtype=np.float32)
+            live = np.flatnonzero(tr >= 0)
+            out[live] = stack[row[np.searchsorted(need, tr[live])]]
+            req['result'] = out; req['event'].set()
+
+# -----------------------------------------------------------
+# 1-12. 지진 속성 계산 (RMS / Envelope / Phase / Frequency) → 새 SEG-Y
+# -----------------------------------------------------------
+ATTRIBUTES = ('rms', 'envelope', 'phase', 'frequency')
+ATTR_CHUNK_TRACES = 4096 # 작업 1개당 trace 수 (3D는 라인 단위로 맞춤)
+ATTR_RMS_WINDOW = 11 # RMS 이동창 길이 (samples)
+
+def compute_attribute(x, attr, dt_s, window=ATTR_RMS_WINDOW):
+    # x: (n_traces, ns) → 같은 shape float32, 모든 trace를 한 번에 (FFT 기반 Hilbert)
+    x = np.nan_to_num(np.asarray(x, dtype=np.float64))
+    if attr == 'rms':
+        c = np.cumsum(np.pad(x * x, ((0, 0), (window // 2 + 1, window // 2))), axis=1)
+        return np.sqrt(np.maximum((c[:, window:] - c[:, :-window]) / window, 0)).astype(np.float32)
+    z = hilbert(x, axis=1)
+    if attr == 'envelope': return np.abs(z).astype(np.float32)
+    if attr == 'phase': return np.degrees(np.angle(z)).astype(np.float32)
+    if attr == 'frequency':
+        return (np.gradient(np.unwrap(np.angle(z), axis=1), axis=1) / (2 * np.pi * dt_s)).astype(np.float32)
+    raise ValueError(f"Unknown attribute: {attr}")
+
+def _attribute_chunk(path, t0, t1, attr, dt_s):
+    # 워커: 연속 trace 구간 1개 읽기 → 속성 계산
+    f = worker_handle(path)
+    x = f.trace.raw[t0:t1] if t1 - t0 > 1 else f.trace.raw[t0][None, :]
+    return compute_attribute(x, attr, dt_s)
+
+class AttributeJob:
+    # 입력을 라인(연속 trace) 묶음으로 나눠 프로세스 풀에서 계산, 순서대로 새 SEG-Y에 스트리밍 기록
+    # 진행 중 작업 수를 제한해서 메모리는 큐브 크기와 무관하게 일정
+    def __init__(self, src_path, out_path, attr, line_len=None, workers=None):
+        self.src_path = src_path; self.path = out_path; self.attr = attr
+        self.chunk = line_len * max(1, ATTR_CHUNK_TRACES // line_len) if line_len else ATTR_CHUNK_TRACES
+        self.workers = workers or os.cpu_count() or 1
+        self.progress = 0.0; self.error = None; self.cancelled = False; self.done = False; self.thread = None
+
+    def build_async(self):
+        self.thread = threading.Thread(target=self.build, daemon=True)
+        self.thread.start()
+
+    def cancel(self): self.cancelled = True
+
+    @property
+    def ready(self): return self.done
+
+    def build(self):
+        tmp = self.path + ".tmp"
+        try:
+            with segyio.open(self.src_path, "r", ignore_geometry=True) as src:
+                spec = segyio.spec(); spec.samples = src.samples; spec.format = 5; spec.tracecount = src.tracecount
+                dt_s = segyio.tools.dt(src) / 1e6
+                n = src.tracecount
+                ranges = iter([(t0, min(t0 + self.chunk, n)) for t0 in range(0, n, self.chunk)])
+                with segyio.create(tmp, spec) as dst, ProcessPoolExecutor(max_workers=self.workers) as ex:
+                    # 원본 텍스트/바이너리/트레이스 헤더 재사용 (샘플 포맷만 IEEE float)
+                    dst.text[0] = src.text[0]; dst.bin = src.bin; dst.bin.update(format=5)
+                    pending = deque()
+                    def submit():
+                        r = next(ranges, None)
+                        if r is not None: pending.append((r, ex.submit(_attribute_chunk, self.src_path, r[0], r[1], self.attr, dt_s)))
+                    for _ in range(2 * self.workers): submit()
+                    while pending:
+                        if self.cancelled:
+                            for _, fut in pending: fut.cancel()
+                            return
+                        (t0, t1), fut = pending.popleft()
+                        data = fut.result(); submit()
+                        dst.header[t0:t1] = src.header[t0:t1]
+                        dst.trace[t0:t1] = data
+                        self.progress = t1 / n
+            os.replace(tmp, self.path)
+            self.done = True
+        except Exception as e:
+            self.error = e
+        finally:
+            if not self.done and os.path.exists(tmp):
+                try: os.remove(tmp)
+                except OSError: pass
+
 # -----------------------------------------------------------
 # 2. SEGY 뷰어 (2D/3D 하이브리드 지원)
 # -----------------------------------------------------------
 class SegyViewer:
-    def __init__(self, root, filename=None, on_update_callback=None, on_cursor_callback=None, coord_type="CDP"):
+    SLICE_CACHE_MB = 512
+    PREFETCH_AHEAD = 8
+    PREFETCH_BEHIND = 2
+
+    def __init__(self, root, filename=None, on_update_callback=None, on_cursor_callback=None, coord_type="CDP", section_cache=None, geom_bytes=None):
         self.root = root
         self.root.title(f"Woo Interpreter - {filename.split('/')[-1] if filename else 'New'}")
         self.root.geometry("1400x900")
@@ -33,13 +1288,32 @@ class SegyViewer:
         self.on_update_callback = on_update_callback
         self.on_cursor_callback = on_cursor_callback
         self.coord_type = coord_type
+        self.section_cache = section_cache
+        self.geom_bytes = geom_bytes or (GEOM_IL_BYTE, GEOM_XL_BYTE) # IL/XL 헤더 바이트 위치
+        self.abs_sorted = None # Contrast 계산용 정렬된 |amp| 샘플
         
         # 3D 관련 변수
         self.is_3d = False
-        self.segy_handle = None # 3D용 파일 핸들 유지
+        self.reader = None # SegyReaderService (같은 파일을 연 뷰어끼리 핸들/블록 캐시 공유)
+        self.geom = None # GeometryIndex ((il, xl) → trace)
         self.ilines = []
         self.xlines = []
         self.current_slice_type = "Inline" # or "Crossline"
+        self.slice_cache = SectionCache(max_mb=self.SLICE_CACHE_MB)
+        self.io_lock = threading.Lock() # reader 해제와 백그라운드 읽기 직렬화 (prefetch 스레드와 공유)
+        self.prefetcher = None
+        self.last_slice = None # (mode, index) - 진행 방향 판단용
+        self.drawn_slice_type = None
+        self.sr_3d = None
+        self.n_samples = 0
+        self.zcube = None # SampleMajorCube (Time slice용)
+        self.bricks = None # BrickCube (있으면 모든 방향 슬라이스를 브릭에서 읽음)
+        self.brick_builder = None
+        self.track_job = None # 3D 자동 추적 백그라운드 작업
+        self.attr_job = None # 속성 계산 백그라운드 작업
+        self.bingrid = None # BinGrid (IL/XL → X/Y)
+        self.current_line = None
+        self.arb_tree = None # 임의 단면 표시 중이면 경로 bin 좌표 KD-tree
         
         # 렌더링 최적화 객체
         self.im_obj = None      
@@ -77,8 +1351,14 @@ class SegyViewer:
 
     def on_close(self):
         # 3D 모드일 경우 열려있는 핸들 닫기
-        if self.segy_handle:
-            self.segy_handle.close()
+        if self.prefetcher: self.prefetcher.stop()
+        if self.zcube: self.zcube.cancel()
+        if self.brick_builder: self.brick_builder.cancel()
+        if self.track_job: self.track_job['tracker'].cancelled = True
+        if self.attr_job: self.attr_job.cancel()
+        if self.bricks: self.bricks.close()
+        if self.reader:
+            with self.io_lock: self.reader.release(); self.reader = None
         self.root.destroy()
 
     def setup_ui(self):
@@ -91,15 +1371,22 @@ class SegyViewer:
         type_frame.pack(fill=tk.X, pady=2)
         tk.Radiobutton(type_frame, text="Inline", variable=self.var_slice_type, value="Inline", command=self.on_slice_type_change, bg="#e8f6f3").pack(side=tk.LEFT)
         tk.Radiobutton(type_frame, text="Xline", variable=self.var_slice_type, value="Crossline", command=self.on_slice_type_change, bg="#e8f6f3").pack(side=tk.LEFT)
+        tk.Radiobutton(type_frame, text="Time", variable=self.var_slice_type, value="Time", command=self.on_slice_type_change, bg="#e8f6f3").pack(side=tk.LEFT)
         
         self.slice_slider = tk.Scale(self.frame_3d, from_=0, to=100, orient=tk.HORIZONTAL, command=self.on_slice_change, label="Slice No.")
         self.slice_slider.pack(fill=tk.X)
         self.lbl_slice_info = tk.Label(self.frame_3d, text="No Data", bg="#e8f6f3")
         self.lbl_slice_info.pack()
+        self.btn_bricks = tk.Button(self.frame_3d, text="🧱 Brick 큐브 생성", command=self.build_bricks, bg="#7f8c8d", fg="white")
+        self.btn_bricks.pack(fill=tk.X, pady=(5, 0))
+        self.btn_track = tk.Button(self.frame_3d, text="🧭 3D Auto Track", command=self.start_auto_track, bg="#d35400", fg="white")
+        self.btn_track.pack(fill=tk.X, pady=(2, 0))
 
         # 분석 도구
         tk.Label(self.side_bar, text="--- Analysis Tools ---", font=('Arial', 10, 'bold'), bg="#f0f0f0").pack(pady=(5,5))
         tk.Button(self.side_bar, text="🔍 Trace 헤더 보기", command=self.show_headers, bg="#3498db", fg="white").pack(fill=tk.X, pady=2)
+        self.btn_attr = tk.Button(self.side_bar, text="📈 속성 계산 → SEG-Y", command=self.start_attribute, bg="#16a085", fg="white")
+        self.btn_attr.pack(fill=tk.X, pady=2)
         
         # 해석 도구
         tk.Label(self.side_bar, text="--- Interpretation ---", font=('Arial', 10, 'bold'), bg="#f0f0f0").pack(pady=(15,5))
@@ -172,12 +1459,28 @@ class SegyViewer:
     def load_from_path(self, path):
         self.filename = path
         
-        # 1. 3D 여부 확인 (Strict mode 시도)
+        # 0. 캐시에 2D 섹션이 있으면 파일을 열지 않고 바로 표시
+        if self.section_cache is not None:
+            try: cached = self.section_cache.get(SectionCache.make_key(path, self.coord_type))
+            except OSError: cached = None
+            if cached is not None:
+                self.is_3d = False
+                self.frame_3d.pack_forget()
+                self.apply_section(cached)
+                return
+        
+        # 1. 3D 여부 확인 (Strict mode → 실패 시 헤더 인덱스)
         try:
-            self.segy_handle = segyio.open(path, "r", strict=True)
+            self.reader = SegyReaderService.acquire(path, *self.geom_bytes)
+            self.geom = self.reader.geom
             self.is_3d = True
-            self.ilines = self.segy_handle.ilines
-            self.xlines = self.segy_handle.xlines
+            self.ilines = self.geom.ilines
+            self.xlines = self.geom.xlines
+            self.n_samples = len(self.reader.samples)
+            try: self.bingrid = BinGrid.from_segy(self.reader, self.geom)
+            except Exception as e: print(f"Bin grid fit failed: {e}"); self.bingrid = None
+            self.bricks = open_brick_cube(path, self.geom)
+            if self.bricks is not None: self.btn_bricks.config(state="disabled", text="🧱 Brick 큐브 사용 중")
             
             # UI 활성화
             self.frame_3d.pack(side=tk.TOP, fill=tk.X, pady=10, before=self.side_bar.winfo_children()[0])
@@ -186,65 +1489,233 @@ class SegyViewer:
             
         except Exception:
             # 2. 3D 실패 시 2D 모드로 로드
-            self.is_3d = False
+            self.is_3d = False; self.geom = None
             self.frame_3d.pack_forget()
-            if self.segy_handle: self.segy_handle.close(); self.segy_handle = None
+            if self.reader: self.reader.release(); self.reader = None
             self.load_2d_data(path)
 
+    def slice_axis(self, mode):
+        if mode == "Inline": return self.ilines
+        if mode == "Crossline": return self.xlines
+        return np.arange(self.n_samples)
+
     def update_3d_controls(self):
-        if self.current_slice_type == "Inline":
-            arr = self.ilines
-            label = "Inline No."
-        else:
-            arr = self.xlines
-            label = "Xline No."
-            
+        arr = self.slice_axis(self.current_slice_type)
+        label = {"Inline": "Inline No.", "Crossline": "Xline No.", "Time": "Sample Idx"}[self.current_slice_type]
         self.slice_slider.config(from_=arr[0], to=arr[-1], label=label)
         mid_val = arr[len(arr)//2]
         self.slice_slider.set(mid_val)
 
     def on_slice_type_change(self):
-        self.current_slice_type = self.var_slice_type.get()
+        mode = self.var_slice_type.get()
+        if mode == "Time" and not self.ensure_zcube(): return
+        self.current_slice_type = mode
         self.update_3d_controls()
         # 슬라이더 값 변경 시 자동으로 on_slice_change 호출됨
 
+    def ensure_zcube(self):
+        # Time slice용 sample-major 캐시 확보 (없으면 백그라운드 변환 시작)
+        if self.bricks is not None: return True
+        if self.zcube is None:
+            self.zcube = SampleMajorCube(self.filename, (self.n_samples, len(self.ilines), len(self.xlines)))
+            if not self.zcube.open_existing():
+                self.zcube.build_async(lambda il: self.geom.read_line(self.reader, "Inline", il), self.ilines, self.io_lock)
+                self.slice_slider.config(state="disabled")
+                self.poll_zcube()
+                return False
+        if self.zcube.error is not None:
+            messagebox.showerror("Error", f"Time slice cache failed: {self.zcube.error}")
+            self.zcube = None; self.var_slice_type.set(self.current_slice_type)
+            return False
+        return self.zcube.ready
+
+    def poll_zcube(self):
+        z = self.zcube
+        if z is None: return
+        if z.ready or z.error is not None:
+            self.slice_slider.config(state="normal")
+            if self.ensure_zcube() and self.var_slice_type.get() == "Time":
+                self.current_slice_type = "Time"; self.update_3d_controls()
+            return
+        self.lbl_slice_info.config(text=f"Building time-slice cache... {z.progress*100:.0f}%")
+        self.root.after(200, self.poll_zcube)
+
     def on_slice_change(self, val):
-        line_no = int(val)
+        line_no = int(float(val))
         # 해당 라인이 실제 존재하는지 확인 (근사치 찾기)
-        target_arr = self.ilines if self.current_slice_type == "Inline" else self.xlines
+        target_arr = self.slice_axis(self.current_slice_type)
         idx = np.abs(target_arr - line_no).argmin()
         actual_line = target_arr[idx]
         
-        self.lbl_slice_info.config(text=f"Showing {self.current_slice_type}: {actual_line}")
+        if self.current_slice_type == "Time":
+            sr = self.sr_3d if self.sr_3d else 1.0
+            self.lbl_slice_info.config(text=f"Showing Time: {actual_line * sr:.1f} ms (#{actual_line})")
+        else:
+            self.lbl_slice_info.config(text=f"Showing {self.current_slice_type}: {actual_line}")
         self.load_slice(actual_line, self.current_slice_type)
 
+    def read_slice(self, key):
+        # key = (mode, line_no), 디스크에서 슬라이스 1장 읽기
+        mode, line_no = key
+        with self.io_lock:
+            if self.reader is None: raise IOError("closed")
+            if self.bricks is not None: return self.bricks.slice(mode, line_no)
+            return self.geom.read_line(self.reader, mode, line_no)
+
+    def prefetch_around(self, line_no, mode):
+        arr = self.ilines if mode == "Inline" else self.xlines
+        idx = int(np.searchsorted(arr, line_no))
+        last = self.last_slice
+        step = -1 if (last is not None and last[0] == mode and idx < last[1]) else 1
+        self.last_slice = (mode, idx)
+        # 진행 방향 앞쪽 우선, 뒤쪽은 조금만
+        order = [idx + step * k for k in range(1, self.PREFETCH_AHEAD + 1)] + [idx - step * k for k in range(1, self.PREFETCH_BEHIND + 1)]
+        keys = [(mode, int(arr[i])) for i in order if 0 <= i < len(arr)]
+        if self.prefetcher is None: self.prefetcher = SlicePrefetcher(self.read_slice, self.slice_cache)
+        self.prefetcher.request(keys)
+
     def load_slice(self, line_no, mode):
-        # 3D Volume에서 슬라이스 추출
-        if not self.segy_handle: return
+        # 3D Volume에서 슬라이스 추출 (캐시 우선)
+        if not self.reader: return
+        if mode == "Time": return self.load_time_slice(int(line_no))
         try:
+            key = (mode, int(line_no))
+            entry = self.slice_cache.get(key)
+            if entry is None:
+                entry = {'data': self.read_slice(key)}
+                self.slice_cache.put(key, entry)
+            data = entry['data']
             if mode == "Inline":
-                data = self.segy_handle.iline[line_no]
-                # Header 정보 가져오기 (좌표용)
-                # segyio 3d 모드에서는 header line 접근이 다름. 여기서는 단순화를 위해 좌표 생략 또는 추후 구현
-                # X좌표 대용: Crossline Number
-                self.real_trace_indices = self.xlines
-                self.cache_x = self.xlines # X축은 Crossline 번호
-                self.cache_y = np.zeros_like(self.xlines) # Y축은 0 (상대적)
+                self.real_trace_indices = self.xlines # X축은 Crossline 번호
+                il_arr, xl_arr = line_no, self.xlines
             else:
-                data = self.segy_handle.xline[line_no]
-                self.real_trace_indices = self.ilines
-                self.cache_x = self.ilines # X축은 Inline 번호
-                self.cache_y = np.zeros_like(self.ilines)
+                self.real_trace_indices = self.ilines # X축은 Inline 번호
+                il_arr, xl_arr = self.ilines, line_no
+            # Bin grid로 슬라이스 전체 좌표를 한 번에 계산
+            if self.bingrid is not None: self.cache_x, self.cache_y = self.bingrid.xy(il_arr, xl_arr)
+            else: self.cache_x = self.real_trace_indices; self.cache_y = np.zeros_like(self.real_trace_indices)
+            self.current_line = int(line_no)
             
             self.current_data = data.T # (Samples, Traces)
+            self.abs_sorted = None
+            self.prefetch_around(line_no, mode)
             
-            sr = segyio.tools.dt(self.segy_handle)/1000
-            self.sr_in.delete(0, tk.END); self.sr_in.insert(0, str(sr))
+            if self.sr_3d is None:
+                self.sr_3d = self.reader.dt/1000
+                self.sr_in.delete(0, tk.END); self.sr_in.insert(0, str(self.sr_3d))
             
-            self.full_redraw()
+            # 같은 방향/크기의 슬라이스면 이미지 데이터만 교체 (축/아티스트 재생성 X)
+            if self.im_obj is not None and self.drawn_slice_type == mode and self.im_obj.get_array().shape == self.current_data.shape:
+                self.im_obj.set_data(self.current_data)
+                self.update_contrast_only(draw=False)
+                self.draw_horizons_only(draw=False)
+                self.canvas.draw_idle()
+            else:
+                self.full_redraw()
+                self.drawn_slice_type = mode
         except Exception as e:
             print(f"Slice Load Error: {e}")
 
+    def build_bricks(self):
+        if self.brick_builder is not None or self.bricks is not None or not self.is_3d: return
+        self.brick_builder = BrickCubeBuilder(self.filename, self.geom)
+        self.brick_builder.build_async()
+        self.btn_bricks.config(state="disabled")
+        self.poll_bricks()
+
+    def poll_bricks(self):
+        b = self.brick_builder
+        if b is None: return
+        if b.error is not None:
+            messagebox.showerror("Error", f"Brick cube failed: {b.error}")
+            self.brick_builder = None; self.btn_bricks.config(state="normal", text="🧱 Brick 큐브 생성")
+            return
+        if b.ready:
+            self.brick_builder = None
+            self.bricks = open_brick_cube(self.filename, self.geom)
+            self.btn_bricks.config(text="🧱 Brick 큐브 사용 중")
+            return
+        self.btn_bricks.config(text=f"🧱 변환 중... {b.progress*100:.0f}%")
+        self.root.after(300, self.poll_bricks)
+
+    def read_track_unit(self, bi, bj):
+        # 추적 작업 단위 1개 = BRICK x BRICK bin의 전체 트레이스
+        i0, j0 = bi * BRICK, bj * BRICK
+        if self.bricks is not None: return self.bricks.box(0, i0, i0 + BRICK, j0, j0 + BRICK, 0, self.n_samples)
+        traces = self.geom.table[i0:i0 + BRICK, j0:j0 + BRICK]
+        with self.io_lock:
+            if self.reader is None: raise IOError("closed")
+            data = read_traces(self.reader, traces)
+        return data.reshape(traces.shape + (-1,))
+
+    def start_auto_track(self):
+        # 현재 레이어의 픽을 시드로 전체 볼륨 추적 → 결과로 레이어 포인트를 교체
+        if not self.is_3d or self.track_job is not None or self.bingrid is None: return
+        layer = self.active_layer
+        pts = horizon_points_array(self.horizons[layer]['points'])
+        if len(pts) == 0: messagebox.showwarning("Auto Track", "현재 레이어에 시드 픽이 필요합니다."); return
+        try: sr = float(self.sr_in.get())
+        except ValueError: sr = 2.0
+        p_il, p_xl = self.bingrid.ilxl(pts[:, 0], pts[:, 1])
+        si = np.rint((p_il - self.ilines[0]) / line_step(self.ilines)).astype(int)
+        sj = np.rint((p_xl - self.xlines[0]) / line_step(self.xlines)).astype(int)
+        tracker = HorizonTracker3D((len(self.ilines), len(self.xlines), self.n_samples), self.read_track_unit)
+        job = {'tracker': tracker, 'layer': layer, 'sr': sr, 'done': False, 'error': None}
+        def run():
+            try:
+                if sum(tracker.add_seed(a, b, t / sr) for a, b, t in zip(si, sj, pts[:, 2])): tracker.run()
+            except Exception as e: job['error'] = e
+            job['done'] = True
+        self.track_job = job
+        threading.Thread(target=run, daemon=True).start()
+        self.btn_track.config(state="disabled")
+        self.poll_auto_track()
+
+    def poll_auto_track(self):
+        job = self.track_job
+        if job is None: return
+        tracker = job['tracker']
+        if not job['done']:
+            self.btn_track.config(text=f"🧭 추적 중... {tracker.tracked:,} bins")
+            self.root.after(300, self.poll_auto_track)
+            return
+        self.track_job = None
+        self.btn_track.config(state="normal", text="🧭 3D Auto Track")
+        if job['error'] is not None: messagebox.showerror("Error", f"Auto track failed: {job['error']}"); return
+        ii, jj = np.nonzero(~np.isnan(tracker.t))
+        if len(ii) == 0: messagebox.showwarning("Auto Track", "추적된 bin이 없습니다."); return
+        x, y = self.bingrid.xy(self.ilines[ii], self.xlines[jj])
+        # 키 = bin 키 (nonzero가 행 우선 순서라 이미 오름차순), 리스트 변환 없이 배열 그대로
+        self.horizons[job['layer']]['points'] = np.column_stack((x, y, tracker.t[ii, jj] * job['sr'], ii * len(self.xlines) + jj))
+        self.update_status(); self.draw_horizons_only()
+        if self.on_update_callback: self.on_update_callback(self.filename, self.horizons, ('set', [job['layer']]))
+
+    def time_lod(self):
+        # 화면 픽셀보다 촘촘하지 않은 가장 거친 LOD 선택
+        w, h = self.canvas.get_width_height()
+        level = 0
+        while level + 1 < self.bricks.levels:
+            n_il, n_xl, _ = self.bricks.level_shape(level + 1)
+            if n_il < h or n_xl < w: break
+            level += 1
+        return level
+
+    def load_time_slice(self, sample_idx):
+        # sample-major 캐시에서 연속 블록 1개만 읽음 → (n_il, n_xl)
+        if self.bricks is not None:
+            self.current_data = self.bricks.slice("Time", sample_idx, level=self.time_lod())
+        elif self.zcube is None or not self.zcube.ready: return
+        else: self.current_data = np.asarray(self.zcube.cube[sample_idx])
+        self.real_trace_indices = None; self.cache_x = None; self.cache_y = None # 시간 단면에서는 픽킹 없음
+        self.abs_sorted = None
+        if self.im_obj is not None and self.drawn_slice_type == "Time" and self.im_obj.get_array().shape == self.current_data.shape:
+            self.im_obj.set_data(self.current_data)
+            self.update_contrast_only(draw=False)
+            self.canvas.draw_idle()
+        else:
+            self.full_redraw()
+            self.drawn_slice_type = "Time"
+
     def load_2d_data(self, path):
         try:
             with segyio.open(path, "r", ignore_geometry=True) as f:
@@ -252,13 +1723,8 @@ class SegyViewer:
                 MAX_DISPLAY_TRACES = 5000 
                 step = max(1, total_traces // MAX_DISPLAY_TRACES)
                 
-                indices = list(range(0, total_traces, step))
-                self.real_trace_indices = np.array(indices)
-                
-                self.current_data = segyio.tools.collect(f.trace[::step]).T
-                
+                data = segyio.tools.collect(f.trace[::step]).T
                 sr = segyio.tools.dt(f)/1000
-                self.sr_in.delete(0, tk.END); self.sr_in.insert(0, str(sr))
                 
                 scalars = f.attributes(segyio.TraceField.SourceGroupScalar)[0:1] 
                 scalar_val = float(scalars[0]) if len(scalars) > 0 else 1.0
@@ -270,13 +1736,44 @@ class SegyViewer:
                 else:
                     xk, yk = segyio.TraceField.SourceX, segyio.TraceField.SourceY
                 
-                self.cache_x = f.attributes(xk)[::step].astype(float) * scalar_val
-                self.cache_y = f.attributes(yk)[::step].astype(float) * scalar_val
-
-            self.full_redraw()
+                # Contrast용 통계: 서브샘플 |amp| 정렬값 (백분위 = 인덱스 조회)
+                sample = np.absolute(data[::5, ::5]).ravel()
+                entry = {
+                    'data': data,
+                    'indices': np.arange(0, total_traces, step),
+                    'x': f.attributes(xk)[::step].astype(float) * scalar_val,
+                    'y': f.attributes(yk)[::step].astype(float) * scalar_val,
+                    'abs_sorted': np.sort(sample[~np.isnan(sample)]),
+                    'sr': sr,
+                }
+            if self.section_cache is not None:
+                self.section_cache.put(SectionCache.make_key(path, self.coord_type), entry)
+            self.apply_section(entry)
         except Exception as e:
             messagebox.showerror("Error", f"2D Load Failed: {e}")
 
+    def show_arbitrary_line(self, path, entry):
+        # 3D 임의 단면: 2D 섹션처럼 표시, 픽은 경로 근처(0.75 bin 이내)만 매칭
+        self.filename = path; self.is_3d = False
+        self.root.title(f"Woo Interpreter - {os.path.basename(path)} [Arbitrary]")
+        self.frame_3d.pack_forget()
+        self.bingrid = entry['grid']
+        self.arb_scale = entry['bin_size']
+        self.arb_tree = cKDTree(np.column_stack((entry['il'], entry['xl'])) / self.arb_scale)
+        # 픽 키는 3D 원본과 같은 bin 키 → 경로가 지나는 bin 상자로 먼저 좁힘 (0.75 bin + 반올림 여유)
+        self.ilines = entry['ilines']; self.xlines = entry['xlines']
+        fi = (entry['il'] - self.ilines[0]) / line_step(self.ilines); fj = (entry['xl'] - self.xlines[0]) / line_step(self.xlines)
+        self.arb_box = (int(np.floor(fi.min())) - 2, int(np.ceil(fi.max())) + 2, int(np.floor(fj.min())) - 2, int(np.ceil(fj.max())) + 2)
+        self.apply_section(entry)
+
+    def apply_section(self, entry):
+        self.real_trace_indices = entry['indices']
+        self.current_data = entry['data']
+        self.cache_x = entry['x']; self.cache_y = entry['y']
+        self.abs_sorted = entry['abs_sorted']
+        self.sr_in.delete(0, tk.END); self.sr_in.insert(0, str(float(entry['sr'])))
+        self.full_redraw()
+
     def load_horizons_data(self, horizons_data):
         if horizons_data: self.horizons = horizons_data
         default_structure = {
@@ -286,8 +1783,24 @@ class SegyViewer:
         }
         for key, default_val in default_structure.items():
             if key not in self.horizons: self.horizons[key] = default_val
+        changed = self.normalize_pick_keys(list(self.horizons))
         self.update_status()
         self.draw_horizons_only()
+        if changed and self.on_update_callback: self.on_update_callback(self.filename, self.horizons, ('set', changed))
+
+    def normalize_pick_keys(self, names):
+        # 3D/임의 단면: 키 열을 X/Y에서 다시 계산한 bin 키로 맞춤 (이전 버전의 IL/XL 번호·화면 인덱스 키 → 라인 구분 가능), 바뀐 레이어만 재정렬
+        if self.bingrid is None or not len(self.ilines): return []
+        changed = []
+        for name in names:
+            arr = self.layer_points(name)
+            if not len(arr): continue
+            keys = pick_bin_keys(self.bingrid, self.ilines, self.xlines, arr[:, 0], arr[:, 1])
+            if np.array_equal(keys, arr[:, 3]): continue
+            order = np.argsort(keys, kind='stable')
+            arr = arr[order]; arr[:, 3] = keys[order]
+            self.horizons[name]['points'] = arr; changed.append(name)
+        return changed
 
     def full_redraw(self):
         if self.current_data is None: return
@@ -295,6 +1808,10 @@ class SegyViewer:
         except: sr = 2.0
         n_samples, n_traces = self.current_data.shape
         self.extent = [0, n_traces, n_samples * sr, 0]
+        time_slice = self.is_3d and self.current_slice_type == "Time"
+        if time_slice:
+            # 행 = Inline, 열 = Crossline (라인 번호 축)
+            self.extent = [self.xlines[0], self.xlines[-1], self.ilines[-1], self.ilines[0]]
         
         self.ax.clear()
         self.im_obj = None 
@@ -307,7 +1824,9 @@ class SegyViewer:
                                      aspect='auto', extent=self.extent, interpolation='nearest')
         self.ax.set_ylabel("Time (ms)")
         
-        if self.is_3d:
+        if time_slice:
+            self.ax.set_ylabel("Inline No."); self.ax.set_xlabel("Crossline No.")
+        elif self.is_3d:
             lbl = "Crossline No." if self.current_slice_type == "Inline" else "Inline No."
             self.ax.set_xlabel(lbl)
         else:
@@ -320,9 +1839,13 @@ class SegyViewer:
     def update_contrast_only(self, draw=True):
         if self.current_data is None: return
         clip_pct = float(self.clip.get())
-        # 샘플링하여 속도 향상
-        sample_data = self.current_data[::5, ::5]
-        limit = np.nanpercentile(np.absolute(sample_data), clip_pct)
+        if self.abs_sorted is not None and len(self.abs_sorted) > 0:
+            # 캐시된 정렬값에서 바로 조회
+            limit = self.abs_sorted[int(round(clip_pct / 100.0 * (len(self.abs_sorted) - 1)))]
+        else:
+            # 샘플링하여 속도 향상
+            sample_data = self.current_data[::5, ::5]
+            limit = np.nanpercentile(np.absolute(sample_data), clip_pct)
         if limit == 0: limit = 1.0
         self.limit_val = limit
         if self.im_obj:
@@ -352,33 +1875,12 @@ class SegyViewer:
         self.line_objs.clear()
         self.scat_objs.clear()
 
-        # 3D 모드일 경우 현재 슬라이스(Inline 번호 등)에 맞는 픽킹만 필터링해야 함
-        # 현재는 단순화를 위해 TraceIdx 기반 매칭만 수행 (3D 픽킹은 Trace Header 기반으로 더 고도화 필요)
-        # 여기서는 2D 로직을 그대로 사용하되, 3D에서는 X축이 XL/IL 번호로 매핑됨.
-        
         for name, data in self.horizons.items():
-            if not data['points']: continue
-            p_arr = np.array(data['points'])
-            
-            # 저장된 인덱스 (Trace No 혹은 IL/XL No)
-            saved_real_indices = p_arr[:, 3] 
-            
-            # 현재 화면의 X축 (real_trace_indices)에 매핑되는지 확인
-            display_indices = np.searchsorted(self.real_trace_indices, saved_real_indices)
-            
-            # 인덱스 유효성 검사
-            valid_mask = (display_indices < len(self.real_trace_indices)) & \
-                         (self.real_trace_indices[np.clip(display_indices, 0, len(self.real_trace_indices)-1)] == saved_real_indices)
-            
-            if self.is_3d:
-                # 3D일 경우 추가 조건: 현재 보고있는 슬라이스 번호와 일치해야 함 (데이터 구조 확장이 필요하나, 여기서는 시각화만 처리)
-                # *중요*: 3D 픽킹 저장을 위해서는 [IL, XL, TWT] 구조로 저장해야 하나, 현재 코드는 [X, Y, TWT, Idx]임.
-                # 3D 뷰어 모드에서는 픽킹을 임시로 제한하거나, TraceIdx를 XL 번호로 간주하여 표시함.
-                pass
-
-            if np.any(valid_mask):
-                x_plot = display_indices[valid_mask]
-                y_plot = p_arr[valid_mask, 2]
+            p_arr = self.layer_points(name) # 레이어는 (N, 4) 배열 → 슬라이스 이동마다 변환 없음
+            if not len(p_arr): continue
+            rows, x_plot = self.line_picks(p_arr) # 현재 라인 위의 픽만, 화면 열 순서
+            if len(rows):
+                y_plot = p_arr[rows, 2]
                 scat = self.ax.plot(x_plot, y_plot, 'o', color=data['color'], markersize=4)[0]
                 self.scat_objs[name] = scat
                 if len(x_plot) >= 2:
@@ -386,44 +1888,83 @@ class SegyViewer:
                     self.line_objs[name] = line
         if draw: self.canvas.draw_idle()
 
+    def line_picks(self, arr):
+        # 레이어 (N, 4) 중 현재 화면 라인 위의 픽 → (행 번호, 화면 열), 열 오름차순
+        if self.arb_tree is not None:
+            # 임의 단면: bin 상자 안의 키만 (인라인 구간은 searchsorted) → X/Y가 경로 0.75 bin 이내인 픽
+            n_xl = len(self.xlines); i0, i1, j0, j1 = self.arb_box
+            lo, hi = np.searchsorted(arr[:, 3], (max(i0, 0) * n_xl, (i1 + 1) * n_xl))
+            j = arr[lo:hi, 3] % n_xl
+            rows = lo + np.flatnonzero((j >= j0) & (j <= j1))
+            p_il, p_xl = self.bingrid.ilxl(arr[rows, 0], arr[rows, 1])
+            dist, col = self.arb_tree.query(np.column_stack((p_il, p_xl)) / self.arb_scale)
+            near = dist <= 0.75; rows, col = rows[near], col[near]
+            order = np.argsort(col, kind='stable')
+            return rows[order], col[order]
+        if self.is_3d:
+            # 3D: 키 = bin 키 (i * n_xl + j) → 현재 라인 구간만 searchsorted
+            axis = self.slice_axis(self.current_slice_type)
+            k = int(np.searchsorted(axis, self.current_line)) if self.current_line is not None else len(axis)
+            if k >= len(axis) or axis[k] != self.current_line: return np.empty(0, int), np.empty(0, int)
+            return line_pick_rows(arr[:, 3], len(self.ilines), len(self.xlines), self.current_slice_type, k)
+        # 2D: 키 = 트레이스 번호, 표시 중인(데시메이션된) 트레이스와 정확히 일치하는 것만
+        col = np.searchsorted(self.real_trace_indices, arr[:, 3])
+        rows = np.flatnonzero((col < len(self.real_trace_indices)) & (self.real_trace_indices[np.minimum(col, len(self.real_trace_indices) - 1)] == arr[:, 3]))
+        return rows, col[rows]
+
+    def pick_key(self, display_idx):
+        # 새 픽의 키 열: 3D/임의 단면은 bin 키, 2D는 트레이스 번호
+        if self.arb_tree is not None:
+            return int(pick_bin_keys(self.bingrid, self.ilines, self.xlines, self.cache_x[display_idx], self.cache_y[display_idx]))
+        if self.is_3d:
+            k = int(np.searchsorted(self.slice_axis(self.current_slice_type), self.current_line))
+            return k * len(self.xlines) + display_idx if self.current_slice_type == "Inline" else display_idx * len(self.xlines) + k
+        return int(self.real_trace_indices[display_idx])
+
     def on_mouse_move(self, event):
         if event.inaxes != self.ax: return
+        if self.is_3d and self.current_slice_type == "Time":
+            # Time slice: 화면 좌표 자체가 (XL, IL)
+            if self.bingrid is not None and self.on_cursor_callback:
+                x, y = self.bingrid.xy(event.ydata, event.xdata)
+                self.on_cursor_callback(float(x), float(y))
+            return
         trace_idx = int(round(event.xdata)) if event.xdata else 0
         if self.cache_x is not None and 0 <= trace_idx < len(self.cache_x):
             if self.on_cursor_callback:
-                # 2D면 (X, Y), 3D면 (LineNo, 0)
+                # 2D는 헤더 좌표, 3D는 Bin grid 좌표
                 self.on_cursor_callback(self.cache_x[trace_idx], self.cache_y[trace_idx])
 
     def on_mouse_action(self, event):
         if event.inaxes != self.ax or not self.filename or self.toolbar.mode != '': return
         display_idx = int(round(event.xdata))
         twt = event.ydata
-        pts_list = self.horizons[self.active_layer]['points']
-        changed = False
+        pts = self.layer_points(self.active_layer)
+        changed = False; edit = None
 
         if event.button == 1: # 좌클릭
             if self.real_trace_indices is not None and 0 <= display_idx < len(self.real_trace_indices):
-                real_idx = self.real_trace_indices[display_idx]
-                
-                # 3D 모드일 경우 좌표 처리가 복잡하므로 여기서는 시각적 X축(Line No)을 저장
+                # 3D는 Bin grid로 계산된 실제 X/Y 저장 (맵핑에 그대로 사용)
                 x_val = self.cache_x[display_idx] if self.cache_x is not None else 0
                 y_val = self.cache_y[display_idx] if self.cache_y is not None else 0
                 
-                pts_list.append([x_val, y_val, twt, real_idx])
-                pts_list.sort(key=lambda x: x[3])
-                changed = True
+                pt = [float(x_val), float(y_val), float(twt), self.pick_key(display_idx)]
+                self.horizons[self.active_layer]['points'] = insert_pick(pts, pt)[0]
+                changed = True; edit = ('add', self.active_layer, pt)
                 
         elif event.button == 3: # 우클릭
-            if pts_list and self.real_trace_indices is not None and 0 <= display_idx < len(self.real_trace_indices):
-                target_real = self.real_trace_indices[display_idx]
-                dists = [abs(p[3] - target_real) for p in pts_list]
-                if dists and min(dists) < 5: # 민감도 조절
-                    pts_list.pop(np.argmin(dists))
-                    changed = True
+            if len(pts) and self.real_trace_indices is not None:
+                rows, cols = self.line_picks(pts) # 현재 라인 위의 픽 중에서만 (다른 IL/XL 픽은 지우지 않음)
+                dists = np.abs(cols - display_idx)
+                n = int(np.argmin(dists)) if len(rows) else -1
+                if n >= 0 and dists[n] < 5: # 민감도 조절
+                    k = int(rows[n])
+                    self.horizons[self.active_layer]['points'] = np.delete(pts, k, axis=0)
+                    changed = True; edit = ('del', self.active_layer, k)
         if changed:
             self.update_status()
             self.draw_horizons_only()
-            if self.on_update_callback: self.on_update_callback(self.filename, self.horizons)
+            if self.on_update_callback: self.on_update_callback(self.filename, self.horizons, edit)
 
     def on_scroll(self, event):
         if event.inaxes != self.ax: return
@@ -436,17 +1977,57 @@ class SegyViewer:
         self.ax.set_ylim([ydata-new_h*(1-rel_y), ydata+new_h*rel_y])
         self.canvas.draw_idle()
 
+    def layer_points(self, name):
+        # 레이어 포인트를 (N, 4) 배열로 (이전 버전/JSON에서 온 리스트는 여기서 한 번만 변환해 되돌려 저장)
+        layer = self.horizons[name]; arr = horizon_points_array(layer['points'])
+        if arr is not layer['points']: layer['points'] = arr
+        return arr
+
     def on_layer_change(self, event): self.active_layer = self.layer_selector.get()
     def update_status(self): self.hor_info.config(text="Pts: " + " | ".join([f"{k[8]}:{len(v['points'])}" for k, v in self.horizons.items()]))
 
+    def start_attribute(self):
+        if not self.filename or self.attr_job is not None: return
+        attr = simpledialog.askstring("Attribute", "속성 (" + " / ".join(ATTRIBUTES) + "):", initialvalue="envelope", parent=self.root)
+        if not attr: return
+        attr = attr.strip().lower()
+        if attr not in ATTRIBUTES: messagebox.showerror("Error", f"지원하지 않는 속성: {attr}"); return
+        stem = os.path.splitext(os.path.basename(self.filename))[0]
+        out = filedialog.asksaveasfilename(defaultextension=".sgy", initialfile=f"{stem}_{attr}.sgy", filetypes=[("SEGY", "*.sgy *.segy")])
+        if not out: return
+        if os.path.abspath(out) == os.path.abspath(self.filename): messagebox.showerror("Error", "원본 파일에는 쓸 수 없습니다."); return
+        # 정규 큐브면 작업 경계를 라인 경계에 맞춤 (inline/crossline 정렬 모두)
+        line_len = None
+        if self.is_3d and self.geom is not None:
+            t = self.geom.table
+            if np.all(np.diff(t.ravel()) == 1): line_len = t.shape[1]
+            elif np.all(np.diff(t.T.ravel()) == 1): line_len = t.shape[0]
+        self.attr_job = AttributeJob(self.filename, out, attr, line_len=line_len)
+        self.attr_job.build_async()
+        self.btn_attr.config(state="disabled")
+        self.poll_attribute()
+
+    def poll_attribute(self):
+        job = self.attr_job
+        if job is None: return
+        if job.error is None and not job.ready:
+            self.btn_attr.config(text=f"📈 {job.attr} 계산 중... {job.progress*100:.0f}%")
+            self.root.after(300, self.poll_attribute)
+            return
+        self.attr_job = None
+        self.btn_attr.config(state="normal", text="📈 속성 계산 → SEG-Y")
+        if job.error is not None: messagebox.showerror("Error", f"Attribute failed: {job.error}"); return
+        if messagebox.askyesno("Attribute", f"저장 완료: {os.path.basename(job.path)}\n새 창에서 열까요?"):
+            SegyViewer(tk.Toplevel(self.root), filename=job.path, on_cursor_callback=self.on_cursor_callback, coord_type=self.coord_type, section_cache=self.section_cache, geom_bytes=self.geom_bytes)
+
     def show_headers(self):
         if not self.filename: return
         win = tk.Toplevel(self.root); win.title("Trace Header")
         txt = scrolledtext.ScrolledText(win, width=60); txt.pack(fill=tk.BOTH, expand=True)
         try:
             # 3D 핸들이 있으면 그것 사용, 아니면 새로 열기
-            if self.is_3d and self.segy_handle:
-                header = self.segy_handle.header[0]
+            if self.is_3d and self.reader:
+                header = self.reader.header[0]
             else:
                 with segyio.open(self.filename, "r", ignore_geometry=True) as f:
                     header = f.header[0]
@@ -455,51 +2036,72 @@ class SegyViewer:
         txt.configure(state='disabled')
 
     def clear_horizon(self):
-        self.horizons[self.active_layer]['points'] = []
+        self.horizons[self.active_layer]['points'] = np.empty((0, 4))
         self.update_status(); self.draw_horizons_only()
-        if self.on_update_callback: self.on_update_callback(self.filename, self.horizons)
+        if self.on_update_callback: self.on_update_callback(self.filename, self.horizons, ('set', [self.active_layer]))
 
     def save_horizon(self):
-        path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV", "*.csv")])
+        path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV", "*.csv"), ("Horizon Binary", "*.hzb")])
         if path:
-            with open(path, 'w', newline='') as f:
-                f.write("Layer,X,Y,TWT,TraceIdx\n")
-                for n, d in self.horizons.items():
-                    for p in d['points']: f.write(f"{n},{p[0]},{p[1]},{p[2]},{p[3]}\n")
-            messagebox.showinfo("Saved", "Export Complete.")
+            try:
+                if path.lower().endswith('.hzb'): write_horizons_bin(path, self.horizons)
+                else: write_horizons_csv(path, self.horizons)
+                messagebox.showinfo("Saved", "Export Complete.")
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to export: {e}")
 
     def import_horizon_csv(self):
-        path = filedialog.askopenfilename(filetypes=[("CSV", "*.csv")])
+        path = filedialog.askopenfilename(filetypes=[("Horizon Files", "*.csv *.hzb"), ("CSV", "*.csv"), ("Horizon Binary", "*.hzb")])
         if not path: return
         try:
-            with open(path, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                loaded_pts = {'Horizon A': [], 'Horizon B': [], 'Horizon C': []}
-                for row in reader:
-                    layer = row['Layer'].strip()
-                    if layer in loaded_pts:
-                        loaded_pts[layer].append([float(row['X']), float(row['Y']), float(row['TWT']), int(float(row['TraceIdx']))])
-                for name, pts in loaded_pts.items():
-                    if pts: self.horizons[name]['points'] = sorted(pts, key=lambda k: k[3])
-                self.update_status(); self.draw_horizons_only()
-                if self.on_update_callback: self.on_update_callback(self.filename, self.horizons)
-                messagebox.showinfo("Import", "Horizon Loaded Successfully!")
+            loaded = read_horizons_bin(path) if path.lower().endswith('.hzb') else read_horizons_csv(path)
+            changed = []
+            for name, arr in loaded.items():
+                if name in self.horizons and len(arr):
+                    self.horizons[name]['points'] = arr; changed.append(name)
+            self.normalize_pick_keys(changed) # 다른 버전/도구에서 온 키도 bin 키로
+            self.update_status(); self.draw_horizons_only()
+            if self.on_update_callback: self.on_update_callback(self.filename, self.horizons, ('set', changed))
+            messagebox.showinfo("Import", "Horizon Loaded Successfully!")
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to import CSV: {e}")
+            messagebox.showerror("Error", f"Failed to import horizon: {e}")
 
 # -----------------------------------------------------------
 # 3. 프로젝트 매니저
 # -----------------------------------------------------------
 class ProjectManager:
+    SECTION_CACHE_MB = 1024
+    MAX_MAP_POINTS = 100_000 # 맵 Scatter/Contour에 쓰는 최대 포인트 수
+    PROJECT_FORMAT = "woo-journal-v1"
+    AUTOSAVE_MS = 5 * 60 * 1000 # 주기적 compaction 간격
+    AUTOSAVE_BASE = os.path.join(os.path.expanduser("~"), ".woo_interpreter", "untitled")
+
     def __init__(self, root):
         self.root = root
         self.root.title("Seismic Project Manager (2D/3D Support)")
         self.root.geometry("1200x900")
         self.survey_lines = {}
-        self.line_plots = {}
         self.horizon_plots = {}
         self.cbar = None 
         self.cursor_marker = None 
+        # 라인 뷰어 창끼리 공유하는 섹션 캐시 (메모리 한도 MB)
+        self.section_cache = SectionCache(max_mb=self.SECTION_CACHE_MB)
+
+        # 베이스맵 공간 인덱스 (라인 수천 개 대응)
+        self.line_collection = None
+        self.map_kdtree = None
+        self.map_seg_a = None; self.map_seg_b = None; self.map_seg_owner = None
+        self.map_seg_half = 0.0
+        self.map_line_ids = []; self.map_line_bbox = None; self.map_line_colors = None
+        self.area_paths = {}
+        self.map_labels = {}
+        self.map_legend = None
+        self.lod_cids = []
+        self.imported_grids = [] # [{'name', 'grid', 'artist'}]
+        self.fold_jobs = {} # 3D 커버리지 래스터 백그라운드 작업
+        self.geom_bytes = (GEOM_IL_BYTE, GEOM_XL_BYTE) # 새로 불러올 3D의 IL/XL 헤더 바이트
+        self.arb_points = None # 임의 단면 경로 입력 중이면 [(x, y), ...]
+        self.arb_artist = None
 
         # 상단 툴바
         top_frame = tk.Frame(root, height=70, bg="#ecf0f1", bd=1, relief=tk.RAISED)
@@ -510,6 +2112,10 @@ class ProjectManager:
         tk.Button(btn_frame, text="📂 Load", command=self.add_files, bg="#2980b9", fg="white", width=8).pack(side=tk.LEFT, padx=2)
         tk.Button(btn_frame, text="💾 Save", command=self.save_project, bg="#27ae60", fg="white", width=8).pack(side=tk.LEFT, padx=2)
         tk.Button(btn_frame, text="📂 Open", command=self.load_project, bg="#f39c12", fg="white", width=8).pack(side=tk.LEFT, padx=2)
+        tk.Button(btn_frame, text="🗺 Grid Out", command=self.export_grid, bg="#8e44ad", fg="white", width=9).pack(side=tk.LEFT, padx=2)
+        tk.Button(btn_frame, text="🗺 Grid In", command=self.import_grid, bg="#16a085", fg="white", width=9).pack(side=tk.LEFT, padx=2)
+        tk.Button(btn_frame, text="✏ Arb Line", command=self.start_arbitrary_line, bg="#c0392b", fg="white", width=9).pack(side=tk.LEFT, padx=2)
+        tk.Button(btn_frame, text="⚙ IL/XL", command=self.set_geom_bytes, bg="#7f8c8d", fg="white", width=7).pack(side=tk.LEFT, padx=2)
         
         sett_frame = tk.Frame(top_frame, bg="#ecf0f1")
         sett_frame.pack(side=tk.LEFT, padx=10)
@@ -536,14 +2142,21 @@ class ProjectManager:
         self.map_frame = tk.Frame(root, bg="white"); self.map_frame.pack(fill=tk.BOTH, expand=True)
         self.setup_initial_canvas()
 
+        # 편집 저널 (저장 전에는 untitled 위치에 기록 → 크래시 복구용)
+        self.project_path = None
+        self.journal = ProjectJournal(self.AUTOSAVE_BASE)
+        self.recover_autosave()
+        self.root.after(self.AUTOSAVE_MS, self.autosave_tick)
+
     def setup_initial_canvas(self):
         self.fig, self.ax = plt.subplots(figsize=(10, 8))
         self.divider = make_axes_locatable(self.ax)
         self.cax = self.divider.append_axes("right", size="3%", pad=0.1)
         self.canvas = FigureCanvasTkAgg(self.fig, master=self.map_frame)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-        NavigationToolbar2Tk(self.canvas, self.map_frame).update()
-        self.fig.canvas.mpl_connect('pick_event', self.on_line_pick)
+        self.toolbar = NavigationToolbar2Tk(self.canvas, self.map_frame); self.toolbar.update()
+        # [최적화] 아티스트별 pick 대신 클릭 좌표를 공간 인덱스로 직접 조회
+        self.fig.canvas.mpl_connect('button_press_event', self.on_line_pick)
         self.reset_map_view() 
 
     def reset_map_view(self):
@@ -553,7 +2166,59 @@ class ProjectManager:
         self.ax.set_aspect('auto'); self.ax.ticklabel_format(useOffset=False, style='plain')
         self.ax.grid(True, linestyle='--', alpha=0.5)
         self.cursor_marker, = self.ax.plot([], [], 'r+', ms=15, mew=2, zorder=10, label='Cursor')
-        self.line_plots = {}; self.horizon_plots = {}
+        self.horizon_plots = {}
+        self.line_collection = None; self.map_kdtree = None; self.map_line_ids = []; self.map_line_bbox = None
+        self.area_paths = {}; self.map_labels = {}; self.map_legend = None
+        self.arb_artist = None
+        for g in self.imported_grids: g['artist'] = None
+        if self.imported_grids: self.draw_imported_grids()
+        # 줌/팬 할 때마다 라벨·범례 LOD 갱신
+        for cid in self.lod_cids: self.ax.callbacks.disconnect(cid)
+        self.lod_cids = [self.ax.callbacks.connect('xlim_changed', self.update_map_labels),
+                         self.ax.callbacks.connect('ylim_changed', self.update_map_labels)]
+
+    def set_geom_bytes(self):
+        s = simpledialog.askstring("3D Geometry", "Inline, Crossline 헤더 바이트 위치:", initialvalue=f"{self.geom_bytes[0]},{self.geom_bytes[1]}", parent=self.root)
+        if not s: return
+        try: il_b, xl_b = (int(v) for v in s.replace(' ', '').split(','))
+        except ValueError: messagebox.showerror("Error", "예: 189,193"); return
+        self.geom_bytes = (il_b, xl_b)
+        self.status_lbl.config(text=f"IL/XL bytes = {il_b}/{xl_b} (이후 불러오는 파일에 적용)")
+
+    def start_fold_map(self, fname, filepath):
+        # 커버리지 래스터는 백그라운드 스레드에서 만들고, 메인 스레드에서 폴링해 그림
+        if fname in self.fold_jobs: return
+        job = {'path': filepath, 'result': None, 'error': None}
+        def run():
+            try: job['result'] = survey_fold_map(filepath, *self.geom_bytes)
+            except Exception as e: job['error'] = e
+        job['thread'] = threading.Thread(target=run, daemon=True)
+        self.fold_jobs[fname] = job
+        job['thread'].start()
+        if len(self.fold_jobs) == 1: self.root.after(500, self.poll_fold_maps)
+
+    def poll_fold_maps(self):
+        done = [k for k, j in self.fold_jobs.items() if not j['thread'].is_alive()]
+        for fname in done:
+            job = self.fold_jobs.pop(fname)
+            d = self.survey_lines.get(fname)
+            if job['error'] is not None: print(f"Fold map failed ({fname}): {job['error']}")
+            elif d is not None and d['path'] == job['path']:
+                d['fold'] = job['result']
+                if fname in self.area_paths:
+                    colors = plt.cm.nipy_spectral(np.linspace(0, 1, len(self.survey_lines)))
+                    self.draw_fold_map(fname, colors[list(self.survey_lines).index(fname) % len(colors)])
+        if done: self.canvas.draw_idle()
+        if self.fold_jobs: self.root.after(500, self.poll_fold_maps)
+
+    def draw_fold_map(self, lid, col):
+        # IL/XL 래스터를 Bin grid로 X/Y 변환 → 회전된 서베이에서도 정확히 겹침
+        d = self.survey_lines[lid]
+        fold = d['fold']
+        gx, gy = d['grid'].xy(*np.meshgrid(fold['il'], fold['xl'], indexing='ij'))
+        live = np.ma.masked_where(~fold['live'], np.ones(fold['live'].shape))
+        cmap = matplotlib.colors.ListedColormap([col])
+        self.ax.pcolormesh(gx, gy, live, cmap=cmap, shading='nearest', alpha=0.5, edgecolors='none', linewidth=0, rasterized=True)
 
     def update_cursor_position(self, x, y):
         if self.cursor_marker:
@@ -565,43 +2230,23 @@ class ProjectManager:
             if not os.path.exists(filepath): return None
             fname = os.path.basename(filepath)
             
-            # 1. 3D인지 확인 (Geometry 확인)
+            # 1. 3D인지 확인 (strict 실패해도 IL/XL 헤더 인덱스로 3D 구성 시도)
             try:
-                # strict=True로 열어서 성공하면 3D
-                with segyio.open(filepath, "r", strict=True) as f:
-                    # 3D는 전체 라인을 그릴 필요 없이 Bounding Box (4개의 코너)만 가져옵니다.
-                    ilines = f.ilines
-                    xlines = f.xlines
-                    
-                    # 코너 좌표 추출 (최적화)
-                    corners = []
-                    # (min_il, min_xl), (min_il, max_xl), (max_il, max_xl), (max_il, min_xl)
-                    for il in [ilines[0], ilines[-1]]:
-                        for xl in [xlines[0], xlines[-1]]:
-                             # 여기서 실제 좌표(CDP_X, Y)를 가져와야 함.
-                             # f.iline[il] 등은 무거우므로 header attribute 활용
-                             pass 
-                    
-                    # 간단하게 전체 Trace 헤더 중 일부만 읽어서 범위 파악 (간소화)
-                    # 3D는 strict 모드가 되면 map attribute 사용 가능
-                    scalar = f.attributes(segyio.TraceField.SourceGroupScalar)[0]
-                    if scalar < 0: scalar = 1.0/abs(scalar)
-                    elif scalar == 0: scalar = 1.0
-                    
-                    # 코너 찾기가 복잡하므로, 3D도 일단 전체 좌표의 일부를 샘플링해서 영역 표시
-                    # (정석은 4코너 헤더만 읽는 것)
-                    step = max(1, f.tracecount // 500)
-                    all_x = f.attributes(segyio.TraceField.CDP_X)[::step] * scalar
-                    all_y = f.attributes(segyio.TraceField.CDP_Y)[::step] * scalar
-                    
-                    x_bound = [np.min(all_x), np.max(all_x), np.max(all_x), np.min(all_x), np.min(all_x)]
-                    y_bound = [np.min(all_y), np.min(all_y), np.max(all_y), np.max(all_y), np.min(all_y)]
+                f = SegyReaderService.acquire(filepath, *self.geom_bytes); geom = f.geom
+                with f:
+                    # 3D는 네 모서리 트레이스 헤더만 읽어서 회전된 실제 외곽선 계산 (O(1))
+                    ilines, xlines = geom.ilines, geom.xlines
+                    grid = BinGrid.from_segy(f, geom, n_samples=0)
+                    il_c = [ilines[0], ilines[0], ilines[-1], ilines[-1], ilines[0]]
+                    xl_c = [xlines[0], xlines[-1], xlines[-1], xlines[0], xlines[0]]
+                    x_bound, y_bound = grid.xy(il_c, xl_c)
                     
                     if existing_horizons: horizons = existing_horizons
                     else: horizons = {'Horizon A': {'color': 'yellow', 'points': []}, 'Horizon B': {'color': 'cyan', 'points': []}, 'Horizon C': {'color': 'lime', 'points': []}}
 
-                    self.survey_lines[fname] = {'path': filepath, 'x': x_bound, 'y': y_bound, 'type': '3D', 'horizons': horizons}
-                    return fname
+                    self.survey_lines[fname] = {'path': filepath, 'x': x_bound, 'y': y_bound, 'type': '3D', 'horizons': horizons, 'grid': grid, 'geom_bytes': self.geom_bytes}
+                self.start_fold_map(fname, filepath)
+                return fname
                     
             except:
                 # 2D 처리 (기존 로직)
@@ -640,16 +2285,28 @@ class ProjectManager:
         self.status_lbl.config(text="Loading headers..."); self.root.update()
         count = 0
         for filepath in files:
-            if self.process_segy_file(filepath): count += 1
+            fname = self.process_segy_file(filepath)
+            if fname:
+                count += 1
+                self.journal_append({'op': 'line', 'name': fname, 'path': filepath})
         self.update_map()
         self.status_lbl.config(text=f"{count} files loaded.")
 
+    def project_lines(self):
+        return {fname: {'path': data['path'], 'horizons': data['horizons']} for fname, data in self.survey_lines.items()}
+
     def save_project(self):
         path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON Project", "*.json")])
         if not path: return
-        save_data = {fname: {'path': data['path'], 'horizons': data['horizons']} for fname, data in self.survey_lines.items()}
+        # [최적화] JSON에는 라인 목록만, 호라이즌은 바이너리 스냅샷으로
+        manifest = {'format': self.PROJECT_FORMAT, 'lines': {fname: {'path': data['path']} for fname, data in self.survey_lines.items()}}
         try:
-            with open(path, 'w', encoding='utf-8') as f: json.dump(save_data, f, indent=4)
+            with open(path, 'w', encoding='utf-8') as f: json.dump(manifest, f)
+            new_journal = ProjectJournal(path)
+            self.journal.close()
+            new_journal.write_snapshot(self.project_lines())
+            if self.project_path is None: self.journal.discard()
+            self.journal = new_journal; self.project_path = path
             messagebox.showinfo("Success", "Project Saved.")
         except Exception as e: messagebox.showerror("Error", str(e))
 
@@ -659,61 +2316,251 @@ class ProjectManager:
         project_dir = os.path.dirname(path)
         try:
             with open(path, 'r', encoding='utf-8') as f: loaded_data = json.load(f)
-            self.survey_lines = {}; self.reset_map_view()
-            count = 0
-            self.status_lbl.config(text="Restoring..."); self.root.update()
-            for fname, data in loaded_data.items():
-                file_path = data['path']
-                if not os.path.exists(file_path):
-                    alt = os.path.join(project_dir, os.path.basename(file_path))
-                    if os.path.exists(alt): file_path = alt
-                if self.process_segy_file(file_path, existing_horizons=data['horizons']): count += 1
-            self.update_map(); self.draw_visualization()
-            self.status_lbl.config(text=f"Restored: {count}")
+            replayed = 0
+            if loaded_data.get('format') == self.PROJECT_FORMAT:
+                journal = ProjectJournal(path)
+                lines = journal.load(); replayed = journal.records
+                for fname, d in loaded_data['lines'].items(): lines.setdefault(fname, {'path': d['path'], 'horizons': {}})
+            else:
+                journal = None; lines = loaded_data # 이전 버전 (horizons 포함 JSON)
+            self.journal.close()
+            if self.project_path is None: self.journal.discard()
+            if journal is not None:
+                self.journal = journal; self.project_path = path
+            else:
+                self.journal = ProjectJournal(self.AUTOSAVE_BASE); self.project_path = None
+            count = self.restore_lines(lines, project_dir)
+            if journal is None: self.compact_journal()
+            msg = f"Restored: {count}"
+            if replayed: msg += f" (recovered {replayed} unsaved edits)"
+            self.status_lbl.config(text=msg)
             messagebox.showinfo("Success", "Loaded.")
         except Exception as e: messagebox.showerror("Error", str(e))
 
+    def restore_lines(self, lines, project_dir):
+        self.survey_lines = {}; self.reset_map_view()
+        count = 0
+        self.status_lbl.config(text="Restoring..."); self.root.update()
+        for fname, data in lines.items():
+            file_path = data['path']
+            if not os.path.exists(file_path):
+                alt = os.path.join(project_dir, os.path.basename(file_path))
+                if os.path.exists(alt): file_path = alt
+            if self.process_segy_file(file_path, existing_horizons=data['horizons'] or None): count += 1
+        self.update_map(); self.draw_visualization()
+        return count
+
+    def recover_autosave(self):
+        if not self.journal.has_data(): return
+        try:
+            if messagebox.askyesno("Recovery", "저장되지 않은 이전 작업이 있습니다. 복구할까요?"):
+                lines = self.journal.load()
+                count = self.restore_lines(lines, os.getcwd())
+                self.status_lbl.config(text=f"Recovered: {count} lines")
+            else: self.journal.discard()
+        except Exception as e:
+            self.status_lbl.config(text=f"Recovery failed: {e}")
+
+    # ------------------------------------------------------------------
+    # 저널 기록 (편집 1건당 1줄 append) / 주기적 compaction
+    # ------------------------------------------------------------------
+    def journal_append(self, rec):
+        try:
+            self.journal.append(rec)
+            if self.journal.needs_compaction(): self.compact_journal()
+        except OSError as e: self.status_lbl.config(text=f"Autosave failed: {e}")
+
+    def journal_edit(self, fname, edit):
+        op = edit[0]; hz = self.survey_lines[fname]['horizons']
+        if op == 'add':
+            self.journal_append({'op': 'add', 'line': fname, 'layer': edit[1], 'color': hz[edit[1]]['color'], 'pt': edit[2]})
+        elif op == 'del':
+            self.journal_append({'op': 'del', 'line': fname, 'layer': edit[1], 'i': edit[2]})
+        elif op == 'set':
+            # Import 같은 대량 변경은 줄 단위 기록 대신 바로 스냅샷
+            if sum(len(hz[n]['points']) for n in edit[1]) > ProjectJournal.INLINE_SET_MAX: self.compact_journal(); return
+            for n in edit[1]:
+                self.journal_append({'op': 'set', 'line': fname, 'layer': n, 'color': hz[n]['color'], 'pts': horizon_points_array(hz[n]['points']).tolist()})
+
+    def compact_journal(self):
+        try: self.journal.write_snapshot(self.project_lines())
+        except OSError as e: self.status_lbl.config(text=f"Autosave failed: {e}")
+
+    def autosave_tick(self):
+        if self.journal.records > 0: self.compact_journal()
+        self.root.after(self.AUTOSAVE_MS, self.autosave_tick)
+
     def update_map(self):
         if not self.survey_lines: return
         colors = plt.cm.nipy_spectral(np.linspace(0,1,len(self.survey_lines)))
-        idx = 0
-        for lid, d in self.survey_lines.items():
-            found = False
-            for artist, name in self.line_plots.items():
-                if name == lid: found = True; break
-            if found: continue
-            
-            # 3D는 Polygon(면) 느낌으로, 2D는 Line으로
+        
+        # [최적화] 2D 라인 전체를 LineCollection 하나로 렌더링 (라인당 아티스트 생성 X)
+        if self.line_collection is not None:
+            try: self.line_collection.remove()
+            except: pass
+        segs, seg_colors, ids = [], [], []
+        for idx, (lid, d) in enumerate(self.survey_lines.items()):
+            col = colors[idx%len(colors)]
             if d.get('type') == '3D':
-                # 3D Area (채우기 살짝 해서 표시)
-                l, = self.ax.fill(d['x'], d['y'], label=lid, alpha=0.3, color=colors[idx%len(colors)], edgecolor=colors[idx%len(colors)], picker=True)
-                # Text Label at center
-                cx, cy = np.mean(d['x']), np.mean(d['y'])
-                self.ax.text(cx, cy, f"[3D] {lid[:10]}", fontsize=8, color='black', fontweight='bold', ha='center')
-            else:
-                l, = self.ax.plot(d['x'], d['y'], label=lid, linewidth=2, color=colors[idx%len(colors)], picker=5)
-                if len(d['x'])>0: self.ax.text(d['x'][0], d['y'][0], lid[:10], fontsize=8, color=colors[idx%len(colors)], fontweight='bold')
-            
-            self.line_plots[l] = lid
-            idx += 1
+                # 3D Area는 개수가 적으므로 기존처럼 Polygon으로 표시
+                if lid not in self.area_paths:
+                    if 'fold' in d: self.draw_fold_map(lid, col)
+                    self.ax.fill(d['x'], d['y'], alpha=0.1 if 'fold' in d else 0.3, color=col, edgecolor=col)
+                    cx, cy = np.mean(d['x']), np.mean(d['y'])
+                    self.ax.text(cx, cy, f"[3D] {lid[:10]}", fontsize=8, color='black', fontweight='bold', ha='center')
+                    self.area_paths[lid] = Path(np.column_stack((d['x'], d['y'])))
+                continue
+            if len(d['x']) == 0: continue
+            segs.append(np.column_stack((d['x'], d['y']))); seg_colors.append(col); ids.append(lid)
+        
+        self.map_line_ids = ids
+        self.map_line_colors = np.array(seg_colors) if seg_colors else None
+        self.line_collection = None
+        if segs:
+            self.line_collection = LineCollection(segs, colors=seg_colors, linewidths=2)
+            self.ax.add_collection(self.line_collection)
+        self.build_map_index(segs)
+        
+        for t in self.map_labels.values():
+            try: t.remove()
+            except: pass
+        self.map_labels = {}
+        self.ax.relim()
+        if segs: self.ax.update_datalim(np.vstack(segs))
+        self.ax.autoscale_view()
+        self.update_map_labels()
+        self.canvas.draw()
+
+    def build_map_index(self, segs):
+        # 데시메이션된 라인 정점으로 세그먼트 KD-tree 구성 (세그먼트 중점 기준)
+        self.map_kdtree = None
+        a_list, b_list, owner = [], [], []
+        bbox = []
+        for i, xy in enumerate(segs):
+            bbox.append([xy[:,0].min(), xy[:,1].min(), xy[:,0].max(), xy[:,1].max()])
+            if len(xy) == 1: xy = np.vstack((xy, xy))
+            a_list.append(xy[:-1]); b_list.append(xy[1:]); owner.append(np.full(len(xy)-1, i))
+        self.map_line_bbox = np.array(bbox) if bbox else None
+        if not a_list: return
+        self.map_seg_a = np.vstack(a_list); self.map_seg_b = np.vstack(b_list)
+        self.map_seg_owner = np.concatenate(owner)
+        self.map_seg_half = float(np.max(np.hypot(*(self.map_seg_b - self.map_seg_a).T))) / 2.0
+        self.map_kdtree = cKDTree((self.map_seg_a + self.map_seg_b) / 2.0)
+
+    def find_line_at(self, event, tol_px=5):
+        # 클릭 위치에서 tol_px 픽셀 이내의 가장 가까운 2D 라인 검색
+        if self.map_kdtree is None: return None
+        inv = self.ax.transData.inverted()
+        p0 = inv.transform((event.x, event.y))
+        p1 = inv.transform((event.x + tol_px, event.y + tol_px))
+        radius = float(np.max(np.abs(p1 - p0))) + self.map_seg_half
+        cand = self.map_kdtree.query_ball_point([event.xdata, event.ydata], radius)
+        if not cand: return None
+        cand = np.asarray(cand)
+        # 후보 세그먼트만 화면 좌표로 변환해 점-선분 거리를 벡터 계산
+        a = self.ax.transData.transform(self.map_seg_a[cand])
+        b = self.ax.transData.transform(self.map_seg_b[cand])
+        p = np.array([event.x, event.y])
+        ab = b - a; L2 = np.einsum('ij,ij->i', ab, ab)
+        t = np.clip(np.einsum('ij,ij->i', p - a, ab) / np.where(L2 == 0, 1, L2), 0, 1)
+        dist = np.hypot(*(a + ab * t[:, None] - p).T)
+        k = np.argmin(dist)
+        if dist[k] > tol_px: return None
+        return self.map_line_ids[self.map_seg_owner[cand[k]]]
+
+    def update_map_labels(self, ax=None):
+        # 라벨/범례 LOD: 현재 화면에 들어온 라인이 적을 때만 표시
+        MAX_LABELS, MAX_LEGEND = 40, 15
+        if self.map_line_bbox is None: return
+        x0, x1 = sorted(self.ax.get_xlim()); y0, y1 = sorted(self.ax.get_ylim())
+        bb = self.map_line_bbox
+        vis = np.nonzero((bb[:,2] >= x0) & (bb[:,0] <= x1) & (bb[:,3] >= y0) & (bb[:,1] <= y1))[0]
+        show = set(vis.tolist()) if len(vis) <= MAX_LABELS else set()
+        for i in show:
+            lid = self.map_line_ids[i]
+            if lid not in self.map_labels:
+                d = self.survey_lines[lid]
+                self.map_labels[lid] = self.ax.text(d['x'][0], d['y'][0], lid[:10], fontsize=8, color=self.map_line_colors[i], fontweight='bold')
+        shown_ids = {self.map_line_ids[i] for i in show}
+        for lid, t in self.map_labels.items(): t.set_visible(lid in shown_ids)
         
-        self.ax.legend(loc='upper right', fontsize='x-small')
-        self.ax.relim(); self.ax.autoscale_view(); self.canvas.draw()
+        if self.map_legend is not None:
+            try: self.map_legend.remove()
+            except: pass
+            self.map_legend = None
+        if 0 < len(vis) <= MAX_LEGEND:
+            handles = [Line2D([], [], color=self.map_line_colors[i], linewidth=2) for i in vis]
+            self.map_legend = self.ax.legend(handles, [self.map_line_ids[i] for i in vis], loc='upper right', fontsize='x-small')
+        self.canvas.draw_idle()
+
+    def start_arbitrary_line(self):
+        self.arb_points = []
+        self.status_lbl.config(text="Arbitrary line: 3D 영역 위에 점 클릭, 우클릭으로 완료")
+
+    def on_arbitrary_click(self, event):
+        if event.button == 1:
+            self.arb_points.append((event.xdata, event.ydata))
+            xs, ys = zip(*self.arb_points)
+            if self.arb_artist is None: self.arb_artist, = self.ax.plot(xs, ys, 'r.-', lw=1.5, zorder=9)
+            else: self.arb_artist.set_data(xs, ys)
+            self.canvas.draw_idle()
+            return
+        if event.button != 3: return
+        pts = np.array(self.arb_points); self.arb_points = None
+        if self.arb_artist is not None:
+            try: self.arb_artist.remove()
+            except: pass
+            self.arb_artist = None
+        self.canvas.draw_idle()
+        if len(pts) < 2: self.status_lbl.config(text="Arbitrary line: 점이 2개 이상 필요합니다."); return
+        lid = next((aid for aid, path in self.area_paths.items() if path.contains_points(pts).any()), None)
+        if lid is None: self.status_lbl.config(text="Arbitrary line: 경로가 3D 영역을 지나지 않습니다."); return
+        self.open_arbitrary_line(lid, pts[:, 0], pts[:, 1])
+
+    def open_arbitrary_line(self, lid, px, py, interp=True):
+        data = self.survey_lines[lid]
+        try:
+            f = SegyReaderService.acquire(data['path'], *data['geom_bytes']); geom = f.geom
+            with f:
+                grid = data['grid']
+                fi, fj = polyline_bins(grid, geom.ilines, geom.xlines, px, py)
+                if len(fi) == 0: self.status_lbl.config(text="Arbitrary line: 경로가 서베이 밖입니다."); return
+                section = extract_arbitrary_line(f, geom, fi, fj, interp=interp)
+                sr = f.dt / 1000
+                bin_size = np.array([line_step(geom.ilines), line_step(geom.xlines)])
+                il = geom.ilines[0] + fi * bin_size[0]; xl = geom.xlines[0] + fj * bin_size[1]
+        except Exception as e:
+            messagebox.showerror("Error", f"Arbitrary line failed: {e}"); return
+        x, y = grid.xy(il, xl)
+        sample = np.absolute(section[::5, ::5]).ravel()
+        entry = {'data': section, 'indices': np.arange(len(fi)), 'x': x, 'y': y, 'il': il, 'xl': xl, 'grid': grid, 'bin_size': bin_size, 'ilines': geom.ilines, 'xlines': geom.xlines,
+                 'abs_sorted': np.sort(sample[~np.isnan(sample)]), 'sr': sr}
+        viewer = SegyViewer(tk.Toplevel(self.root), on_update_callback=self.on_horizon_update, on_cursor_callback=self.update_cursor_position, coord_type='3D')
+        viewer.show_arbitrary_line(data['path'], entry)
+        viewer.load_horizons_data(data['horizons'])
+        self.status_lbl.config(text=f"Arbitrary line: {lid} ({len(fi)} traces)")
 
     def on_line_pick(self, event):
-        if event.artist in self.line_plots:
-            lid = self.line_plots[event.artist]
-            data = self.survey_lines[lid]
-            new_win = tk.Toplevel(self.root)
-            # 3D일 경우 coord_type 전달
-            coord_type = data.get('type', 'CDP')
-            viewer = SegyViewer(new_win, filename=data['path'], on_update_callback=self.on_horizon_update, on_cursor_callback=self.update_cursor_position, coord_type=coord_type)
-            viewer.load_horizons_data(data['horizons'])
-
-    def on_horizon_update(self, filepath, horizons):
+        if event.inaxes != self.ax or self.toolbar.mode != '': return
+        if self.arb_points is not None: return self.on_arbitrary_click(event)
+        if event.button != 1: return
+        lid = self.find_line_at(event)
+        if lid is None:
+            for aid, path in self.area_paths.items():
+                if path.contains_point((event.xdata, event.ydata)): lid = aid; break
+        if lid is None: return
+        data = self.survey_lines[lid]
+        new_win = tk.Toplevel(self.root)
+        # 3D일 경우 coord_type 전달
+        coord_type = data.get('type', 'CDP')
+        viewer = SegyViewer(new_win, filename=data['path'], on_update_callback=self.on_horizon_update, on_cursor_callback=self.update_cursor_position, coord_type=coord_type, section_cache=self.section_cache, geom_bytes=data.get('geom_bytes'))
+        viewer.load_horizons_data(data['horizons'])
+
+    def on_horizon_update(self, filepath, horizons, edit=None):
         fname = os.path.basename(filepath)
         if fname in self.survey_lines:
             self.survey_lines[fname]['horizons'] = horizons
+            if edit: self.journal_edit(fname, edit)
             self.draw_visualization()
 
     def on_viz_change(self, event): self.draw_visualization()
@@ -730,16 +2577,12 @@ class ProjectManager:
         target = self.horizon_selector.get(); mode = self.view_mode.get()
         if target == 'None': self.canvas.draw(); return
         
-        all_x, all_y, all_z = [], [], []
-        for lid, d in self.survey_lines.items():
-            if target in d['horizons']:
-                pts = d['horizons'][target]['points']
-                if pts:
-                    p = np.array(pts)
-                    all_x.extend(p[:,0]); all_y.extend(p[:,1]); all_z.extend(p[:,2])
-        
-        if not all_x: self.canvas.draw(); return
-        all_x = np.array(all_x); all_y = np.array(all_y); all_z = np.array(all_z)
+        all_x, all_y, all_z = self.collect_horizon_points(target)
+        if len(all_x) == 0: self.canvas.draw(); return
+        # 3D 자동 추적 결과처럼 조밀한 호라이즌은 맵 표시용으로만 균등 데시메이션
+        if len(all_x) > self.MAX_MAP_POINTS:
+            step = -(-len(all_x) // self.MAX_MAP_POINTS)
+            all_x, all_y, all_z = all_x[::step], all_y[::step], all_z[::step]
 
         try: vmin = float(self.ent_vmin.get())
         except: vmin = None
@@ -778,7 +2621,54 @@ class ProjectManager:
             plt.colorbar(mappable, cax=self.cax, label='Time (ms)')
         self.canvas.draw()
 
+    def collect_horizon_points(self, target):
+        arrs = [horizon_points_array(d['horizons'][target]['points']) for d in self.survey_lines.values()
+                if target in d['horizons'] and len(d['horizons'][target]['points'])]
+        if not arrs: return np.empty(0), np.empty(0), np.empty(0)
+        p = np.vstack(arrs)
+        return p[:,0], p[:,1], p[:,2]
+
+    # ------------------------------------------------------------------
+    # 그리드 Export / Import (행·열 블록 스트리밍)
+    # ------------------------------------------------------------------
+    def export_grid(self):
+        target = self.horizon_selector.get()
+        if target == 'None': messagebox.showwarning("Grid", "Layer를 먼저 선택하세요."); return
+        x, y, z = self.collect_horizon_points(target)
+        if len(x) < 4: messagebox.showwarning("Grid", "포인트가 부족합니다."); return
+        default_cell = max(np.ptp(x), np.ptp(y)) / 200.0 or 1.0
+        cell = simpledialog.askfloat("Grid Export", "Cell size:", initialvalue=round(default_cell, 3), minvalue=1e-9, parent=self.root)
+        if not cell: return
+        path = filedialog.asksaveasfilename(defaultextension=".zmap", filetypes=[("ZMAP+", "*.zmap *.dat"), ("ESRI ASCII", "*.asc"), ("Raw float32 + hdr", "*.bin")])
+        if not path: return
+        try:
+            self.status_lbl.config(text="Exporting grid..."); self.root.update()
+            grid = HorizonGrid.from_points(x, y, z, cell)
+            write_grid(path, grid, name=target.replace(' ', '_'))
+            self.status_lbl.config(text=f"Grid exported: {grid.shape[1]} x {grid.shape[0]}")
+        except Exception as e: messagebox.showerror("Error", f"Grid export failed: {e}")
+
+    def import_grid(self):
+        path = filedialog.askopenfilename(filetypes=[("Grid Files", "*.zmap *.dat *.asc *.bin"), ("All", "*.*")])
+        if not path: return
+        try:
+            self.imported_grids.append({'name': os.path.basename(path), 'grid': read_grid(path), 'artist': None})
+            self.draw_imported_grids()
+            self.status_lbl.config(text=f"Grid loaded: {os.path.basename(path)}")
+        except Exception as e: messagebox.showerror("Error", f"Grid import failed: {e}")
+
+    def draw_imported_grids(self):
+        MAX_PIX = 2000 # 화면 표시용 stride (원본 복사 없이 뷰)
+        for g in self.imported_grids:
+            if g['artist'] is not None: continue
+            grid = g['grid']; ny, nx = grid.shape
+            sy, sx = max(1, ny // MAX_PIX), max(1, nx // MAX_PIX)
+            ext = [grid.xi[0] - grid.dx / 2, grid.xi[-1] + grid.dx / 2, grid.yi[0] - grid.dy / 2, grid.yi[-1] + grid.dy / 2]
+            g['artist'] = self.ax.imshow(grid.z[::sy, ::sx], origin='lower', extent=ext, cmap='viridis_r', alpha=0.6, zorder=3, aspect='auto', interpolation='nearest')
+        self.canvas.draw_idle()
+
 if __name__ == "__main__":
+    multiprocessing.freeze_support() # PyInstaller exe: 브릭/속성 워커 프로세스가 뷰어를 다시 띄우지 않도록
     root = tk.Tk()
     manager = ProjectManager(root)
     root.mainloop()
@@ -1,22 +1,791 @@
 import sys
+import os
+import re
+import glob
+import time
+import argparse
+import multiprocessing
+import ast
+import json
+import hashlib
+import warnings
+from collections import namedtuple
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 import lasio
 import pandas as pd
 import numpy as np
 import pyqtgraph as pg
-from PySide6.QtGui import QColor, QBrush, QPen, QFont
+from PySide6.QtGui import QColor, QBrush, QPen, QFont, QPainterPath
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QListWidget, QFileDialog, QMessageBox, QLineEdit,
     QCheckBox, QLabel, QListWidgetItem, QFrame, QColorDialog,
     QComboBox, QTabWidget, QInputDialog, 
     QTreeWidget, QTreeWidgetItem, QScrollArea,
-    QGroupBox, QSplitter, QFormLayout
+    QGroupBox, QSplitter, QFormLayout, QAbstractItemView
 )
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer, QRectF
+
+try:
+    import numexpr as ne # 있으면 수식 평가를 numexpr(자체 멀티스레드 VM)로
+except ImportError:
+    ne = None
 
 # 커브별 기본 색상 리스트
 CURVE_COLORS = ['blue', 'red', 'green', 'cyan', 'magenta', 'orange', 'black'] 
 
+def new_track_props():
+    # tracks_model 항목 1개의 기본값 (Scale 1/2 범위, 커브, 채우기)
+    return {"r1": {"min":0, "max":100, "log":False}, "r2": {"min":0, "max":100, "log":False}, "curves": {}, "fill": {"en":False, "type":"Baseline", "lev":0.0, "tgt":"", "col":"#FFFF00"}}
+
+# -----------------------------------------------------------------
+# Fast LAS Reader (LAS 2.0 헤더 파싱 + ~A 블록 일괄 파싱 + 바이너리 사이드카 캐시)
+# -----------------------------------------------------------------
+LAS_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".woolog_cache")
+LAS_CHUNK_BYTES = 32 << 20 # ~A 블록을 이 크기씩 읽어서 파싱 (최대 메모리 제한)
+LasCurve = namedtuple("LasCurve", "mnemonic unit descr")
+
+class LasFile:
+    # lasio.LASFile 대신 쓰는 가벼운 결과 객체: 깊이는 float64, 커브는 float32 (n_curves-1, n) 행 단위 연속
+    def __init__(self, path, header, curves, depth, data):
+        self.path = path; self.header = header; self.curves = curves
+        self.depth = depth; self.data = data
+
+    @property
+    def well(self): return self.header.get("W", {})
+
+    def df(self):
+        cols = {c.mnemonic: self.data[i] for i, c in enumerate(self.curves[1:])}
+        return pd.DataFrame(cols, index=pd.Index(self.depth, name=self.curves[0].mnemonic))
+
+def las_cache_path(path, suffix):
+    # 원본 경로/크기/mtime으로 태그 → 원본이 바뀌면 자동으로 다시 파싱
+    st = os.stat(path)
+    tag = hashlib.md5(f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}".encode()).hexdigest()[:16]
+    return os.path.join(LAS_CACHE_DIR, f"{os.path.splitext(os.path.basename(path))[0]}_{tag}{suffix}")
+
+def parse_las_line(line):
+    # "MNEM.UNIT  VALUE : DESCRIPTION"
+    name, _, rest = line.partition('.')
+    if rest[:1] in (' ', '\t'): unit = ''
+    else: unit, _, rest = rest.partition(' ')
+    value, _, descr = rest.rpartition(':') if ':' in rest else (rest, '', '')
+    return name.strip(), unit.strip(), value.strip(), descr.strip()
+
+def read_las_header(fh):
+    # ~A 직전까지 섹션별 {mnemonic: value} + 커브 목록
+    header = {}; curves = []; sec = None
+    for raw in fh:
+        line = raw.decode('latin-1').strip()
+        if not line or line.startswith('#'): continue
+        if line.startswith('~'):
+            sec = line[1:2].upper()
+            if sec == 'A': return header, curves
+            header.setdefault(sec, {}); continue
+        if sec is None: continue
+        name, unit, value, descr = parse_las_line(line)
+        if sec == 'C':
+            base = name; k = 1
+            while name in {c.mnemonic for c in curves}: name = f"{base}:{k}"; k += 1
+            curves.append(LasCurve(name, unit, descr))
+        else: header[sec][name.upper()] = value
+    raise ValueError("~A section not found")
+
+def parse_las_data(fh, n_curves, null):
+    # 청크 단위로 np.fromstring(C 파서) → 값 흐름을 n_curves개씩 끊음 (WRAP 모드도 그대로 처리됨)
+    depth_parts = []; data_parts = []; carry = np.empty(0); tail = b''
+    while True:
+        buf = fh.read(LAS_CHUNK_BYTES)
+        if buf:
+            buf = tail + buf; cut = buf.rfind(b'\n') + 1
+            if not cut: tail = buf; continue
+            text, tail = buf[:cut], buf[cut:]
+        elif tail: text, tail = tail, b''
+        else: break
+        with warnings.catch_warnings():
+            warnings.simplefilter('error') # 숫자가 아닌 값이 있으면 부분 파싱 대신 예외 → lasio로 대체
+            try: vals = np.fromstring(text.decode('latin-1'), dtype=np.float64, sep=' ')
+            except Warning as w: raise ValueError(f"Non-numeric ~A data: {w}") # NumPy 1.x는 DeprecationWarning
+        if len(carry): vals = np.concatenate((carry, vals))
+        k = len(vals) // n_curves * n_curves
+        rows = vals[:k].reshape(-1, n_curves); carry = vals[k:]
+        depth_parts.append(rows[:, 0].copy())
+        block = rows[:, 1:].T.astype(np.float32)
+        if null is not None: block[block == np.float32(null)] = np.nan
+        data_parts.append(block)
+    if len(carry): raise ValueError("~A value count is not a multiple of the curve count")
+    if not depth_parts: return np.empty(0), np.empty((n_curves - 1, 0), np.float32)
+    return np.concatenate(depth_parts), np.ascontiguousarray(np.concatenate(data_parts, axis=1))
+
+def read_las_fast(path, use_cache=True, notes=None):
+    # notes: 리스트를 주면 사용자에게 알릴 사유(캐시 기록 실패 등)를 추가 (GUI exe는 콘솔 없음)
+    cache = las_cache_path(path, ".wlc") if use_cache else None
+    if cache and os.path.exists(cache + ".json"):
+        try:
+            with open(cache + ".json", encoding='utf-8') as fh: meta = json.load(fh)
+            return LasFile(path, meta["header"], [LasCurve(*c) for c in meta["curves"]],
+                           np.load(cache + ".depth.npy"), np.load(cache + ".data.npy", mmap_mode='c')) # copy-on-write: 고친 페이지만 메모리로
+        except (OSError, ValueError, KeyError): pass
+    with open(path, 'rb') as fh:
+        header, curves = read_las_header(fh)
+        ver = header.get('V', {})
+        if not ver.get('VERS', '2.0').startswith(('1', '2')) or ver.get('DLM', 'SPACE').upper() not in ('SPACE', 'TAB'):
+            raise ValueError("Unsupported LAS variant")
+        try: null = float(header.get('W', {}).get('NULL', ''))
+        except ValueError: null = None
+        if len(curves) < 2: raise ValueError("LAS has no curves")
+        depth, data = parse_las_data(fh, len(curves), null)
+    las = LasFile(path, header, curves, depth, data)
+    if cache:
+        # 데이터 → 메타 순서로 기록: 메타가 있으면 사이드카가 완전함
+        try:
+            os.makedirs(LAS_CACHE_DIR, exist_ok=True)
+            np.save(cache + ".depth.npy", depth); np.save(cache + ".data.npy", data)
+            with open(cache + ".json.tmp", 'w', encoding='utf-8') as fh: json.dump({"header": header, "curves": curves}, fh)
+            os.replace(cache + ".json.tmp", cache + ".json")
+        except OSError as e:
+            if notes is not None: notes.append(f"캐시 기록 실패: {e}")
+    return las
+
+def read_las(path, use_cache=True, notes=None):
+    # 빠른 경로가 못 읽는 변형(LAS 3.0, 콤마 구분, 문자열 값 등)은 lasio로 대체 (사유는 notes로)
+    try: return read_las_fast(path, use_cache, notes)
+    except (ValueError, UnicodeError) as e:
+        if notes is not None: notes.append(f"lasio로 읽음 (빠른 리더: {e})")
+        return lasio.read(path)
+
+# -----------------------------------------------------------------
+# Curve Store (float32 컬럼 블록 + 커브별 null/sentinel 정책, in-place)
+# -----------------------------------------------------------------
+NULL_SENTINELS = (-999.25, -9999.25, -999.0, -9999.0)
+# 물리적으로 0 이하가 될 수 없는 커브 (GR, 비저항, 밀도, 음파, 캘리퍼, PEF) → 0 이하도 null
+# SP, NPHI, DRHO, 계산 커브 등은 음수가 정상값이므로 sentinel만 null 처리
+POSITIVE_CURVES = re.compile(r"^(S?GR|CGR|GRC|RT|RD|RS|RM|RXO|ILD|ILM|SFL|LLD|LLS|MSFL|RDEP|RMED|RSHA|RHOB|RHOZ|DEN|DTC?|DTS|CALI?|PEF?)(\b|_|:|$)", re.I)
+STORE_SPARE_ROWS = 8 # 계산 커브 추가용 여유 행
+
+def null_rule(name): return "positive" if POSITIVE_CURVES.match(name) else "sentinel"
+
+class CurveStore:
+    # 커브 컬럼 저장소: float32 (행=커브) 블록 1개 — 각 커브는 연속 행 view로 pyqtgraph/수식 엔진에 그대로 전달
+    def __init__(self, depth, depth_name, names, block):
+        self.depth = np.asarray(depth, dtype=np.float64); self.depth_name = depth_name
+        self.names = list(names); self.rows = {c: i for i, c in enumerate(self.names)}
+        self.block = block; self.rules = {}; self.null_counts = {}
+
+    @classmethod
+    def from_las(cls, las):
+        if isinstance(las, LasFile): # 빠른 리더/사이드카 블록을 그대로 채택 (복사 없음)
+            return cls(las.depth, las.curves[0].mnemonic, [c.mnemonic for c in las.curves[1:]], las.data)
+        data = [np.asarray(c.data, dtype=np.float32) for c in las.curves[1:]] # lasio 대체 경로
+        block = np.vstack(data) if data else np.empty((0, len(las.curves[0].data)), np.float32)
+        return cls(las.curves[0].data, las.curves[0].mnemonic, [c.mnemonic for c in las.curves[1:]], block)
+
+    def __len__(self): return len(self.depth)
+    def __contains__(self, name): return name in self.rows
+    def __getitem__(self, name): return self.block[self.rows[name]]
+    @property
+    def columns(self): return self.names
+    @property
+    def nbytes(self): return self.block[:len(self.names)].nbytes + self.depth.nbytes
+
+    def add(self, name, values):
+        # 같은 이름이면 그 행을 덮어씀, 새 커브는 여유 행에 (부족하면 1.5배로 늘림)
+        if name not in self.rows:
+            if len(self.names) >= self.block.shape[0]:
+                grown = np.empty((max(len(self.names) * 3 // 2, len(self.names) + STORE_SPARE_ROWS), len(self)), np.float32)
+                grown[:len(self.names)] = self.block[:len(self.names)]; self.block = grown
+            self.rows[name] = len(self.names); self.names.append(name)
+        self.block[self.rows[name]] = values
+        self.rules.pop(name, None)
+
+    def apply_null_policy(self, names=None, rules=None):
+        # 커브마다 규칙 1개를 제자리(in-place)에서 적용 — 마스크 버퍼 2개만 재사용, 전체 boolean 프레임/복사 없음
+        names = self.names if names is None else names; rules = rules or {}
+        if not self.block.flags.writeable: self.block = np.array(self.block)
+        mask = np.empty(len(self), dtype=bool); tmp = np.empty(len(self), dtype=bool)
+        for c in names:
+            col = self[c]; rule = rules.get(c) or null_rule(c)
+            if rule == "positive": np.less_equal(col, 0, out=mask)
+            else:
+                mask[:] = False
+                for v in NULL_SENTINELS: np.equal(col, np.float32(v), out=tmp); np.logical_or(mask, tmp, out=mask)
+            np.copyto(col, np.float32(np.nan), where=mask)
+            self.rules[c] = rule; self.null_counts[c] = int(np.count_nonzero(mask)) + self.null_counts.get(c, 0)
+
+    def null_mask(self, name): return np.isnan(self[name])
+
+# -----------------------------------------------------------------
+# Expression Engine (수식 1회 파싱/검증 + 캐시, 청크 단위 멀티스레드 벡터 평가)
+# -----------------------------------------------------------------
+EXPR_FUNCS = {'log': np.log, 'log10': np.log10, 'exp': np.exp, 'sqrt': np.sqrt, 'abs': np.abs,
+              'sin': np.sin, 'cos': np.cos, 'tan': np.tan, 'arctan': np.arctan, 'where': np.where,
+              'clip': np.clip, 'minimum': np.minimum, 'maximum': np.maximum, 'isnan': np.isnan}
+NE_FUNCS = {'log', 'log10', 'exp', 'sqrt', 'abs', 'sin', 'cos', 'tan', 'arctan', 'where'} # numexpr가 지원하는 함수
+EXPR_NODES = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Compare, ast.Call, ast.Name, ast.Load, ast.Constant,
+              ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.Mod, ast.USub, ast.UAdd, ast.Invert, ast.BitAnd, ast.BitOr,
+              ast.Gt, ast.GtE, ast.Lt, ast.LtE, ast.Eq, ast.NotEq)
+EXPR_CHUNK = 1 << 16 # 청크당 샘플 수
+EXPR_THREADS = min(os.cpu_count() or 1, 8)
+_EXPR_POOL = None
+
+def quote_curve(c): return c if c.isidentifier() and c not in EXPR_FUNCS else f"`{c}`"
+
+class Formula:
+    # 예: "(`GR:1` - 20) / (120 - 20)" — 식별자가 아닌 커브명은 백틱으로 감쌈
+    def __init__(self, text):
+        self.text = text; self.inputs = {} # 식별자 -> 커브/파라미터 이름
+        # 백틱 별칭 접두어는 식 안의 맨 이름(예: 커브 `_c0`, `__q0`)과 겹치지 않게 고름
+        bare = set(re.findall(r"[A-Za-z_]\w*", re.sub(r"`[^`]*`", " ", text))); pre = "__q"
+        while any(n.startswith(pre) for n in bare): pre += "_"
+        def alias(mo):
+            for k, v in self.inputs.items():
+                if v == mo.group(1): return k
+            k = f"{pre}{len(self.inputs)}"; self.inputs[k] = mo.group(1); return k
+        self.src = re.sub(r"`([^`]+)`", alias, text).strip()
+        try: tree = ast.parse(self.src, mode='eval')
+        except SyntaxError as e: raise ValueError(f"수식 문법 오류: {e.msg}") from None
+        funcs = set()
+        for node in ast.walk(tree):
+            if not isinstance(node, EXPR_NODES): raise ValueError(f"허용되지 않는 구문: {type(node).__name__}")
+            if isinstance(node, ast.Call):
+                if not isinstance(node.func, ast.Name) or node.func.id not in EXPR_FUNCS or node.keywords:
+                    raise ValueError(f"지원하지 않는 함수: {ast.unparse(node.func)}")
+                funcs.add(node.func.id)
+            elif isinstance(node, ast.Constant) and (isinstance(node.value, bool) or not isinstance(node.value, (int, float))):
+                raise ValueError(f"숫자가 아닌 상수: {node.value!r}")
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Name) and node.id not in funcs: self.inputs.setdefault(node.id, node.id)
+        self.code = compile(tree, "<formula>", "eval")
+        self.use_ne = ne is not None and funcs <= NE_FUNCS
+
+    def evaluate(self, lookup):
+        # lookup(이름) -> ndarray 또는 스칼라, 없으면 KeyError
+        env = {}
+        for k, name in self.inputs.items():
+            try: env[k] = lookup(name)
+            except KeyError: raise ValueError(f"알 수 없는 커브/파라미터: {name}") from None
+        arrays = [v for v in env.values() if isinstance(v, np.ndarray) and v.ndim]
+        n = len(arrays[0]) if arrays else 0
+        if any(len(v) != n for v in arrays): raise ValueError("커브 길이가 서로 다릅니다")
+        if self.use_ne: out = ne.evaluate(self.src, local_dict=env)
+        elif n <= EXPR_CHUNK: out = self.eval_chunk(env, 0, n)
+        else:
+            global _EXPR_POOL
+            if _EXPR_POOL is None: _EXPR_POOL = ThreadPoolExecutor(max_workers=EXPR_THREADS)
+            # numpy ufunc는 GIL을 풀기 때문에 청크를 스레드에 나눠 평가
+            parts = [_EXPR_POOL.submit(self.eval_chunk, env, i, min(i + EXPR_CHUNK, n)) for i in range(0, n, EXPR_CHUNK)]
+            out = np.concatenate([np.broadcast_to(f.result(), (min(EXPR_CHUNK, n - i),)) for i, f in zip(range(0, n, EXPR_CHUNK), parts)])
+        return np.broadcast_to(out, (n,)).copy() if np.ndim(out) == 0 and n else np.asarray(out)
+
+    def eval_chunk(self, env, i0, i1):
+        local = {k: v[i0:i1] if isinstance(v, np.ndarray) and v.ndim else v for k, v in env.items()}
+        with np.errstate(all='ignore'):
+            return eval(self.code, {"__builtins__": {}, **EXPR_FUNCS}, local)
+
+compile_formula = lru_cache(maxsize=256)(Formula) # 같은 수식 문자열은 한 번만 파싱/검증
+
+def archie_formula(phi, rt, a, m, n, rw, phi_percent=False):
+    phi = quote_curve(phi) + ("/100.0" if phi_percent else "")
+    return f"clip((({a}*{rw})/(({phi})**{m}*{quote_curve(rt)}))**(1.0/{n}), 0, 1)"
+
+def run_recipe(steps, df, params=None):
+    # steps: [(결과 커브명, 수식), ...] 순서대로 — 앞 단계 결과/파라미터(스칼라)를 뒤 단계에서 사용 가능
+    out = {}; params = params or {}
+    def lookup(name):
+        if name in out: return out[name]
+        if name in params: return params[name]
+        return np.asarray(df[name])
+    for name, text in steps:
+        v = compile_formula(text).evaluate(lookup)
+        out[name] = np.full(len(df), float(v)) if np.ndim(v) == 0 else v # 상수 수식은 커브 길이로 확장
+    return out
+
+def run_recipe_wells(wells, steps, params=None):
+    # 웰마다 스레드 1개 → {웰: 결과 dict 또는 예외}
+    with ThreadPoolExecutor(max_workers=max(1, min(len(wells), EXPR_THREADS))) as ex:
+        futs = {w: ex.submit(run_recipe, steps, w.store, params) for w in wells}
+    res = {}
+    for w, f in futs.items():
+        try: res[w] = f.result()
+        except Exception as e: res[w] = e
+    return res
+
+# -----------------------------------------------------------------
+# Batch Petrophysics (헤드리스: LAS 폴더 + 파라미터 파일 → VSH / PHIE / SW)
+# -----------------------------------------------------------------
+PETRO_DEFAULTS = {
+    "aliases": {"GR": ["GR", "GRC", "SGR", "CGR"], "RT": ["RT", "ILD", "RD", "LLD", "RDEP"],
+                "PHI": ["NPHI", "PHIT", "PHIN"], "RHOB": ["RHOB", "RHOZ", "DEN"]},
+    "vsh": {"gr_clean": 20.0, "gr_shale": 130.0},
+    "porosity": {"method": "neutron", "percent": False, "rho_ma": 2.65, "rho_fl": 1.0, "shale_correct": True},
+    "archie": {"a": 1.0, "m": 2.0, "n": 2.0, "rw": 0.1},
+    "zones": [], # [{"name": "A", "top": 1000, "base": 1200, "a": 1, "m": 2, "n": 2, "rw": 0.05}, ...]
+}
+
+def load_petro_params(path):
+    with open(path, encoding='utf-8') as fh: user = json.load(fh)
+    params = {k: (dict(v) if isinstance(v, dict) else list(v)) for k, v in PETRO_DEFAULTS.items()}
+    for k, v in user.items():
+        if isinstance(params.get(k), dict) and isinstance(v, dict): params[k].update(v)
+        else: params[k] = v
+    return params
+
+def resolve_aliases(columns, aliases):
+    # 역할(GR/RT/PHI/RHOB) -> 이 웰에서 처음 일치하는 커브명 (대소문자 무시)
+    upper = {c.upper(): c for c in columns}
+    return {role: next((upper[a.upper()] for a in names if a.upper() in upper), None) for role, names in aliases.items()}
+
+def petro_steps(curves, params):
+    gr, rt, phi, rhob = (curves.get(k) for k in ("GR", "RT", "PHI", "RHOB"))
+    por = params["porosity"]; steps = []
+    if gr:
+        gc, gs = float(params["vsh"]["gr_clean"]), float(params["vsh"]["gr_shale"])
+        steps.append(("VSH", f"clip(({quote_curve(gr)} - {gc}) / ({gs - gc}), 0, 1)"))
+    if por["method"] == "density":
+        if not rhob: raise ValueError("RHOB curve not found")
+        ma, fl = float(por["rho_ma"]), float(por["rho_fl"])
+        total = f"({ma} - {quote_curve(rhob)}) / ({ma - fl})"
+    else:
+        if not phi: raise ValueError("PHI curve not found")
+        total = quote_curve(phi) + ("/100.0" if por.get("percent") else "")
+    steps.append(("PHIE", f"clip(({total}) * (1 - VSH), 0, 1)" if gr and por.get("shale_correct", True) else f"clip({total}, 0, 1)"))
+    if not rt: raise ValueError("RT curve not found")
+    steps.append(("SW", archie_formula("PHIE", rt, "a", "m", "n", "rw")))
+    return steps
+
+def zone_params(depth, zones, default):
+    # 깊이별 Archie 계수 배열: 구간(top <= d < base) 안은 구간 값, 밖은 기본값
+    out = {k: np.full(len(depth), float(default[k])) for k in ("a", "m", "n", "rw")}
+    for z in zones:
+        sel = (depth >= float(z["top"])) & (depth < float(z["base"]))
+        for k in out:
+            if k in z: out[k][sel] = float(z[k])
+    return out
+
+def write_petro(path, las, store, res, fmt):
+    if fmt == "npz":
+        np.savez(path, **{store.depth_name or "DEPTH": store.depth}, **{k: v.astype(np.float32) for k, v in res.items()})
+        return
+    out = lasio.LASFile()
+    for k, v in getattr(las, "well", {}).items():
+        v = getattr(v, "value", v)
+        if k in out.well: out.well[k].value = v
+        else: out.well.append(lasio.HeaderItem(k, value=v))
+    meta = {c.mnemonic: (c.unit, c.descr) for c in las.curves} # 원본 단위/설명 유지 (lasio CurveItem, LasCurve 공통)
+    # 중복 커브의 "GR:1" 식 이름은 읽을 때 붙인 것 → LAS에서 ':'는 설명 구분자라 원래 mnemonic으로 기록 (lasio가 다시 구분)
+    dn = store.depth_name or "DEPT"; du, dd = meta.get(dn, ("", ""))
+    out.append_curve(dn.split(":")[0], store.depth, unit=du, descr=dd)
+    for c in store.columns: u, d = meta.get(c, ("", "")); out.append_curve(c.split(":")[0], store[c], unit=u, descr=d)
+    for k, v in res.items(): out.append_curve(k, v, descr="woolog batch")
+    out.write(path, version=2.0)
+
+def process_well(path, params, out_dir, fmt="npz"):
+    # 워커 프로세스: 웰 1개 읽기 → 수식 레시피 평가(청크 벡터 연산) → 결과 기록, 반환: 샘플 수
+    las = read_las(path, use_cache=False)
+    store = CurveStore.from_las(las); store.apply_null_policy()
+    steps = petro_steps(resolve_aliases(store.columns, params["aliases"]), params)
+    res = run_recipe(steps, store, zone_params(store.depth, params.get("zones", []), params["archie"]))
+    stem = os.path.splitext(os.path.basename(path))[0]
+    write_petro(os.path.join(out_dir, f"{stem}_petro.{fmt}"), las, store, res, fmt)
+    return len(store)
+
+def batch_main(argv):
+    ap = argparse.ArgumentParser(prog="woolog.py batch", description="LAS 폴더 일괄 VSH / PHIE / SW 계산")
+    ap.add_argument("las_dir"); ap.add_argument("params", help="JSON: aliases, vsh, porosity, archie, zones")
+    ap.add_argument("-o", "--out", help="출력 폴더 (기본: <las_dir>/petro_out)")
+    ap.add_argument("-f", "--format", choices=("npz", "las"), default="npz")
+    ap.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1)
+    args = ap.parse_args(argv)
+    files = sorted(p for p in glob.glob(os.path.join(args.las_dir, "*")) if p.lower().endswith(".las"))
+    if not files: print(f"No LAS files in {args.las_dir}"); return 1
+    params = load_petro_params(args.params)
+    for _, f in petro_steps({"GR": "GR", "RT": "RT", "PHI": "PHI", "RHOB": "RHOB"}, params): compile_formula(f) # 파라미터 오류는 시작 전에
+    out_dir = args.out or os.path.join(args.las_dir, "petro_out"); os.makedirs(out_dir, exist_ok=True)
+    t0 = time.perf_counter(); n_ok = n_samples = 0; failed = []
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as ex:
+        futs = {ex.submit(process_well, p, params, out_dir, args.format): p for p in files}
+        for i, fut in enumerate(as_completed(futs), 1):
+            name = os.path.basename(futs[fut])
+            try: n_samples += fut.result(); n_ok += 1
+            except Exception as e: failed.append(name); print(f"[{i}/{len(files)}] {name}: FAILED {e}")
+    dt = time.perf_counter() - t0
+    print(f"{n_ok}/{len(files)} wells, {n_samples:,} samples in {dt:.1f}s ({n_ok / max(dt, 1e-9):.1f} wells/s) → {out_dir}")
+    return 0 if not failed else 2
+
+def prepare_las(path):
+    # 워커 프로세스: 파싱 + 사이드카 기록까지 → 사이드카가 준비되면 큰 배열은 돌려보내지 않음 (메인은 memmap으로 열기)
+    # 반환: (las 또는 None, 알림 사유 목록)
+    notes = []; las = read_las(path, notes=notes)
+    if isinstance(las, LasFile) and os.path.exists(las_cache_path(path, ".wlc") + ".json"): return None, notes
+    return las, notes
+
+def las_well_name(las, path):
+    try: w = las.well["WELL"]; name = str(getattr(w, "value", w)).strip()
+    except (KeyError, TypeError): name = ""
+    return name or os.path.splitext(os.path.basename(path))[0]
+
+# -----------------------------------------------------------------
+# Well (웰 1개: 커브 데이터 + 깊이 인덱스 + LOD/hover 캐시)
+# -----------------------------------------------------------------
+class WellData:
+    _revs = iter(range(1, 1 << 62))
+
+    def __init__(self, path, las):
+        self.path = path; self.las = las; self.name = las_well_name(las, path)
+        # [수정] 0 이하 일괄 NaN 대신 커브별 null 정책 (SP 등 음수 정상값 보존, 왼쪽 수직선 제거는 유지)
+        self.store = CurveStore.from_las(las); self.store.apply_null_policy()
+        self.curve_names = self.store.columns
+        self.rev = next(WellData._revs); self.curve_rev = {} # 커브 재계산 시 증가 → 해당 커브만 setData
+        self.tops = {}; self.tops_rev = 0; self.tops_arr = np.empty(0) # 이름 -> 깊이, 오버레이용 깊이 배열
+        self.curve_lods = {} # 커브명 -> (rev, CurveLOD), 트랙 간 공유
+        self.hover_rev = 0
+        self.build_depth_index()
+
+    def build_depth_index(self):
+        # Hover 조회용: 오름차순 깊이 배열 (역순/비정렬 로그는 행 순서 배열 추가)
+        d = self.store.depth
+        if np.all(np.diff(d) >= 0): self.depth_arr = np.ascontiguousarray(d); self.depth_rows = None
+        else: self.depth_rows = np.argsort(d, kind='stable'); self.depth_arr = np.ascontiguousarray(d[self.depth_rows])
+
+    def add_curve(self, n, d):
+        block = self.store.block; self.store.add(n, np.asarray(d, dtype=np.float32))
+        if self.store.block is not block: self.curve_lods.clear() # 블록이 새로 할당됨 → 옛 블록 view를 놓아줌
+        self.curve_rev[n] = self.curve_rev.get(n, 0) + 1; self.hover_rev += 1
+
+    def curve_lod(self, c):
+        rev = self.curve_rev.get(c, 0); hit = self.curve_lods.get(c)
+        if hit is None or hit[0] != rev:
+            v = self.store[c] # float32 행 view 그대로 (복사 없음)
+            if self.depth_rows is not None: v = v[self.depth_rows]
+            hit = self.curve_lods[c] = (rev, CurveLOD(self.depth_arr, v))
+        return hit[1]
+
+    def set_top(self, name, d, old=None):
+        # old: 이름 변경 시 이전 이름 (dict 순서 유지)
+        if old is not None and old != name: self.tops = {(name if k == old else k): v for k, v in self.tops.items()}
+        self.tops[name] = float(d); self.touch_tops()
+
+    def drop_tops(self, names):
+        for n in names: self.tops.pop(n, None)
+        self.touch_tops()
+
+    def touch_tops(self):
+        self.tops_rev += 1; self.tops_arr = np.fromiter(self.tops.values(), dtype=float, count=len(self.tops))
+
+    def hover_values(self):
+        # (커브 x 샘플) 블록 자체가 값 행렬 → 열 1개 fancy index로 트랙의 모든 커브 값 조회
+        return self.store.block
+
+TOOLTIP_HEAD = "<div style='background-color:rgba(0,0,0,0.7); padding:3px;'><span style='color: white; font-weight: bold;'>Depth: {:.2f}</span><br>"
+
+def nearest_index(depths, d):
+    # depths: 오름차순 연속 배열 → 가장 가까운 샘플 위치 (이진 탐색)
+    i = int(np.searchsorted(depths, d))
+    if i <= 0: return 0
+    if i >= len(depths): return len(depths) - 1
+    return i - 1 if d - depths[i - 1] <= depths[i] - d else i
+
+# -----------------------------------------------------------------
+# Level of Detail (깊이 방향 min/max 피라미드)
+# -----------------------------------------------------------------
+LOD_MIN_PIXELS = 400 # 뷰 높이를 아직 모를 때 쓰는 최소 해상도
+LOD_TOP_SIZE = 64 # 피라미드 최상위 레벨 블록 수
+
+class CurveLOD:
+    # level k = 2^k 샘플 블록의 (min, max) → 화면에 보이는 구간만 픽셀 해상도로 꺼냄
+    # (pyqtgraph 내장 downsampling/clipToView는 x축 정렬 데이터 기준이라 세로 로그에는 못 씀)
+    def __init__(self, depths, values):
+        self.depths = depths; self.values = values
+        lo = hi = values; self.levels = [(lo, hi)]
+        with np.errstate(invalid='ignore'):
+            while len(lo) > LOD_TOP_SIZE:
+                if len(lo) % 2: lo = np.append(lo, np.nan); hi = np.append(hi, np.nan)
+                lo = np.fmin(lo[0::2], lo[1::2]); hi = np.fmax(hi[0::2], hi[1::2]) # NaN 구간은 무시
+                self.levels.append((lo, hi))
+
+    def window(self, d0, d1, px):
+        # 반환: (values, depths) — 블록마다 min/max를 번갈아 놓아 envelope가 그대로 보이게 함
+        n = len(self.depths)
+        i0 = max(int(np.searchsorted(self.depths, d0)) - 1, 0)
+        i1 = min(int(np.searchsorted(self.depths, d1, 'right')) + 1, n)
+        L = 0
+        while L + 1 < len(self.levels) and ((i1 - i0) >> L) > px: L += 1
+        if L == 0: return self.values[i0:i1], self.depths[i0:i1]
+        b0 = i0 >> L; b1 = ((i1 - 1) >> L) + 1
+        lo, hi = self.levels[L]
+        x = np.empty(2 * (b1 - b0), dtype=lo.dtype); x[0::2] = lo[b0:b1]; x[1::2] = hi[b0:b1]
+        return x, np.repeat(self.depths[b0 << L:b1 << L:1 << L], 2)
+
+# -----------------------------------------------------------------
+# Retained Track (트랙별 그래픽 아이템 유지, 변경분만 반영)
+# -----------------------------------------------------------------
+class TopsOverlay(pg.GraphicsObject):
+    # 트랙 1개의 Well Top 전체를 QPainterPath 1개로 그림 (top마다 InfiniteLine 생성 없음)
+    # 가로선은 현재 보이는 x 구간 폭으로 → x 범위/로그 모드가 바뀌면 path만 다시 만듦
+    def __init__(self, pen='r'):
+        super().__init__()
+        self.pen = pg.mkPen(pen); self.pen.setCosmetic(True)
+        self.depths = np.empty(0); self.path = None; self.path_x = None
+        self.setZValue(50)
+
+    def set_depths(self, depths):
+        self.depths = depths; self.path = None
+        self.prepareGeometryChange(); self.update()
+
+    def viewTransformChanged(self):
+        self.prepareGeometryChange() # path는 x 구간이 바뀐 경우에만 paint에서 다시 만듦
+
+    def boundingRect(self):
+        vr = self.viewRect()
+        if vr is None or not len(self.depths): return QRectF()
+        y0, y1 = float(self.depths.min()), float(self.depths.max())
+        pad = 2 * (self.pixelHeight() or 0) # 선 두께만큼 위아래 여유
+        return QRectF(vr.left(), y0 - pad, vr.width(), y1 - y0 + 2 * pad)
+
+    def paint(self, p, *args):
+        vr = self.viewRect()
+        if vr is None or not len(self.depths): return
+        x = (vr.left(), vr.right())
+        if self.path is None or self.path_x != x:
+            path = QPainterPath()
+            for d in self.depths: path.moveTo(x[0], d); path.lineTo(x[1], d)
+            self.path = path; self.path_x = x
+        p.setPen(self.pen); p.drawPath(self.path)
+
+class TrackView:
+    def __init__(self, name, lod):
+        self.name = name; self.lod = lod # lod(커브명) -> CurveLOD
+        self.p1 = p1 = pg.PlotItem()
+        p1.showAxis('top', True); p1.showAxis('bottom', False)
+        p1.setLabel('top', name); p1.invertY(True)
+        p1.showGrid(x=True, y=True, alpha=0.3)
+
+        v_line = pg.InfiniteLine(angle=90, movable=False, pen=pg.mkPen('w', width=1, style=Qt.DashLine))
+        h_line = pg.InfiniteLine(angle=0, movable=False, pen=pg.mkPen('w', width=1, style=Qt.DashLine))
+        label_item = pg.TextItem(anchor=(0, 1)); label_item.setZValue(100)
+        p1.addItem(v_line); p1.addItem(h_line); p1.addItem(label_item)
+        v_line.hide(); h_line.hide(); label_item.hide()
+        p1.crosshairs = (v_line, h_line, label_item)
+
+        self.v2 = None # Scale 2 ViewBox (필요할 때 1번만 생성)
+        self.items = {} # 커브명 -> 그래픽 아이템
+        self.state = {} # 커브명 -> (color, axis, data_rev)
+        self.lead = False; self.r1 = None; self.r2 = None; self.depth_rev = None
+        self.fill_state = None; self.fill_item = None; self.fill_base = None
+        self.tops_state = None; self.tops_item = TopsOverlay(); p1.addItem(self.tops_item, ignoreBounds=True)
+        self.hover = None # (hover_rev, 툴팁 템플릿, 값 블록 행 인덱스)
+        self.lod_win = None # (픽셀 수, 로드된 깊이 구간 상/하단, 그때의 뷰 높이)
+        p1.vb.sigYRangeChanged.connect(self.refresh_lod); p1.vb.sigResized.connect(self.refresh_lod)
+
+    def reset(self, name, lod):
+        # 풀에서 꺼낸 트랙 재사용: PlotItem / Scale 2 ViewBox / 시그널 연결은 그대로 두고 이름과 데이터만 교체
+        self.name = name; self.lod = lod
+        self.p1.setLabel('top', name)
+        if self.v2 is not None: self.p1.getAxis('bottom').setLabel(f"{name} (Scale 2)")
+
+    def attach(self):
+        # 레이아웃에 (다시) 들어간 뒤 호출 → 씬에서 빠졌던 Scale 2 ViewBox를 같은 씬에 붙이고 위치 맞춤
+        if self.v2 is None or self.p1.scene() is None: return
+        if self.v2.scene() is not self.p1.scene(): self.p1.scene().addItem(self.v2)
+        self.update_v2_geometry()
+
+    def clear(self):
+        # 풀로 반납: 커브/채우기/top/캐시 상태만 비움 (웰 데이터 참조도 놓아줌)
+        for c in list(self.items): self.drop_curve(c)
+        self.apply_fill({"en": False}, {})
+        self.tops_item.set_depths(np.empty(0)); self.tops_state = None
+        for it in self.p1.crosshairs: it.hide()
+        if self.lead is not None: self.p1.setYLink(None)
+        self.lead = False; self.r1 = None; self.r2 = None; self.depth_rev = None
+        self.fill_state = None; self.hover = None; self.lod_win = None; self.lod = None
+        if self.v2 is not None:
+            self.v2.hide()
+            if self.v2.scene(): self.v2.scene().removeItem(self.v2)
+
+    def set_lead(self, first):
+        # first=None 이면 이 트랙이 Depth 축을 가진 기준 트랙
+        if self.lead is first: return
+        self.lead = first
+        if first is None: self.p1.setYLink(None); self.p1.showAxis('left', True); self.p1.setLabel('left', 'Depth')
+        else: self.p1.setYLink(first.p1); self.p1.showAxis('left', False)
+
+    def ensure_v2(self):
+        if self.v2 is not None: return self.v2
+        p1 = self.p1; self.v2 = v2 = pg.ViewBox()
+        p1.scene().addItem(v2)
+        p1.getAxis('bottom').linkToView(v2); p1.getAxis('bottom').setLabel(f"{self.name} (Scale 2)")
+        v2.setYLink(p1) # Y축만 링크
+        p1.vb.sigResized.connect(self.update_v2_geometry)
+        self.update_v2_geometry()
+        return v2
+
+    def update_v2_geometry(self):
+        if self.v2 is None: return
+        self.v2.setGeometry(self.p1.vb.sceneBoundingRect())
+        self.v2.setYRange(*self.p1.vb.viewRange()[1], padding=0)
+
+    def sync(self, data, store, depths, data_rev, tops):
+        # tops: (tops_rev, 깊이 배열)
+        p1 = self.p1
+        if self.depth_rev != data_rev[0]:
+            # 깊이 범위는 새 데이터일 때 기준 트랙만 맞춤 (나머지는 Y 링크) → 색 변경 등으로 줌이 풀리지 않음
+            if self.lead is None: p1.setYRange(np.nanmin(depths), np.nanmax(depths))
+            self.depth_rev = data_rev[0]
+
+        r1 = tuple(data["r1"].values())
+        if r1 != self.r1:
+            self.r1 = r1
+            try: p1.setXRange(data["r1"]["min"], data["r1"]["max"]); p1.setLogMode(data["r1"]["log"], False)
+            except: pass
+
+        # 커브: 없어진 것 제거 → 축이 바뀐 것 재생성 → 색/데이터만 바뀐 것은 in-place 갱신
+        want = {c: p for c, p in data["curves"].items() if c in store}
+        changed = False; stale = []
+        for c in [c for c in self.items if c not in want or self.state[c][1] != want[c].get("axis", 1)]:
+            self.drop_curve(c); changed = True
+        for c, p in want.items():
+            ax = p.get("axis", 1); rev = data_rev[1].get(c, 0)
+            new = (p["color"], ax, (data_rev[0], rev))
+            old = self.state.get(c)
+            if old == new: continue
+            changed = True
+            pen = pg.mkPen(p["color"], width=2, style=Qt.DashLine if ax == 2 else Qt.SolidLine)
+            if old is None:
+                if ax == 1: self.items[c] = p1.plot(pen=pen)
+                else:
+                    item = pg.PlotCurveItem(pen=pen)
+                    self.ensure_v2().addItem(item); self.items[c] = item
+                stale.append(c)
+            else:
+                if old[0] != new[0]: self.items[c].setPen(pen)
+                if old[2] != new[2]: stale.append(c)
+            self.state[c] = new
+        if stale: self.refresh_lod(curves=stale)
+
+        if changed: self.hover = None
+        has2 = any(p.get("axis", 1) == 2 for p in want.values())
+        if has2 != p1.getAxis('bottom').isVisible(): p1.showAxis('bottom', has2)
+        if has2:
+            r2 = tuple(data["r2"].values())
+            if r2 != self.r2:
+                self.r2 = r2
+                try: self.v2.setXRange(data["r2"]["min"], data["r2"]["max"])
+                except: pass
+        if self.v2 is not None: self.v2.setVisible(has2)
+
+        fill = (tuple(data["fill"].values()), tuple(self.state.items()))
+        if changed or fill != self.fill_state: self.fill_state = fill; self.apply_fill(data["fill"], want)
+
+        self.sync_tops(tops)
+
+    def sync_tops(self, tops):
+        if tops[0] != self.tops_state: self.tops_state = tops[0]; self.tops_item.set_depths(tops[1])
+
+    def refresh_lod(self, *args, curves=None):
+        # 뷰 높이의 2배 구간을 미리 로드 → 작은 팬은 재계산 없음, 확대/구간 이탈 시에만 세밀한 레벨로 교체
+        if not self.items: return
+        (y0, y1) = self.p1.vb.viewRange()[1]; h = max(y1 - y0, 1e-9)
+        px = max(int(self.p1.vb.height()), LOD_MIN_PIXELS)
+        w = self.lod_win
+        if curves is None:
+            if w is not None and w[0] == px and w[1] <= y0 and y1 <= w[2] and h > 0.6 * w[3]: return
+            curves = list(self.items); w = None
+        if w is None: w = self.lod_win = (px, y0 - h / 2, y1 + h / 2, h)
+        for c in curves:
+            x, y = self.lod(c).window(w[1], w[2], 2 * w[0])
+            self.items[c].setData(x, y)
+
+    def drop_curve(self, c):
+        item = self.items.pop(c); ax = self.state.pop(c)[1]
+        if item is self.fill_base: self.fill_base = None
+        (self.p1 if ax == 1 else self.v2).removeItem(item)
+
+    def apply_fill(self, fs, want):
+        if self.fill_item is not None: self.p1.removeItem(self.fill_item); self.fill_item = None
+        if self.fill_base is not None: self.fill_base.setFillLevel(None); self.fill_base.setFillBrush(None); self.fill_base = None
+        curves1 = [c for c, p in want.items() if p.get("axis", 1) == 1]
+        if not fs["en"] or not curves1: return
+        try:
+            c1 = curves1[0]; i1 = self.items.get(c1); b = pg.mkBrush(fs["col"])
+            if fs["type"] == "Baseline": i1.setFillLevel(fs["lev"]); i1.setFillBrush(b); self.fill_base = i1
+            elif fs["type"] == "Curve-Curve":
+                tgt = fs["tgt"]; i2 = self.items.get(tgt)
+                if i2 is not None and c1 != tgt and self.state[tgt][1] == 1:
+                    self.fill_item = pg.FillBetweenItem(i1, i2, brush=b); self.p1.addItem(self.fill_item)
+        except: pass
+
+    def dispose(self):
+        for sig in (self.p1.vb.sigYRangeChanged, self.p1.vb.sigResized):
+            try: sig.disconnect(self.refresh_lod)
+            except (RuntimeError, TypeError): pass
+        if self.v2 is not None:
+            try: self.p1.vb.sigResized.disconnect(self.update_v2_geometry)
+            except (RuntimeError, TypeError): pass
+            if self.v2.scene(): self.v2.scene().removeItem(self.v2)
+            self.v2 = None
+
+TRACK_POOL_MAX = 64 # 반납된 트랙 보관 상한 (넘치는 것만 실제 dispose)
+
+class TrackPool:
+    # 삭제된 트랙(웰 닫기 포함)의 PlotItem + Scale 2 ViewBox + geometry/축 링크를 보관했다가 새 트랙에 재사용
+    # → 트랙 추가/삭제를 반복해도 ViewBox 생성과 sigResized 연결이 늘지 않음
+    def __init__(self, size=TRACK_POOL_MAX):
+        self.size = size; self.free = []
+
+    def acquire(self, name, lod):
+        if not self.free: return TrackView(name, lod)
+        view = self.free.pop(); view.reset(name, lod)
+        return view
+
+    def release(self, view):
+        view.clear()
+        if len(self.free) < self.size: self.free.append(view)
+        else: view.dispose()
+
+    def dispose(self):
+        for view in self.free: view.dispose()
+        self.free.clear()
+
+class WellPanel:
+    # 웰 1개의 트랙 열 (제목 + 트랙들) — 모든 웰이 같은 tracks_model 템플릿을 공유
+    def __init__(self, well, pool):
+        self.well = well; self.pool = pool
+        self.layout = pg.GraphicsLayout()
+        self.title = self.layout.addLabel(well.name, row=0, col=0, color='w', bold=True)
+        self.tracks = self.layout.addLayout(row=1, col=0)
+        self.track_views = {}; self.plot_tracks = {}
+
+    def sync(self, tracks_model):
+        # [핵심] tracks_model과 살아있는 TrackView를 비교해서 생성/갱신/삭제만 수행 (전체 clear 없음)
+        well = self.well
+        for name in [n for n in self.track_views if n not in tracks_model]:
+            view = self.track_views.pop(name); self.tracks.removeItem(view.p1); self.pool.release(view)
+        rev = (well.rev, well.curve_rev)
+        first = None
+        for c_idx, name in enumerate(tracks_model):
+            view = self.track_views.get(name)
+            if view is None:
+                view = self.track_views[name] = self.pool.acquire(name, well.curve_lod)
+                self.tracks.addItem(view.p1, row=0, col=c_idx); view.attach()
+            elif self.tracks.items.get(view.p1) != [(0, c_idx)]:
+                # 앞쪽 트랙이 삭제된 경우 열 위치만 당김
+                self.tracks.removeItem(view.p1); self.tracks.addItem(view.p1, row=0, col=c_idx)
+            view.set_lead(first)
+            view.sync(tracks_model[name], well.store, well.depth_arr, rev, (well.tops_rev, well.tops_arr))
+            if first is None: first = view
+        self.plot_tracks = {n: self.track_views[n].p1 for n in tracks_model}
+
+    def sync_tops(self):
+        # top 추가/이동/삭제: 트랙 재구성 없이 오버레이 path만 교체
+        tops = (self.well.tops_rev, self.well.tops_arr)
+        for view in self.track_views.values(): view.sync_tops(tops)
+
+    def dispose(self):
+        # 레이아웃이 아직 씬에 있을 때 호출 (트랙을 빼서 풀로 반납)
+        for view in self.track_views.values(): self.tracks.removeItem(view.p1); self.pool.release(view)
+        self.track_views.clear(); self.plot_tracks.clear()
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -52,15 +821,18 @@ class MainWindow(QMainWindow):
         self.main_splitter.setSizes([450, 950]) 
         
         # --- 데이터 ---
-        self.las_data = None
-        self.data_df = None 
+        self.wells = [] # WellData 목록 (화면 왼쪽부터 순서대로)
         self.all_curve_names = [] 
-        self.tracks_model = {} 
-        self.plot_tracks = {} 
-        self.well_tops = {} 
+        self.tracks_model = {} # 모든 웰이 공유하는 트랙 템플릿
         
-        # [중요] Scale 2 ViewBox들을 추적하여 삭제하기 위한 리스트
-        self.secondary_views = [] 
+        # [중요] 웰별 트랙 그래픽은 WellPanel/TrackView로 유지하고 update_plots에서 변경분만 반영
+        self.panels = {} # WellData -> WellPanel
+        self.hover_track = None # (WellPanel, 트랙명)
+        self.track_pool = TrackPool() # 웰/트랙 간 공유하는 트랙 재사용 풀
+
+        # 여러 LAS 동시 로드: 파싱은 워커 프로세스, 결과는 타이머로 수거 (Qt 스레드 비차단)
+        self.load_pool = None; self.pending_loads = []; self.load_notes = []
+        self.load_timer = QTimer(self); self.load_timer.setInterval(100); self.load_timer.timeout.connect(self.poll_loads)
 
         # --- 마우스 이벤트 ---
         self.mouse_proxy_move = pg.SignalProxy(
@@ -81,7 +853,15 @@ class MainWindow(QMainWindow):
         content = QWidget(); self.tracks_layout = QVBoxLayout(content)
 
         self.load_btn = QPushButton("1. LAS 파일 열기"); self.load_btn.clicked.connect(self.load_las_file)
-        self.tracks_layout.addWidget(self.load_btn); self.tracks_layout.addWidget(self.create_separator())
+        self.tracks_layout.addWidget(self.load_btn)
+        ly_wells = QHBoxLayout()
+        btn_add_wells = QPushButton("[+] 웰 추가 (여러 LAS)"); btn_add_wells.clicked.connect(self.add_las_files)
+        btn_del_well = QPushButton("[-] 웰 닫기"); btn_del_well.clicked.connect(self.on_close_well)
+        ly_wells.addWidget(btn_add_wells); ly_wells.addWidget(btn_del_well); self.tracks_layout.addLayout(ly_wells)
+        ly_active = QHBoxLayout(); ly_active.addWidget(QLabel("Active Well:"))
+        self.cmb_well = QComboBox(); self.cmb_well.currentIndexChanged.connect(self.on_active_well_changed)
+        ly_active.addWidget(self.cmb_well, 1); self.lbl_load = QLabel(""); ly_active.addWidget(self.lbl_load)
+        self.tracks_layout.addLayout(ly_active); self.tracks_layout.addWidget(self.create_separator())
 
         grp_track = QGroupBox("2. 트랙 관리")
         ly_track = QVBoxLayout(grp_track)
@@ -160,7 +940,9 @@ class MainWindow(QMainWindow):
     def setup_top_tab_layout(self):
         ly = QVBoxLayout(self.top_tab); ly.addWidget(QLabel("Well Top 목록"))
         self.tree_tops = QTreeWidget(); self.tree_tops.setColumnCount(2); self.tree_tops.setHeaderLabels(["Name", "Depth"])
+        self.tree_tops.setSelectionMode(QAbstractItemView.ExtendedSelection)
         self.tree_tops.itemChanged.connect(self.on_top_changed)
+        self.top_items = {}; self.top_tree_well = None # 목록에 표시 중인 웰의 top 이름 -> 항목
         ly.addWidget(self.tree_tops)
         btn_del = QPushButton("선택 삭제"); btn_del.clicked.connect(self.del_top); ly.addWidget(btn_del)
 
@@ -179,7 +961,16 @@ class MainWindow(QMainWindow):
         f_g.addRow("Name:", self.txt_new_name); f_g.addRow("Formula:", self.txt_formula)
         btn_g = QPushButton("Run Formula"); btn_g.clicked.connect(self.run_general_calc)
         ly_gen.addLayout(f_g); ly_gen.addWidget(btn_g)
-        ly.addWidget(grp_archie); ly.addWidget(grp_gen); ly.addStretch(); scroll.setWidget(content)
+
+        grp_rec = QGroupBox("Recipe (수식 묶음 → 전체 웰)"); ly_rec = QVBoxLayout(grp_rec)
+        self.list_recipe = QListWidget(); ly_rec.addWidget(self.list_recipe)
+        l_r1 = QHBoxLayout(); l_r2 = QHBoxLayout()
+        for lay, txt, fn in [(l_r1, "+ 수식", self.on_recipe_add_formula), (l_r1, "+ Archie", self.on_recipe_add_archie), (l_r1, "삭제", self.on_recipe_del),
+                             (l_r2, "저장", self.on_recipe_save), (l_r2, "불러오기", self.on_recipe_load), (l_r2, "전체 웰 실행", self.run_recipe_all_wells)]:
+            b = QPushButton(txt); b.clicked.connect(fn); lay.addWidget(b)
+        ly_rec.addLayout(l_r1); ly_rec.addLayout(l_r2)
+        self.recipe_steps = []
+        ly.addWidget(grp_archie); ly.addWidget(grp_gen); ly.addWidget(grp_rec); ly.addStretch(); scroll.setWidget(content)
         self.calc_tab.setLayout(QVBoxLayout()); self.calc_tab.layout().addWidget(scroll)
 
     def create_separator(self):
@@ -188,31 +979,86 @@ class MainWindow(QMainWindow):
     # -----------------------------------------------------------------
     # Logic
     # -----------------------------------------------------------------
+    @property
+    def well(self):
+        # 계산 탭/커브 목록이 대상으로 하는 활성 웰
+        i = self.cmb_well.currentIndex()
+        return self.wells[i] if 0 <= i < len(self.wells) else None
+
+    @property
+    def data_store(self): return self.well.store if self.well else None
+
+    @property
+    def well_tops(self): return self.well.tops if self.well else {}
+
+    def on_active_well_changed(self, _):
+        self.refresh_ui_lists(); self.refresh_top_tree()
+
     def load_las_file(self):
         path, _ = QFileDialog.getOpenFileName(self, "Open LAS", "", "LAS Files (*.las)")
         if not path: return
-        try:
-            las = lasio.read(path)
-            self.las_data = las
-            self.data_df = las.df().reset_index().set_index(las.curves[0].mnemonic)
-            
-            # [수정] 0 이하의 값 NaN 처리 (왼쪽 수직선 제거)
-            self.data_df[self.data_df <= 0] = np.nan
-
-            self.all_curve_names = [c for c in self.data_df.columns if c != las.curves[0].mnemonic]
-            self.tracks_model.clear(); self.well_tops.clear(); self.track_list.clear(); self.grp_settings.setEnabled(False)
-            self.list_assigned.clear(); self.refresh_ui_lists()
-        except Exception as e: QMessageBox.critical(self, "오류", str(e))
+        # 새 세션: 기존 웰/트랙 템플릿을 모두 비우고 1개 웰로 시작
+        for w in list(self.wells): self.remove_well(w)
+        self.track_list.clear(); self.tracks_model.clear(); self.grp_settings.setEnabled(False); self.list_assigned.clear()
+        self.start_loads([path])
+
+    def add_las_files(self):
+        paths, _ = QFileDialog.getOpenFileNames(self, "Add Wells (LAS)", "", "LAS Files (*.las)")
+        if paths: self.start_loads(paths)
+
+    def start_loads(self, paths):
+        if self.load_pool is None: self.load_pool = ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, 8)) # 이후 추가 로드도 같은 풀 → 첫 호출 개수로 정하지 않음
+        for p in paths: self.pending_loads.append((p, self.load_pool.submit(prepare_las, p)))
+        self.lbl_load.setText(f"로딩 중... {len(self.pending_loads)}"); self.load_timer.start()
+
+    def poll_loads(self):
+        done = [(p, f) for p, f in self.pending_loads if f.done()]
+        if not done: return
+        self.pending_loads = [x for x in self.pending_loads if not x[1].done()]
+        errors = []
+        for path, fut in done:
+            try:
+                las, notes = fut.result()
+                self.load_notes += [f"{os.path.basename(path)}: {n}" for n in notes]
+                self.wells.append(WellData(path, las if las is not None else read_las_fast(path)))
+                self.cmb_well.addItem(self.wells[-1].name)
+            except Exception as e: errors.append(f"{os.path.basename(path)}: {e}")
+        if not self.pending_loads:
+            # 느린 경로(lasio)/캐시 실패 사유는 로딩 라벨에 (여러 건이면 첫 건 + 개수, 툴팁에 전체)
+            self.load_timer.stop(); notes, self.load_notes = self.load_notes, []
+            self.lbl_load.setText("" if not notes else f"⚠ {notes[0]}" + (f" 외 {len(notes) - 1}건" if len(notes) > 1 else ""))
+            self.lbl_load.setToolTip("\n".join(notes))
+        else: self.lbl_load.setText(f"로딩 중... {len(self.pending_loads)}")
+        if self.cmb_well.currentIndex() < 0 and self.wells: self.cmb_well.setCurrentIndex(0)
+        self.refresh_ui_lists(); self.update_plots()
+        if errors: QMessageBox.critical(self, "오류", "\n".join(errors))
+
+    def on_close_well(self):
+        if self.well: self.remove_well(self.well); self.refresh_ui_lists(); self.update_plots()
+
+    def remove_well(self, well):
+        i = self.wells.index(well); self.wells.pop(i); self.cmb_well.removeItem(i)
+        panel = self.panels.pop(well, None)
+        if panel: panel.dispose(); self.plot_widget.removeItem(panel.layout)
+        if self.hover_track and self.hover_track[0] is panel: self.hover_track = None
+
+    def closeEvent(self, e):
+        if self.load_pool is not None: self.load_pool.shutdown(wait=True, cancel_futures=True) # 대기 중 작업은 취소, 실행 중 워커는 끝까지 정리
+        super().closeEvent(e)
 
     def refresh_ui_lists(self):
+        # 트랙 템플릿용 커브 목록은 모든 웰의 합집합, 계산 탭은 활성 웰 기준
+        names = []
+        for w in self.wells: names += [c for c in w.curve_names if c not in names]
+        self.all_curve_names = names; well_curves = self.well.curve_names if self.well else []
         cur_track = self.track_list.currentItem(); assigned_in_track = []
         if cur_track:
              t_name = cur_track.data(0, Qt.UserRole)
              if t_name in self.tracks_model: assigned_in_track = list(self.tracks_model[t_name]["curves"].keys())
         self.list_avail.clear(); self.list_avail.addItems([c for c in self.all_curve_names if c not in assigned_in_track])
         self.cmb_target.clear(); self.cmb_target.addItems(assigned_in_track)
-        self.cmb_rt.clear(); self.cmb_rt.addItems(self.all_curve_names)
-        self.cmb_phi.clear(); self.cmb_phi.addItems(self.all_curve_names)
+        self.cmb_rt.clear(); self.cmb_rt.addItems(well_curves)
+        self.cmb_phi.clear(); self.cmb_phi.addItems(well_curves)
         self.refresh_linked_curves_label()
 
     def refresh_linked_curves_label(self):
@@ -229,7 +1075,7 @@ class MainWindow(QMainWindow):
     def on_add_track(self):
         cnt=len(self.tracks_model)+1; name=f"Track-{cnt}"
         while name in self.tracks_model: cnt+=1; name=f"Track-{cnt}"
-        self.tracks_model[name] = {"r1": {"min":0, "max":100, "log":False}, "r2": {"min":0, "max":100, "log":False}, "curves": {}, "fill": {"en":False, "type":"Baseline", "lev":0.0, "tgt":"", "col":"#FFFF00"}}
+        self.tracks_model[name] = new_track_props()
         item = QTreeWidgetItem([name]); item.setData(0, Qt.UserRole, name)
         self.track_list.addTopLevelItem(item); self.track_list.setCurrentItem(item); self.update_plots()
 
@@ -300,157 +1146,219 @@ class MainWindow(QMainWindow):
     def open_color_picker(self):
         c=QColorDialog.getColor(self.cur_fill_col, self)
         if c.isValid(): self.cur_fill_col=c; self.update_fill_prev()
-    def add_curve_to_data(self, n, d): self.data_df[n]=d; self.all_curve_names.append(n); self.refresh_ui_lists()
+    def add_curve_to_data(self, n, d): self.well.add_curve(n, d); self.refresh_ui_lists(); self.update_plots()
+    def archie_step(self):
+        a=float(self.txt_a.text()); m=float(self.txt_m.text()); n=float(self.txt_n.text()); rw=float(self.txt_rw.text())
+        return ("Sw", archie_formula(self.cmb_phi.currentText(), self.cmb_rt.currentText(), a, m, n, rw, self.chk_phi_perc.isChecked()))
+    def run_steps(self, steps):
+        if self.well is None: return
+        try: res = run_recipe(steps, self.data_store)
+        except ValueError as e: QMessageBox.warning(self, "수식 오류", str(e)); return
+        for name, v in res.items(): self.well.add_curve(name, v)
+        self.refresh_ui_lists(); self.update_plots()
     def run_archie_calc(self):
+        try: step = self.archie_step()
+        except ValueError as e: QMessageBox.warning(self, "입력 오류", str(e)); return
+        self.run_steps([step])
+    def run_general_calc(self): self.run_steps([(self.txt_new_name.text().strip(), self.txt_formula.text())])
+    def refresh_recipe_list(self):
+        self.list_recipe.clear(); self.list_recipe.addItems([f"{n} = {f}" for n, f in self.recipe_steps])
+    def on_recipe_add_step(self, step):
+        try: compile_formula(step[1])
+        except ValueError as e: QMessageBox.warning(self, "수식 오류", str(e)); return
+        self.recipe_steps.append(step); self.refresh_recipe_list()
+    def on_recipe_add_formula(self):
+        if self.txt_new_name.text().strip(): self.on_recipe_add_step((self.txt_new_name.text().strip(), self.txt_formula.text()))
+    def on_recipe_add_archie(self):
+        try: self.on_recipe_add_step(self.archie_step())
+        except ValueError as e: QMessageBox.warning(self, "입력 오류", str(e))
+    def on_recipe_del(self):
+        i = self.list_recipe.currentRow()
+        if i >= 0: self.recipe_steps.pop(i); self.refresh_recipe_list()
+    def on_recipe_save(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Save Recipe", "", "Recipe (*.json)")
+        if path:
+            with open(path, 'w', encoding='utf-8') as fh: json.dump({"steps": self.recipe_steps}, fh, ensure_ascii=False, indent=1)
+    def on_recipe_load(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Load Recipe", "", "Recipe (*.json)")
+        if not path: return
         try:
-            a=float(self.txt_a.text()); m=float(self.txt_m.text()); n=float(self.txt_n.text()); rw=float(self.txt_rw.text())
-            phi=self.data_df[self.cmb_phi.currentText()].copy(); rt=self.data_df[self.cmb_rt.currentText()]
-            if self.chk_phi_perc.isChecked(): phi=phi/100.0
-            sw=((a*rw)/(phi**m*rt))**(1.0/n); self.add_curve_to_data("Sw", sw.clip(0,1))
-        except: pass
-    def run_general_calc(self):
-        try: self.add_curve_to_data(self.txt_new_name.text(), self.data_df.eval(self.txt_formula.text()))
-        except: pass
-    def on_top_changed(self, i, c): self.update_plots() 
-    def del_top(self): self.update_plots() 
+            with open(path, encoding='utf-8') as fh: steps = [tuple(x) for x in json.load(fh)["steps"]]
+            for _, f in steps: compile_formula(f)
+        except (OSError, ValueError, KeyError, TypeError) as e: QMessageBox.warning(self, "Recipe 오류", str(e)); return
+        self.recipe_steps = steps; self.refresh_recipe_list()
+    def run_recipe_all_wells(self):
+        if not self.recipe_steps or not self.wells: return
+        errors = []
+        for well, res in run_recipe_wells(self.wells, self.recipe_steps).items():
+            if isinstance(res, Exception): errors.append(f"{well.name}: {res}"); continue
+            for name, v in res.items(): well.add_curve(name, v)
+        self.refresh_ui_lists(); self.update_plots()
+        if errors: QMessageBox.warning(self, "Recipe 오류", "\n".join(errors))
+
+    # -----------------------------------------------------------------
+    # Well Tops (목록은 활성 웰 기준, 변경분만 항목/오버레이에 반영)
+    # -----------------------------------------------------------------
+    def refresh_top_tree(self):
+        if self.top_tree_well is self.well: return
+        self.top_tree_well = self.well
+        self.tree_tops.blockSignals(True); self.tree_tops.clear(); self.top_items = {}
+        for n, d in self.well_tops.items(): self.put_top_item(n, d)
+        self.tree_tops.blockSignals(False)
+
+    def put_top_item(self, name, d):
+        it = self.top_items.get(name)
+        if it is None:
+            it = self.top_items[name] = QTreeWidgetItem([name, ""])
+            it.setFlags(it.flags() | Qt.ItemIsEditable); it.setData(0, Qt.UserRole, name)
+            self.tree_tops.addTopLevelItem(it)
+        it.setText(1, f"{d:.2f}")
+
+    def top_edited(self, well):
+        panel = self.panels.get(well)
+        if panel: panel.sync_tops()
+
+    def on_top_changed(self, it, c):
+        well = self.well; old = it.data(0, Qt.UserRole)
+        if well is None or old not in well.tops: return
+        name = it.text(0).strip()
+        try: d = float(it.text(1))
+        except ValueError: d = None
+        self.tree_tops.blockSignals(True)
+        if d is None or not name or (name != old and name in well.tops):
+            it.setText(0, old); it.setText(1, f"{well.tops[old]:.2f}") # 잘못된 입력은 되돌림
+        else:
+            well.set_top(name, d, old); it.setData(0, Qt.UserRole, name); it.setText(1, f"{d:.2f}")
+            self.top_items[name] = self.top_items.pop(old); self.top_edited(well)
+        self.tree_tops.blockSignals(False)
+
+    def del_top(self):
+        well = self.well; sels = self.tree_tops.selectedItems()
+        if well is None or not sels: return
+        names = [it.data(0, Qt.UserRole) for it in sels]
+        well.drop_tops(names)
+        for n, it in zip(names, sels):
+            self.top_items.pop(n, None); self.tree_tops.takeTopLevelItem(self.tree_tops.indexOfTopLevelItem(it))
+        self.top_edited(well)
+
     def on_plot_clicked(self, evt): 
         pos=evt[0].scenePos()
-        for p in self.plot_tracks.values():
-            if p.vb.sceneBoundingRect().contains(pos):
-                t, ok=QInputDialog.getText(self, "New Top", "Name:")
-                if ok and t: self.well_tops[t]=p.vb.mapSceneToView(pos).y(); self.update_plots()
+        for panel in self.panels.values():
+            for p in panel.plot_tracks.values():
+                if p.vb.sceneBoundingRect().contains(pos):
+                    t, ok=QInputDialog.getText(self, "New Top", "Name:")
+                    if ok and t:
+                        well = panel.well; well.set_top(t, p.vb.mapSceneToView(pos).y()); panel.sync_tops()
+                        if well is self.top_tree_well:
+                            self.tree_tops.blockSignals(True); self.put_top_item(t, well.tops[t]); self.tree_tops.blockSignals(False)
+                    return
 
     # -----------------------------------------------------------------
     # Plotting & Hovering (Fix Ghosting & Tooltip)
     # -----------------------------------------------------------------
+    def hover_template(self, well, name, view):
+        # 트랙 구성/색이 바뀔 때만 툴팁 템플릿과 열 인덱스를 다시 만듦
+        mat = well.hover_values()
+        if view.hover is None or view.hover[0] != well.hover_rev:
+            tpl = TOOLTIP_HEAD; cols = []
+            for c_name, props in self.tracks_model[name]["curves"].items():
+                if c_name in well.store:
+                    tpl += f"<span style='color: {props['color']};'>[S{props.get('axis', 1)}] {c_name}: {{:.4f}}</span><br>"
+                    cols.append(well.store.rows[c_name])
+            view.hover = (well.hover_rev, tpl + "</div>", np.array(cols, dtype=np.intp))
+        return mat, view.hover[1], view.hover[2]
+
     def mouse_moved_across_plots(self, evt):
-        pos = evt[0] 
-        for track_name, plot_item in self.plot_tracks.items():
-            if plot_item.vb.sceneBoundingRect().contains(pos):
-                mouse_point = plot_item.vb.mapSceneToView(pos)
-                cursor_depth = mouse_point.y()
-                
-                if hasattr(plot_item, 'crosshairs'):
-                    v_line, h_line, label_item = plot_item.crosshairs
-                    v_line.setPos(mouse_point.x()); h_line.setPos(cursor_depth)
-                    
-                    try:
-                        idx_loc = self.data_df.index.get_indexer([cursor_depth], method='nearest')[0]
-                        actual_depth = self.data_df.index[idx_loc]
-                        
-                        tooltip_html = f"<div style='background-color:rgba(0,0,0,0.7); padding:3px;'>"
-                        tooltip_html += f"<span style='color: white; font-weight: bold;'>Depth: {actual_depth:.2f}</span><br>"
-                        
-                        if track_name in self.tracks_model:
-                            curves = self.tracks_model[track_name]["curves"]
-                            for c_name, props in curves.items():
-                                if c_name in self.data_df.columns:
-                                    val = self.data_df[c_name].iloc[idx_loc]
-                                    col = props['color']
-                                    ax = props.get("axis", 1)
-                                    tooltip_html += f"<span style='color: {col};'>[S{ax}] {c_name}: {val:.4f}</span><br>"
-                        tooltip_html += "</div>"
-                        
-                        label_item.setHtml(tooltip_html)
-                        label_item.setPos(mouse_point.x(), cursor_depth) 
-                        v_line.show(); h_line.show(); label_item.show()
-                    except: pass
-            else:
-                if hasattr(plot_item, 'crosshairs'):
-                    v_line, h_line, label_item = plot_item.crosshairs
-                    v_line.hide(); h_line.hide(); label_item.hide()
+        pos = evt[0]
+        hit = None
+        for panel in self.panels.values():
+            for track_name, plot_item in panel.plot_tracks.items():
+                if plot_item.vb.sceneBoundingRect().contains(pos): hit = (panel, track_name); break
+            if hit: break
+        # 이전 트랙의 crosshair만 숨김 (전체 트랙 순회 갱신 없음)
+        if self.hover_track != hit and self.hover_track and self.hover_track[1] in self.hover_track[0].plot_tracks:
+            for it in self.hover_track[0].plot_tracks[self.hover_track[1]].crosshairs: it.hide()
+        self.hover_track = hit
+        if hit is None: return
+
+        panel, track_name = hit; well = panel.well
+        plot_item = panel.plot_tracks[track_name]
+        mouse_point = plot_item.vb.mapSceneToView(pos)
+        cursor_depth = mouse_point.y()
+        v_line, h_line, label_item = plot_item.crosshairs
+        v_line.setPos(mouse_point.x()); h_line.setPos(cursor_depth)
+        try:
+            k = nearest_index(well.depth_arr, cursor_depth)
+            row = k if well.depth_rows is None else well.depth_rows[k]
+            mat, tpl, cols = self.hover_template(well, track_name, panel.track_views[track_name])
+            label_item.setHtml(tpl.format(well.depth_arr[k], *mat[cols, row]))
+            label_item.setPos(mouse_point.x(), cursor_depth)
+            v_line.show(); h_line.show(); label_item.show()
+        except: pass
 
     def update_plots(self):
-        # [중요] 기존 플롯 클리어
-        self.plot_widget.clear(); self.plot_tracks.clear()
-        
-        # [핵심] 유령 ViewBox 제거: 기존에 생성된 Scale 2 뷰박스들을 scene에서 강제 삭제
-        if hasattr(self, 'secondary_views'):
-            for v in self.secondary_views:
-                if v.scene(): v.scene().removeItem(v)
-            self.secondary_views.clear()
-        else:
-            self.secondary_views = []
+        # 웰마다 같은 tracks_model로 WellPanel을 갱신, 웰은 좌우로 나란히 배치
+        for c_idx, well in enumerate(self.wells):
+            panel = self.panels.get(well)
+            if panel is None:
+                panel = self.panels[well] = WellPanel(well, self.track_pool)
+                self.plot_widget.addItem(panel.layout, row=0, col=c_idx)
+            elif self.plot_widget.ci.items.get(panel.layout) != [(0, c_idx)]:
+                self.plot_widget.removeItem(panel.layout); self.plot_widget.addItem(panel.layout, row=0, col=c_idx)
+            panel.sync(self.tracks_model)
 
-        if self.data_df is None: return
-        depths = self.data_df.index.values
-        min_depth = self.data_df.index.min(); max_depth = self.data_df.index.max()
-        first_p = None; c_idx = 0
-        
-        for name, data in self.tracks_model.items():
-            # 1. Main Plot (Scale 1)
-            p1 = self.plot_widget.addPlot(row=0, col=c_idx); p1.showAxis('top', True); p1.showAxis('bottom', False)
-            p1.setLabel('top', name); p1.invertY(True)
-            p1.showGrid(x=True, y=True, alpha=0.3)
-            p1.setYRange(min_depth, max_depth) # Depth Range Fix
-            
-            r1 = data["r1"]
-            try: p1.setXRange(r1["min"], r1["max"]); p1.setLogMode(r1["log"], False)
-            except: pass
-            
-            if not first_p: first_p = p1; p1.setLabel('left', 'Depth')
-            else: p1.setYLink(first_p); p1.showAxis('left', False)
-
-            v_line = pg.InfiniteLine(angle=90, movable=False, pen=pg.mkPen('w', width=1, style=Qt.DashLine))
-            h_line = pg.InfiniteLine(angle=0, movable=False, pen=pg.mkPen('w', width=1, style=Qt.DashLine))
-            label_item = pg.TextItem(anchor=(0, 1)); label_item.setZValue(100) 
-            p1.addItem(v_line); p1.addItem(h_line); p1.addItem(label_item)
-            v_line.hide(); h_line.hide(); label_item.hide()
-            p1.crosshairs = (v_line, h_line, label_item)
-            
-            curves1 = {k:v for k,v in data["curves"].items() if v.get("axis", 1)==1}
-            curves2 = {k:v for k,v in data["curves"].items() if v.get("axis", 1)==2}
-            plot_items = {}
-
-            # Draw Scale 1
-            for c, p in curves1.items():
-                if c in self.data_df:
-                    item = p1.plot(self.data_df[c].values, depths, pen=pg.mkPen(p["color"], width=2))
-                    plot_items[c] = item
-            
-            # Draw Scale 2 (Overlay)
-            if curves2:
-                v2 = pg.ViewBox()
-                # [핵심] 리스트에 추가해서 나중에 지울 수 있게 함
-                self.secondary_views.append(v2)
-                p1.scene().addItem(v2)
-                p1.getAxis('bottom').linkToView(v2)
-                v2.setYLink(p1) # Y축만 링크
-                
-                p1.showAxis('bottom', True); p1.getAxis('bottom').setLabel(f"{name} (Scale 2)")
-                r2 = data["r2"]
-                try: v2.setXRange(r2["min"], r2["max"]) 
-                except: pass
-                
-                def update_v2_geometry():
-                    v2.setGeometry(p1.vb.sceneBoundingRect())
-                    v2.setYRange(p1.vb.viewRange()[1][0], p1.vb.viewRange()[1][1], padding=0)
-                p1.vb.sigResized.connect(update_v2_geometry)
-                update_v2_geometry() 
-                
-                for c, p in curves2.items():
-                    if c in self.data_df:
-                        pen = pg.mkPen(p["color"], width=2, style=Qt.DashLine)
-                        item = pg.PlotCurveItem(self.data_df[c].values, depths, pen=pen)
-                        v2.addItem(item)
-
-            for t, d in self.well_tops.items(): p1.addItem(pg.InfiniteLine(pos=d, angle=0, pen='r'))
-
-            fs = data["fill"]
-            if fs["en"] and curves1:
-                try:
-                    c1 = list(curves1.keys())[0]; i1 = plot_items.get(c1)
-                    if i1:
-                        b = pg.mkBrush(fs["col"])
-                        if fs["type"]=="Baseline": i1.setFillLevel(fs["lev"]); i1.setFillBrush(b)
-                        elif fs["type"]=="Curve-Curve":
-                            tgt=fs["tgt"]; i2=plot_items.get(tgt)
-                            if i2 and c1!=tgt: p1.addItem(pg.FillBetweenItem(i1, i2, brush=b))
-                except: pass
+# -----------------------------------------------------------------
+# Layout Benchmark (python woolog.py bench: 트랙 추가/삭제 반복 시 지연·메모리·객체 수 추이)
+# -----------------------------------------------------------------
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as fh: return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError): return float("nan")
+
+def bench_main(argv):
+    import gc
+    ap = argparse.ArgumentParser(prog="woolog.py bench", description="트랙 레이아웃 변경 반복 벤치마크 (오프스크린)")
+    ap.add_argument("-n", "--iters", type=int, default=1000)
+    ap.add_argument("--wells", type=int, default=2); ap.add_argument("--tracks", type=int, default=4)
+    ap.add_argument("--samples", type=int, default=20000)
+    ap.add_argument("--no-pool", action="store_true", help="트랙 재사용 끄기 (비교용)")
+    args = ap.parse_args(argv)
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    win = MainWindow(); win.resize(1400, 900); win.show()
+    if args.no_pool: win.track_pool.size = 0
+    rng = np.random.default_rng(0); depth = 1000 + np.arange(args.samples) * 0.1524
+    for k in range(args.wells):
+        data = np.vstack([rng.random(args.samples) * 150, 10 ** rng.random(args.samples)]).astype(np.float32)
+        las = LasFile(f"BENCH-{k}", {"W": {"WELL": f"BENCH-{k}"}}, [LasCurve("DEPT", "M", ""), LasCurve("GR", "GAPI", ""), LasCurve("RT", "OHMM", "")], depth, data)
+        win.wells.append(WellData(las.path, las)); win.cmb_well.addItem(win.wells[-1].name)
+
+    def track(i):
+        # Scale 1 + Scale 2 커브를 가진 듀얼 축 트랙
+        props = new_track_props(); props["curves"] = {"GR": {"color": "green", "axis": 1}, "RT": {"color": "red", "axis": 2}}
+        props["r2"] = {"min": 1, "max": 10, "log": False}; win.tracks_model[f"B-{i}"] = props
+    for i in range(args.tracks): track(i)
+    win.update_plots(); app.processEvents()
 
-            self.plot_tracks[name] = p1; c_idx += 1
+    scene = win.plot_widget.scene(); step = max(1, args.iters // 10); times = []
+    print(f"{'iter':>6} {'ms/op':>8} {'RSS MB':>8} {'ViewBox':>8} {'scene items':>12}")
+    for i in range(args.iters):
+        t0 = time.perf_counter()
+        del win.tracks_model[next(iter(win.tracks_model))]; track(args.tracks + i) # 맨 앞 트랙 삭제 + 새 트랙 추가 → 열 이동 포함
+        win.update_plots(); app.processEvents()
+        times.append(time.perf_counter() - t0)
+        if (i + 1) % step == 0 or i == 0:
+            gc.collect(); n_vb = sum(isinstance(o, pg.ViewBox) for o in gc.get_objects())
+            print(f"{i + 1:>6} {np.mean(times[-step:]) * 1e3:>8.2f} {rss_mb():>8.1f} {n_vb:>8} {len(scene.items()):>12}")
+    t = np.array(times) * 1e3; k = max(1, len(t) // 10)
+    print(f"pool={'off' if args.no_pool else 'on'}  first {k}: {np.median(t[:k]):.2f} ms  last {k}: {np.median(t[-k:]):.2f} ms")
+    win.close()
+    return 0
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support() # PyInstaller exe: 워커 프로세스가 MainWindow를 다시 띄우지 않도록
+    if len(sys.argv) > 1 and sys.argv[1] == "batch": sys.exit(batch_main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "bench": sys.exit(bench_main(sys.argv[2:]))
     app = QApplication(sys.argv)
     win = MainWindow(); win.show()
     sys.exit(app.exec())